@@ -6,14 +6,45 @@ et enrichit les statistiques avec les vrais noms
 
 import pandas as pd
 from pathlib import Path
+from typing import Optional
 
+from cube import rollup
+from dataset import TableSource, as_stats
 
-def apply_manual_mapping(stats_csv: str, mapping_csv: str, output_csv: str):
+
+def famille_rollup(cube: pd.DataFrame, mapping: pd.DataFrame) -> pd.DataFrame:
+    """
+    Statistiques par famille politique, regroupement du cube d'agrégats
+
+    Chaque cellule (amendements de députés) reçoit la famille de son groupe
+    d'après la correspondance manuelle (colonnes code_po, famille_politique).
+    """
+    cube = cube[(cube['auteur_type'] == 'Député') & cube['groupe_uid'].notna()]
+    familles = mapping.drop_duplicates('code_po').set_index('code_po')['famille_politique']
+    cube = cube.assign(famille_politique=cube['groupe_uid'].astype(str).map(familles))
+    
+    famille_stats = rollup(cube, 'famille_politique')
+    total = famille_stats['nb_amendements']
+    return pd.DataFrame({
+        'nb_deputes_actifs': famille_stats['nb_acteurs'],
+        'nb_amendements_total': total,
+        'nb_amendements_adoptes': famille_stats['nb_amendements_adoptes'],
+        'taux_adoption_pct': (famille_stats['nb_amendements_adoptes'] / total * 100).round(2),
+        'moyenne_amendements_par_depute': (total / famille_stats['nb_acteurs']).round(2),
+    })
+
+
+def apply_manual_mapping(stats: TableSource, mapping_csv: str, output_csv: str,
+                         cube: Optional[pd.DataFrame] = None) -> pd.DataFrame:
     """
     Applique la correspondance manuelle et crée les stats enrichies
+    
+    stats est le chemin de stats_par_groupe.csv ou les statistiques déjà calculées.
+    Si le cube d'agrégats est fourni (voir cube.py), l'agrégation par famille
+    politique en est un regroupement : députés distincts et taux exacts.
     """
     print("Chargement des données...")
-    stats = pd.read_csv(stats_csv)
+    stats = as_stats(stats)
     mapping = pd.read_csv(mapping_csv, comment='#')
     
     print(f"  - {len(stats)} groupes dans les stats")
@@ -60,15 +91,20 @@ def apply_manual_mapping(stats_csv: str, mapping_csv: str, output_csv: str):
     print("AGRÉGATION PAR FAMILLE POLITIQUE")
     print("="*100)
     
-    famille_stats = stats_enrichi.groupby('famille_politique').agg({
-        'nb_deputes_actifs': 'sum',
-        'nb_amendements_total': 'sum',
-        'nb_amendements_adoptes': 'sum',
-        'taux_adoption_pct': 'mean',
-        'moyenne_amendements_par_depute': 'mean'
-    }).round(2)
+    if cube is not None:
+        famille_stats = famille_rollup(cube, mapping)
+    else:
+        famille_stats = stats_enrichi.groupby('famille_politique').agg({
+            'nb_deputes_actifs': 'sum',
+            'nb_amendements_total': 'sum',
+            'nb_amendements_adoptes': 'sum',
+            'taux_adoption_pct': 'mean',
+            'moyenne_amendements_par_depute': 'mean'
+        }).round(2)
     
     print(famille_stats.to_string())
+    
+    return stats_enrichi
 
 
 if __name__ == '__main__':
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Mesure des performances de chaque étape sur des jeux synthétiques
+Génère (une fois) un jeu de chaque taille demandée avec generate_synthetic.py,
+exécute chaque étape du pipeline dans un processus séparé, et affiche sa
+durée, son débit (fichiers/s ou amendements/s) et son pic de mémoire (RSS) ;
+les mesures sont comparées à une référence enregistrée pour signaler les
+régressions
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate_synthetic import FORMAT_VERSION, generate_dataset, load_metadata
+from metrics import peak_rss_mb
+
+
+DEFAULT_SIZES = [10_000]
+
+# Fichiers de résultats, dans data/benchmarks/
+REFERENCE_NAME = 'reference.json'
+LAST_RUN_NAME = 'dernier.json'
+
+# Écart relatif toléré avant de signaler une régression
+DEFAULT_TOLERANCE = 0.20
+
+# Écarts absolus en dessous desquels une différence est attribuée au bruit
+NOISE_SECONDS = 0.25
+NOISE_RSS_MB = 20.0
+
+# Étape de normalisation → type de fichiers lus (clé de synthetique.json)
+NORMALIZATION_FILES = {'acteurs': 'acteurs', 'organes': 'organes', 'mandats': 'mandats',
+                       'amendements': 'amendements'}
+
+# Préfixe de la ligne de résultat écrite par le processus de mesure
+RESULT_PREFIX = 'MESURE '
+
+
+def stage_caches(root: Path, stage_name: str) -> List[Path]:
+    """
+    Caches produits par une étape, à côté d'amendements.csv : supprimés avant
+    chaque mesure, sinon seule la première répétition (ou le premier passage
+    sur un jeu existant) les calcule et les suivantes ne mesurent que leur relecture
+    """
+    from cosignatures import matrix_path
+    from cube import cube_path
+    from embedding import embedding_path
+
+    amendements_csv = root / "data" / "csv" / "amendements.csv"
+    caches = {
+        'cube': [cube_path(amendements_csv)],
+        'affinite_groupes': [matrix_path(str(amendements_csv))],
+        'nuage_deputes': [embedding_path(amendements_csv)],
+    }
+    return caches.get(stage_name, [])
+
+
+def measure_stage(root: Path, stage_name: str, workers: int):
+    """Exécute une étape (processus de mesure), sans ses caches, et écrit sa durée et son pic de mémoire"""
+    from pipeline import build_stages
+
+    for cache in stage_caches(root, stage_name):
+        cache.unlink(missing_ok=True)
+    stages = {stage.name: stage for stage in build_stages(root, workers=workers)}
+    start = time.perf_counter()
+    stages[stage_name].run()
+    elapsed = time.perf_counter() - start
+    print(RESULT_PREFIX + json.dumps({'secondes': elapsed, 'rss_max_mo': peak_rss_mb()}))
+
+
+def run_stage(root: Path, stage_name: str, workers: int) -> Optional[Dict[str, float]]:
+    """Mesure une étape dans un nouveau processus (mémoire non partagée avec les autres étapes)"""
+    command = [sys.executable, __file__, '--mesurer', stage_name, '--racine', str(root), '--workers', str(workers)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if completed.returncode != 0 or not lines:
+        print(f"Erreur: étape {stage_name} en échec (code {completed.returncode})")
+        print('\n'.join(completed.stderr.strip().splitlines()[-5:]))
+        return None
+    return json.loads(lines[-1][len(RESULT_PREFIX):])
+
+
+def ensure_dataset(root: Path, size: int, seed: int, workers: int) -> Dict[str, Any]:
+    """Jeu synthétique de la taille demandée, généré s'il n'existe pas encore ou s'il est d'un format antérieur"""
+    metadata = load_metadata(str(root))
+    if (metadata is not None and metadata.get('format') == FORMAT_VERSION
+            and metadata['amendements'] == size and metadata['graine'] == seed):
+        return metadata
+    print(f"Génération d'un jeu de {size} amendements dans {root}...")
+    return generate_dataset(str(root), size, seed=seed, workers=workers)
+
+
+def benchmark_size(root: Path, metadata: Dict[str, Any], workers: int, repetitions: int,
+                   stage_names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Mesure chaque étape du pipeline (ou stage_names et les étapes dont elles
+    dépendent), dans l'ordre des dépendances
+
+    Chaque étape est répétée repetitions fois ; la durée et le pic de mémoire
+    retenus sont les plus faibles (les moins perturbés par le reste du système).
+    Le débit est exprimé en fichiers JSON lus par seconde pour les
+    normalisations, en amendements par seconde pour les statistiques.
+    """
+    from pipeline import build_stages, select_stages
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for stage in select_stages(build_stages(root, workers=workers), stage_names):
+        runs = [run_stage(root, stage.name, workers) for _ in range(repetitions)]
+        if any(run is None for run in runs):
+            break
+        seconds = min(run['secondes'] for run in runs)
+        if stage.name in NORMALIZATION_FILES:
+            volume, unit = metadata['fichiers'][NORMALIZATION_FILES[stage.name]], 'fichiers/s'
+        else:
+            volume, unit = metadata['fichiers']['amendements'], 'amendements/s'
+        results[stage.name] = {
+            'secondes': round(seconds, 3),
+            'debit': round(volume / seconds, 1) if seconds > 0 else None,
+            'unite': unit,
+            'rss_max_mo': round(min(run['rss_max_mo'] for run in runs), 1),
+        }
+        print(f"  {stage.name:<28} {seconds:8.2f} s   {results[stage.name]['debit'] or 0:>12,.0f} {unit:<14}"
+              f"{results[stage.name]['rss_max_mo']:8.0f} Mo")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, Any]]], reference: Dict[str, Dict[str, Dict[str, Any]]],
+            tolerance: float) -> List[str]:
+    """
+    Régressions par rapport à la référence
+
+    Une durée ou un pic de mémoire est signalé s'il dépasse la référence de
+    plus de tolerance (en relatif) et de plus que le bruit de mesure (en absolu).
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            previous = reference.get(size, {}).get(name)
+            if previous is None:
+                continue
+            for key, label, noise in (('secondes', 'durée', NOISE_SECONDS), ('rss_max_mo', 'mémoire', NOISE_RSS_MB)):
+                before, after = previous[key], current[key]
+                if after > before * (1 + tolerance) and after - before > noise:
+                    regressions.append(f"{size} amendements, {name}: {label} {before:g} → {after:g} "
+                                       f"(+{(after / before - 1) * 100:.0f} %)")
+    return regressions
+
+
+def _read_results(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def _write_results(path: Path, results: Dict[str, Dict[str, Dict[str, Any]]]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'systeme': platform.platform(),
+                    'processeur': platform.processor() or platform.machine()},
+        'resultats': results,
+    }
+    path.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def main():
+    """Mesure les étapes sur des jeux synthétiques et compare à la référence"""
+    parser = argparse.ArgumentParser(description="Mesure des performances sur des jeux synthétiques")
+    parser.add_argument('--tailles', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Nombres d'amendements des jeux mesurés (défaut: 10000)")
+    parser.add_argument('--etapes', nargs='+', metavar='ETAPE',
+                        help="Étapes à mesurer, avec celles dont elles dépendent (défaut: toutes)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processus de chaque normalisation et de la génération (défaut: 1)")
+    parser.add_argument('--repetitions', type=int, default=1, help="Mesures par étape (défaut: 1)")
+    parser.add_argument('--graine', type=int, default=0, help="Graine des jeux générés (défaut: 0)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Écart relatif toléré avant de signaler une régression (défaut: 0.20)")
+    parser.add_argument('--dossier', help="Dossier des jeux et des résultats (défaut: data/benchmarks)")
+    parser.add_argument('--enregistrer-reference', action='store_true',
+                        help="Enregistrer ces mesures comme nouvelle référence")
+    parser.add_argument('--mesurer', help=argparse.SUPPRESS)
+    parser.add_argument('--racine', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mesurer:
+        measure_stage(Path(args.racine), args.mesurer, args.workers)
+        return
+
+    bench_dir = Path(args.dossier) if args.dossier else Path(__file__).parent.parent / "data" / "benchmarks"
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for size in args.tailles:
+        root = bench_dir / f"synthetique_{size}"
+        metadata = ensure_dataset(root, size, args.graine, args.workers)
+        print(f"\n{size} amendements ({metadata['textes']} textes, {metadata['fichiers']['mandats']} mandats)")
+        print("-" * 70)
+        results[str(size)] = benchmark_size(root, metadata, args.workers, max(1, args.repetitions), args.etapes)
+
+    _write_results(bench_dir / LAST_RUN_NAME, results)
+    reference_path = bench_dir / REFERENCE_NAME
+    reference = _read_results(reference_path)
+
+    if args.enregistrer_reference:
+        merged = dict(reference.get('resultats', {}))
+        merged.update(results)
+        _write_results(reference_path, merged)
+        print(f"\n✓ Référence enregistrée: {reference_path}")
+        return
+    if not reference:
+        print(f"\nAucune référence ({reference_path}) : relancer avec --enregistrer-reference pour en créer une")
+        return
+
+    regressions = compare(results, reference['resultats'], args.tolerance)
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} régressions par rapport à la référence du {reference['date']}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n✓ Aucune régression par rapport à la référence du {reference['date']} "
+          f"(tolérance {args.tolerance * 100:.0f} %)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,37 @@
 #!/usr/bin/env python3
 """
 Calcul de statistiques par député
-Agrège les amendements et calcule des métriques d'activité parlementaire
+Agrège les amendements et calcule des métriques d'activité parlementaire,
+à partir des CSV normalisés (cube d'agrégats) ou de la base SQLite
 """
 
+import argparse
+import sys
 import pandas as pd
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Union
 
+from cube import as_cube
+from dataset import TableSource, as_table
+from reports import REPORTS, compute_reports, finalize_report
+from schema import consumer_columns
+from sqlite_store import connect, depute_label_tables, deputes_rollup
 
-def compute_depute_stats(amendements_csv: str, acteurs_csv: str, mandats_csv: str, output_csv: str):
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'compute_depute_stats'
+
+
+def compute_depute_stats(amendements: TableSource, acteurs: TableSource, mandats: TableSource,
+                         output_csv: str) -> pd.DataFrame:
     """
     Calcule les statistiques d'activité par député
     
+    Chaque table est un chemin de CSV normalisé ou un DataFrame déjà chargé
+    (voir dataset.StatsDataset) ; amendements peut aussi être le cube d'agrégats
+    (voir cube.py), dont les statistiques sont un regroupement par acteur.
+    Les statistiques sont écrites dans output_csv et renvoyées.
+    
     Métriques calculées:
     - Nombre total d'amendements déposés (comme auteur)
     - Nombre d'amendements adoptés
@@ -25,91 +44,55 @@ def compute_depute_stats(amendements_csv: str, acteurs_csv: str, mandats_csv: st
     """
     print("Chargement des données...")
     
-    # Charger les CSV
-    amendements = pd.read_csv(amendements_csv)
-    acteurs = pd.read_csv(acteurs_csv)
-    mandats = pd.read_csv(mandats_csv)
+    # Charger les tables typées (Parquet si disponible), uniquement les colonnes utiles
+    acteurs = as_table(acteurs, columns=consumer_columns(CONSUMER, 'acteurs'), table='acteurs')
+    mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    cube = as_cube(amendements, mandats)
     
-    print(f"  - {len(amendements)} amendements")
+    print(f"  - {cube['nb_amendements'].sum()} amendements")
     print(f"  - {len(acteurs)} acteurs")
     print(f"  - {len(mandats)} mandats")
     
-    # Filtrer les amendements déposés par des députés (auteur_type = "Député")
-    amendements_deputes = amendements[amendements['auteur_type'] == 'Député'].copy()
-    
-    print(f"\nCalcul des statistiques pour {amendements_deputes['auteur_acteur_uid'].nunique()} députés...")
-    
-    # Grouper par député auteur
-    stats_list = []
+    # Amendements déposés par des députés (auteur_type = "Député")
+    cube_deputes = cube[cube['auteur_type'] == 'Député']
     
-    for acteur_uid, group in amendements_deputes.groupby('auteur_acteur_uid'):
-        # Compter les amendements par sort
-        total = len(group)
-        
-        # Compter par état/sort
-        adoptes = len(group[group['sort'].str.contains('Adopt|adopt', na=False, case=False)])
-        rejetes = len(group[group['sort'].str.contains('Rejet|rejet', na=False, case=False)])
-        retires = len(group[group['sort'].str.contains('Retir|retir', na=False, case=False)])
-        irrecevables = len(group[group['etat_code'].str.contains('IRR', na=False)])
-        non_soutenus = len(group[group['sort'].str.contains('Non soutenu|non soutenu', na=False, case=False)])
-        tombes = len(group[group['sort'].str.contains('Tomb|tomb|Caduque|caduque', na=False, case=False)])
-        
-        # Calculs dérivés
-        taux_adoption = (adoptes / total * 100) if total > 0 else 0
-        taux_rejet = (rejetes / total * 100) if total > 0 else 0
-        taux_irrecevable = (irrecevables / total * 100) if total > 0 else 0
-        
-        # Moyenne de cosignataires
-        moyenne_cosignataires = group['nb_cosignataires'].mean()
-        
-        # Article 40
-        article40_count = len(group[group['soumis_article40'] == 'true'])
-        
-        # Récupérer le groupe politique le plus récent du député
-        mandats_depute = mandats[mandats['acteur_uid'] == acteur_uid]
-        mandats_depute = mandats_depute.sort_values('date_debut', ascending=False)
-        groupe_politique_uid = mandats_depute.iloc[0]['organe_uid'] if len(mandats_depute) > 0 else ''
-        
-        stats_list.append({
-            'acteur_uid': acteur_uid,
-            'groupe_politique_uid': groupe_politique_uid,
-            'nb_amendements_total': total,
-            'nb_amendements_adoptes': adoptes,
-            'nb_amendements_rejetes': rejetes,
-            'nb_amendements_retires': retires,
-            'nb_amendements_irrecevables': irrecevables,
-            'nb_amendements_non_soutenus': non_soutenus,
-            'nb_amendements_tombes': tombes,
-            'taux_adoption_pct': round(taux_adoption, 2),
-            'taux_rejet_pct': round(taux_rejet, 2),
-            'taux_irrecevable_pct': round(taux_irrecevable, 2),
-            'moyenne_cosignataires': round(moyenne_cosignataires, 2),
-            'nb_amendements_article40': article40_count
-        })
+    print(f"\nCalcul des statistiques pour {cube_deputes['acteur_uid'].nunique()} députés...")
     
-    # Créer DataFrame des stats
-    stats_df = pd.DataFrame(stats_list)
-    
-    # Joindre avec les infos acteurs (nom, prénom, etc.)
-    stats_df = stats_df.merge(
-        acteurs[['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'profession_libelle']],
-        on='acteur_uid',
-        how='left'
-    )
-    
-    # Réorganiser les colonnes
-    cols = ['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'groupe_politique_uid',
-            'nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
-            'nb_amendements_retires', 'nb_amendements_irrecevables', 
-            'nb_amendements_non_soutenus', 'nb_amendements_tombes',
-            'taux_adoption_pct', 'taux_rejet_pct', 'taux_irrecevable_pct',
-            'moyenne_cosignataires', 'nb_amendements_article40', 'profession_libelle']
-    
-    stats_df = stats_df[cols]
-    
-    # Trier par nombre d'amendements décroissant
-    stats_df = stats_df.sort_values('nb_amendements_total', ascending=False)
+    # Regrouper le cube par député auteur (rapport déclaratif, voir reports.py)
+    stats_df = compute_reports(cube, [REPORTS['stats_par_depute']],
+                               {'acteurs': acteurs, 'mandats': mandats})['stats_par_depute']
     
+    return _export(stats_df, output_csv)
+
+
+def compute_depute_stats_sql(db_path: Union[str, Path], output_csv: str, texte: Optional[str] = None,
+                             depuis: Optional[str] = None) -> pd.DataFrame:
+    """
+    Calcule les statistiques par député dans la base SQLite (voir sqlite_store.py)
+
+    Le regroupement par député est une requête SQL sur les amendements ; seules
+    les lignes de résultat et l'identité des auteurs retenus sont chargées.
+    Sans filtre, le résultat est identique à compute_depute_stats.
+
+    Args:
+        texte: Ne compter que les amendements de ce texte (texte_legislatif_ref)
+        depuis: Ne compter que les amendements déposés à cette date (AAAA-MM-JJ) ou après
+    """
+    print(f"Regroupement SQL des amendements par député ({db_path})...")
+    conn = connect(db_path)
+    try:
+        grouped = deputes_rollup(conn, 'acteur_uid', texte, depuis)
+        tables = depute_label_tables(conn, texte, depuis)
+    finally:
+        conn.close()
+
+    print(f"  - {grouped['nb_amendements'].sum()} amendements de {len(grouped)} députés")
+    stats_df = finalize_report(REPORTS['stats_par_depute'], grouped, tables)
+    return _export(stats_df, output_csv)
+
+
+def _export(stats_df: pd.DataFrame, output_csv: str) -> pd.DataFrame:
+    """Écrit les statistiques par député et en affiche un aperçu"""
     # Sauvegarder
     output_path = Path(output_csv)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -127,19 +110,35 @@ def compute_depute_stats(amendements_csv: str, acteurs_csv: str, mandats_csv: st
     print(f"Médiane d'amendements par député: {stats_df['nb_amendements_total'].median():.0f}")
     print(f"\nTop 10 des députés les plus actifs:")
     print(stats_df[['nom', 'prenom', 'nb_amendements_total', 'taux_adoption_pct']].head(10).to_string(index=False))
+    
+    return stats_df
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Statistiques par député")
+    parser.add_argument('--sqlite', metavar='BASE', help="Calculer en SQL dans cette base (voir sqlite_store.py)")
+    parser.add_argument('--texte', help="Uniquement les amendements de ce texte (avec --sqlite)")
+    parser.add_argument('--depuis', metavar='AAAA-MM-JJ',
+                        help="Uniquement les amendements déposés depuis cette date (avec --sqlite)")
+    parser.add_argument('--sortie', help="CSV de sortie (défaut: data/stats/stats_par_depute.csv)")
+    args = parser.parse_args()
+    
     base_dir = Path(__file__).parent.parent
     
     amendements_csv = base_dir / "data" / "csv" / "amendements.csv"
     acteurs_csv = base_dir / "data" / "csv" / "acteurs.csv"
     mandats_csv = base_dir / "data" / "csv" / "mandats.csv"
-    output_csv = base_dir / "data" / "stats" / "stats_par_depute.csv"
-    
-    compute_depute_stats(
-        str(amendements_csv),
-        str(acteurs_csv),
-        str(mandats_csv),
-        str(output_csv)
-    )
+    output_csv = args.sortie or base_dir / "data" / "stats" / "stats_par_depute.csv"
+    
+    if args.sqlite:
+        if not Path(args.sqlite).exists():
+            print(f"Erreur: base SQLite non trouvée: {args.sqlite} (voir run_normalization.py --sqlite)")
+            sys.exit(1)
+        compute_depute_stats_sql(args.sqlite, str(output_csv), texte=args.texte, depuis=args.depuis)
+    else:
+        compute_depute_stats(
+            str(amendements_csv),
+            str(acteurs_csv),
+            str(mandats_csv),
+            str(output_csv)
+        )
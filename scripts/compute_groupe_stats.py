@@ -1,17 +1,41 @@
 #!/usr/bin/env python3
 """
 Calcul de statistiques par groupe politique
-Agrège les amendements par groupe et calcule des métriques collectives
+Agrège les amendements par groupe et calcule des métriques collectives,
+à partir des CSV normalisés (cube d'agrégats) ou de la base SQLite
 """
 
+import argparse
+import sys
 import pandas as pd
 from pathlib import Path
+from typing import Optional, Union
 
+from cube import as_cube
+from dataset import TableSource, as_table
+from reports import REPORTS, compute_reports, finalize_report
+from schema import consumer_columns
+from sqlite_store import connect, deputes_rollup, groupe_label_tables
 
-def compute_groupe_stats(amendements_csv: str, organes_csv: str, output_csv: str):
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'compute_groupe_stats'
+
+
+def compute_groupe_stats(amendements: TableSource, organes: TableSource, output_csv: str,
+                         mandats: Optional[TableSource] = None) -> pd.DataFrame:
     """
     Calcule les statistiques d'activité par groupe politique
     
+    Chaque table est un chemin de CSV normalisé ou un DataFrame déjà chargé
+    (voir dataset.StatsDataset) ; amendements peut aussi être le cube d'agrégats
+    (voir cube.py), dont les statistiques sont un regroupement par groupe.
+    Les statistiques sont écrites dans output_csv et renvoyées.
+    
+    Si mandats est fourni, chaque amendement est attribué au groupe dont son
+    auteur était membre à la date de dépôt (mandats GP, voir groupes_temporels.py) ;
+    à défaut de mandat couvrant cette date, le groupe indiqué dans l'amendement est conservé.
+    
     Métriques calculées:
     - Nombre de députés actifs (ayant déposé au moins 1 amendement)
     - Nombre total d'amendements déposés par le groupe
@@ -23,83 +47,56 @@ def compute_groupe_stats(amendements_csv: str, organes_csv: str, output_csv: str
     """
     print("Chargement des données...")
     
-    amendements = pd.read_csv(amendements_csv)
-    organes = pd.read_csv(organes_csv)
+    organes = as_table(organes, columns=consumer_columns(CONSUMER, 'organes'), table='organes')
+    if mandats is not None:
+        mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    cube = as_cube(amendements, mandats)
     
-    print(f"  - {len(amendements)} amendements")
+    print(f"  - {cube['nb_amendements'].sum()} amendements")
     print(f"  - {len(organes)} organes")
     
-    # Filtrer les amendements par des députés avec groupe politique
-    amendements_groupes = amendements[
-        (amendements['auteur_type'] == 'Député') & 
-        (amendements['auteur_groupe_politique_uid'].notna()) &
-        (amendements['auteur_groupe_politique_uid'] != '')
-    ].copy()
-    
-    print(f"\nCalcul des statistiques pour {amendements_groupes['auteur_groupe_politique_uid'].nunique()} groupes politiques...")
+    # Amendements déposés par des députés avec groupe politique (le groupe du
+    # cube est déjà celui de l'auteur à la date de dépôt si mandats est fourni)
+    cube_groupes = cube[(cube['auteur_type'] == 'Député') & cube['groupe_uid'].notna()]
     
-    stats_list = []
+    print(f"\nCalcul des statistiques pour {cube_groupes['groupe_uid'].nunique()} groupes politiques...")
     
-    for groupe_uid, group in amendements_groupes.groupby('auteur_groupe_politique_uid'):
-        # Nombre de députés différents dans ce groupe
-        nb_deputes_actifs = group['auteur_acteur_uid'].nunique()
-        
-        # Comptages
-        total = len(group)
-        adoptes = len(group[group['sort'].str.contains('Adopt|adopt', na=False, case=False)])
-        rejetes = len(group[group['sort'].str.contains('Rejet|rejet', na=False, case=False)])
-        retires = len(group[group['sort'].str.contains('Retir|retir', na=False, case=False)])
-        irrecevables = len(group[group['etat_code'].str.contains('IRR', na=False)])
-        
-        # Taux
-        taux_adoption = (adoptes / total * 100) if total > 0 else 0
-        taux_rejet = (rejetes / total * 100) if total > 0 else 0
-        taux_irrecevable = (irrecevables / total * 100) if total > 0 else 0
-        
-        # Moyenne par député
-        moyenne_par_depute = total / nb_deputes_actifs if nb_deputes_actifs > 0 else 0
-        
-        # Moyenne de cosignataires
-        moyenne_cosignataires = group['nb_cosignataires'].mean()
-        
-        stats_list.append({
-            'groupe_politique_uid': groupe_uid,
-            'nb_deputes_actifs': nb_deputes_actifs,
-            'nb_amendements_total': total,
-            'nb_amendements_adoptes': adoptes,
-            'nb_amendements_rejetes': rejetes,
-            'nb_amendements_retires': retires,
-            'nb_amendements_irrecevables': irrecevables,
-            'taux_adoption_pct': round(taux_adoption, 2),
-            'taux_rejet_pct': round(taux_rejet, 2),
-            'taux_irrecevable_pct': round(taux_irrecevable, 2),
-            'moyenne_amendements_par_depute': round(moyenne_par_depute, 2),
-            'moyenne_cosignataires': round(moyenne_cosignataires, 2)
-        })
-    
-    # Créer DataFrame
-    stats_df = pd.DataFrame(stats_list)
-    
-    # Joindre avec les infos organes
-    stats_df = stats_df.merge(
-        organes[['organe_uid', 'libelle', 'libelle_abrege']],
-        left_on='groupe_politique_uid',
-        right_on='organe_uid',
-        how='left'
-    )
-    
-    # Réorganiser les colonnes
-    cols = ['groupe_politique_uid', 'libelle', 'libelle_abrege', 'nb_deputes_actifs',
-            'nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
-            'nb_amendements_retires', 'nb_amendements_irrecevables',
-            'taux_adoption_pct', 'taux_rejet_pct', 'taux_irrecevable_pct',
-            'moyenne_amendements_par_depute', 'moyenne_cosignataires']
-    
-    stats_df = stats_df[cols]
-    
-    # Trier par nombre d'amendements
-    stats_df = stats_df.sort_values('nb_amendements_total', ascending=False)
+    # Regrouper le cube par groupe (rapport déclaratif, voir reports.py)
+    stats_df = compute_reports(cube, [REPORTS['stats_par_groupe']], {'organes': organes})['stats_par_groupe']
     
+    return _export(stats_df, output_csv)
+
+
+def compute_groupe_stats_sql(db_path: Union[str, Path], output_csv: str, texte: Optional[str] = None,
+                             depuis: Optional[str] = None) -> pd.DataFrame:
+    """
+    Calcule les statistiques par groupe politique dans la base SQLite (voir sqlite_store.py)
+
+    Chaque amendement est attribué au groupe de son auteur à la date de dépôt
+    par une sous-requête sur les mandats GP (index acteur_uid, date_debut) ;
+    seules les lignes de résultat et les libellés des groupes retenus sont
+    chargés. Sans filtre, le résultat est identique à compute_groupe_stats
+    avec mandats.
+
+    Args:
+        texte: Ne compter que les amendements de ce texte (texte_legislatif_ref)
+        depuis: Ne compter que les amendements déposés à cette date (AAAA-MM-JJ) ou après
+    """
+    print(f"Regroupement SQL des amendements par groupe politique ({db_path})...")
+    conn = connect(db_path)
+    try:
+        grouped = deputes_rollup(conn, 'groupe_uid', texte, depuis)
+        tables = groupe_label_tables(conn, grouped.index.tolist())
+    finally:
+        conn.close()
+
+    print(f"  - {grouped['nb_amendements'].sum()} amendements de {len(grouped)} groupes politiques")
+    stats_df = finalize_report(REPORTS['stats_par_groupe'], grouped, tables)
+    return _export(stats_df, output_csv)
+
+
+def _export(stats_df: pd.DataFrame, output_csv: str) -> pd.DataFrame:
+    """Écrit les statistiques par groupe et en affiche un aperçu"""
     # Sauvegarder
     output_path = Path(output_csv)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -116,17 +113,35 @@ def compute_groupe_stats(amendements_csv: str, organes_csv: str, output_csv: str
     print(f"\nClassement des groupes par activité:")
     print(stats_df[['libelle_abrege', 'nb_deputes_actifs', 'nb_amendements_total', 
                      'moyenne_amendements_par_depute', 'taux_adoption_pct']].to_string(index=False))
+    
+    return stats_df
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Statistiques par groupe politique")
+    parser.add_argument('--sqlite', metavar='BASE', help="Calculer en SQL dans cette base (voir sqlite_store.py)")
+    parser.add_argument('--texte', help="Uniquement les amendements de ce texte (avec --sqlite)")
+    parser.add_argument('--depuis', metavar='AAAA-MM-JJ',
+                        help="Uniquement les amendements déposés depuis cette date (avec --sqlite)")
+    parser.add_argument('--sortie', help="CSV de sortie (défaut: data/stats/stats_par_groupe.csv)")
+    args = parser.parse_args()
+    
     base_dir = Path(__file__).parent.parent
     
     amendements_csv = base_dir / "data" / "csv" / "amendements.csv"
     organes_csv = base_dir / "data" / "csv" / "organes.csv"
-    output_csv = base_dir / "data" / "stats" / "stats_par_groupe.csv"
-    
-    compute_groupe_stats(
-        str(amendements_csv),
-        str(organes_csv),
-        str(output_csv)
-    )
+    mandats_csv = base_dir / "data" / "csv" / "mandats.csv"
+    output_csv = args.sortie or base_dir / "data" / "stats" / "stats_par_groupe.csv"
+    
+    if args.sqlite:
+        if not Path(args.sqlite).exists():
+            print(f"Erreur: base SQLite non trouvée: {args.sqlite} (voir run_normalization.py --sqlite)")
+            sys.exit(1)
+        compute_groupe_stats_sql(args.sqlite, str(output_csv), texte=args.texte, depuis=args.depuis)
+    else:
+        compute_groupe_stats(
+            str(amendements_csv),
+            str(organes_csv),
+            str(output_csv),
+            str(mandats_csv)
+        )
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Table des cosignatures et matrice creuse de co-signature député × député
+Construit la table amendement ↔ cosignataire, la matrice des co-signatures
+(tableaux d'indices NumPy, mise en cache sur disque) et l'affinité entre
+groupes politiques
+"""
+
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset import TableSource, as_table, deputes_only
+from groupes_temporels import build_group_index, latest_groups
+from normalize_utils import AtomicCsvWriter, files_signature, save_npz_atomic
+from schema import consumer_columns
+
+
+# Séparateur des uid dans la colonne cosignataires_uids d'amendements.csv
+COSIGNATAIRES_SEP = '|'
+
+EDGES_COLUMNS = ['amendement_uid', 'acteur_uid']
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'cosignatures'
+
+# Paires (signataire, signataire) générées à la fois : la mémoire de la
+# construction est bornée par cette taille de bloc, non par le total des paires
+PAIRS_PER_CHUNK = 2_000_000
+
+
+class CosignatureMatrix(NamedTuple):
+    """
+    Matrice creuse symétrique au format coordonnées (COO)
+
+    counts[k] = nombre d'amendements signés à la fois par acteurs[rows[k]]
+    et acteurs[cols[k]] (auteur ou cosignataire) ; la diagonale est exclue.
+    """
+    acteurs: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def nb_signatures(self) -> np.ndarray:
+        """Nombre total de co-signatures de chaque député (somme des lignes)"""
+        return np.bincount(self.rows, weights=self.counts, minlength=len(self.acteurs)).astype(np.int64)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Paires (acteur_a, acteur_b, nb_amendements) de la moitié supérieure"""
+        upper = self.rows < self.cols
+        return pd.DataFrame({
+            'acteur_a_uid': self.acteurs[self.rows[upper]],
+            'acteur_b_uid': self.acteurs[self.cols[upper]],
+            'nb_amendements': self.counts[upper],
+        })
+
+
+def edges_path(amendements_csv: str) -> Path:
+    """Chemin de la table des cosignatures associée au CSV des amendements (<nom du CSV>_cosignataires.csv)"""
+    amendements_path = Path(amendements_csv)
+    return amendements_path.with_name(f"{amendements_path.stem}_cosignataires.csv")
+
+
+def matrix_path(amendements_csv: str) -> Path:
+    """Chemin du cache de la matrice de co-signature (<nom du CSV>_cosignatures.npz)"""
+    amendements_path = Path(amendements_csv)
+    return amendements_path.with_name(f"{amendements_path.stem}_cosignatures.npz")
+
+
+def export_cosignataires(amendements_csv: str) -> int:
+    """
+    Écrit la table amendements_cosignataires.csv (une ligne par amendement et cosignataire)
+
+    Le CSV des amendements est relu ligne à ligne (colonne cosignataires_uids) :
+    la mémoire reste constante, et la table suit aussi les mises à jour incrémentales.
+
+    Returns:
+        Nombre de lignes écrites
+    """
+    output_csv = edges_path(amendements_csv)
+    with open(amendements_csv, 'r', encoding='utf-8', newline='') as f, \
+            AtomicCsvWriter(str(output_csv), EDGES_COLUMNS) as writer:
+        for row in csv.DictReader(f):
+            uids = row.get('cosignataires_uids')
+            if not uids:
+                continue
+            for acteur_uid in uids.split(COSIGNATAIRES_SEP):
+                writer.writerow({'amendement_uid': row['amendement_uid'], 'acteur_uid': acteur_uid})
+
+    if writer.count:
+        print(f"✓ {writer.count} cosignatures exportées vers {output_csv}")
+    return writer.count
+
+
+def _sources_signature(amendements_csv: str) -> str:
+    """Taille et date de modification des tables dont dépend la matrice"""
+    return files_signature([Path(amendements_csv), edges_path(amendements_csv)])
+
+
+def _signatures(amendements_csv: str, amendements: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Paires (amendement, député signataire) : auteurs députés et cosignataires"""
+    amendements = as_table(amendements if amendements is not None else amendements_csv,
+                           columns=consumer_columns(CONSUMER, 'amendements'), table='amendements')
+    auteurs = deputes_only(amendements)
+    auteurs = auteurs[auteurs['auteur_acteur_uid'].notna()]
+    auteurs = auteurs[['amendement_uid', 'auteur_acteur_uid']].rename(columns={'auteur_acteur_uid': 'acteur_uid'})
+
+    cosignataires = pd.read_csv(edges_path(amendements_csv), dtype=str)
+    signatures = pd.concat([auteurs, cosignataires], ignore_index=True)
+    return signatures.drop_duplicates()
+
+
+def _pairs(groups: np.ndarray, members: np.ndarray):
+    """
+    Toutes les paires (i, j), i ≠ j, de membres d'un même groupe, sans boucle Python
+
+    groups doit être trié. Chaque élément est répété autant de fois que la
+    taille de son groupe et associé successivement à chaque membre du groupe.
+    """
+    _, starts, sizes = np.unique(groups, return_index=True, return_counts=True)
+    per_item = np.repeat(sizes, sizes)
+    item_start = np.repeat(starts, sizes)
+
+    left = np.repeat(members, per_item)
+    first_of_item = np.repeat(np.cumsum(per_item) - per_item, per_item)
+    right = members[np.repeat(item_start, per_item) + np.arange(per_item.sum()) - first_of_item]
+
+    distinct = left != right
+    return left[distinct], right[distinct]
+
+
+def _pair_counts(groups: np.ndarray, members: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nombre de groupes communs à chaque paire de membres, par blocs de groupes
+
+    groups doit être trié. Les groupes sont traités par blocs d'au plus
+    PAIRS_PER_CHUNK paires (un groupe n'est jamais coupé) ; les comptes de
+    chaque bloc sont fusionnés au fur et à mesure avec ceux des blocs précédents.
+
+    Returns:
+        (clés i * n + j triées, nombre de groupes communs)
+    """
+    _, starts, sizes = np.unique(groups, return_index=True, return_counts=True)
+    cumulative_pairs = np.cumsum(sizes.astype(np.int64) ** 2)
+    keys = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    first = 0
+    while first < len(sizes):
+        done = cumulative_pairs[first - 1] if first else 0
+        last = max(int(np.searchsorted(cumulative_pairs, done + PAIRS_PER_CHUNK, side='right')), first + 1)
+        lo, hi = starts[first], starts[last - 1] + sizes[last - 1]
+        left, right = _pairs(groups[lo:hi], members[lo:hi])
+        chunk_keys, chunk_counts = np.unique(left.astype(np.int64) * n + right, return_counts=True)
+        keys, inverse = np.unique(np.concatenate([keys, chunk_keys]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([counts, chunk_counts])).astype(np.int64)
+        first = last
+    return keys, counts
+
+
+def build_cosignature_matrix(amendements_csv: str, use_cache: bool = True,
+                             amendements: Optional[pd.DataFrame] = None) -> CosignatureMatrix:
+    """
+    Construit (ou relit depuis le cache) la matrice de co-signature député × député
+
+    Le cache amendements_cosignatures.npz est réutilisé tant que amendements.csv et
+    amendements_cosignataires.csv n'ont pas changé. amendements évite de relire
+    amendements_csv si la table est déjà chargée.
+    """
+    cache = matrix_path(amendements_csv)
+    signature = _sources_signature(amendements_csv)
+    if use_cache and cache.exists():
+        with np.load(cache, allow_pickle=False) as data:
+            if str(data['signature']) == signature:
+                return CosignatureMatrix(data['acteurs'], data['rows'], data['cols'], data['counts'])
+
+    signatures = _signatures(amendements_csv, amendements)
+    amendement_codes, _ = pd.factorize(signatures['amendement_uid'])
+    acteur_codes, acteurs = pd.factorize(signatures['acteur_uid'], sort=True)
+
+    order = np.argsort(amendement_codes, kind='stable')
+
+    # Agréger les paires identiques : une clé entière par cellule de la matrice
+    n = len(acteurs)
+    keys, counts = _pair_counts(amendement_codes[order], acteur_codes[order], n)
+    matrix = CosignatureMatrix(
+        acteurs=np.asarray(acteurs, dtype=str),
+        rows=(keys // n).astype(np.int32),
+        cols=(keys % n).astype(np.int32),
+        counts=counts.astype(np.int32),
+    )
+
+    save_npz_atomic(cache, signature=np.array(signature), **matrix._asdict())
+
+    print(f"✓ Matrice de co-signature: {n} députés, {len(keys) // 2} paires (cache {cache})")
+    return matrix
+
+
+def groupe_affinity(matrix: CosignatureMatrix, groupes: pd.Series,
+                    organes: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Affinité entre groupes politiques : co-signatures agrégées groupe × groupe
+
+    Chaque cellule de la matrice est attribuée au couple de groupes de ses deux
+    députés, puis sommée par np.bincount (aucune boucle Python).
+
+    Returns:
+        Une ligne par couple (groupe_a, groupe_b) avec le nombre de co-signatures
+        et leur part dans le total des co-signatures du groupe_a
+    """
+    groupe_uids, groupe_codes = np.unique(groupes.to_numpy(dtype=str), return_inverse=True)
+    acteur_groupe = np.full(len(matrix.acteurs), -1, dtype=np.int64)
+    positions = pd.Index(groupes.index).get_indexer(matrix.acteurs)
+    known = positions >= 0
+    acteur_groupe[known] = groupe_codes[positions[known]]
+
+    ga = acteur_groupe[matrix.rows]
+    gb = acteur_groupe[matrix.cols]
+    valid = (ga >= 0) & (gb >= 0)
+
+    ng = len(groupe_uids)
+    totals = np.bincount(ga[valid] * ng + gb[valid], weights=matrix.counts[valid], minlength=ng * ng)
+    totals = totals.reshape(ng, ng).astype(np.int64)
+
+    a, b = np.nonzero(totals)
+    row_sums = totals.sum(axis=1)
+    affinity = pd.DataFrame({
+        'groupe_a_uid': groupe_uids[a],
+        'groupe_b_uid': groupe_uids[b],
+        'nb_cosignatures': totals[a, b],
+        'part_pct': np.round(totals[a, b] / row_sums[a] * 100, 2),
+    })
+
+    if organes is not None:
+        libelles = organes.set_index('organe_uid')['libelle_abrege']
+        affinity.insert(1, 'groupe_a', affinity['groupe_a_uid'].map(libelles))
+        affinity.insert(3, 'groupe_b', affinity['groupe_b_uid'].map(libelles))
+
+    return affinity.sort_values(['groupe_a_uid', 'nb_cosignatures'], ascending=[True, False])
+
+
+def compute_groupe_affinity(amendements_csv: str, mandats: TableSource, organes: TableSource,
+                            output_csv: str, amendements: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+    """
+    Calcule l'affinité de co-signature entre groupes et l'exporte en CSV
+
+    mandats et organes sont des chemins de CSV ou des DataFrames déjà chargés ;
+    la matrice est lue depuis son cache (ou construite) à côté d'amendements_csv.
+    """
+    if not edges_path(amendements_csv).exists():
+        print(f"Erreur: {edges_path(amendements_csv)} non trouvé (relancer la normalisation des amendements)")
+        return None
+
+    matrix = build_cosignature_matrix(amendements_csv, amendements=amendements)
+    mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    groupes = latest_groups(build_group_index(mandats))
+    organes = as_table(organes, columns=consumer_columns(CONSUMER, 'organes'), table='organes')
+
+    start = time.perf_counter()
+    affinity = groupe_affinity(matrix, groupes, organes)
+    elapsed = time.perf_counter() - start
+
+    output_path = Path(output_csv)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    affinity.to_csv(output_csv, index=False, encoding='utf-8')
+
+    print(f"\n✓ Affinité entre {affinity['groupe_a_uid'].nunique()} groupes calculée en {elapsed * 1000:.0f} ms, "
+          f"exportée vers {output_csv}")
+    return affinity
+
+
+if __name__ == '__main__':
+    base_dir = Path(__file__).parent.parent
+    csv_dir = base_dir / "data" / "csv"
+
+    if not (csv_dir / "amendements.csv").exists():
+        print(f"Erreur: amendements.csv non trouvé dans {csv_dir}")
+        sys.exit(1)
+
+    compute_groupe_affinity(
+        str(csv_dir / "amendements.csv"),
+        str(csv_dir / "mandats.csv"),
+        str(csv_dir / "organes.csv"),
+        str(base_dir / "data" / "stats" / "affinite_groupes.csv")
+    )
@@ -6,14 +6,24 @@ Crée une table de correspondance entre les codes organes (PO) et les noms des g
 import pandas as pd
 from pathlib import Path
 
+from dataset import TableSource, as_stats, as_table
+from schema import consumer_columns
 
-def create_groupe_mapping(organes_csv: str, output_csv: str):
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'create_groupe_mapping'
+
+
+def create_groupe_mapping(organes: TableSource, output_csv: str) -> pd.DataFrame:
     """
     Crée une table de correspondance PO code → nom du groupe politique
     Filtre uniquement les groupes politiques de la 17ème législature
+    
+    organes est le chemin d'organes.csv ou la table déjà chargée ; la table de
+    correspondance est écrite dans output_csv et renvoyée.
     """
     print("Chargement des organes...")
-    organes = pd.read_csv(organes_csv)
+    organes = as_table(organes, columns=consumer_columns(CONSUMER, 'organes'), table='organes')
     
     print(f"  - {len(organes)} organes au total")
     
@@ -58,16 +68,20 @@ def create_groupe_mapping(organes_csv: str, output_csv: str):
     if len(autres) > 0:
         print(f"\n\nAutres organes/groupes ({len(autres)}):")
         print(autres[['organe_uid', 'code_type', 'libelle_abrege', 'libelle']].head(20).to_string(index=False))
+    
+    return mapping
 
 
-def create_enhanced_groupe_mapping(organes_csv: str, stats_groupe_csv: str, output_csv: str):
+def create_enhanced_groupe_mapping(organes: TableSource, stats_groupe: TableSource, output_csv: str) -> pd.DataFrame:
     """
     Crée une table enrichie en joignant les stats avec les noms des groupes
+    
+    organes et stats_groupe sont des chemins de CSV ou des DataFrames déjà chargés.
     """
     print("\nCréation de la table enrichie stats + noms des groupes...")
     
-    organes = pd.read_csv(organes_csv)
-    stats = pd.read_csv(stats_groupe_csv)
+    organes = as_table(organes, columns=consumer_columns(CONSUMER, 'organes'), table='organes')
+    stats = as_stats(stats_groupe)
     
     # Joindre stats avec organes pour avoir les noms
     stats_enrichi = stats.merge(
@@ -111,6 +125,8 @@ def create_enhanced_groupe_mapping(organes_csv: str, stats_groupe_csv: str, outp
     print(stats_enrichi[['groupe_politique_uid', 'libelle_abrege', 'libelle', 
                           'nb_deputes_actifs', 'nb_amendements_total', 
                           'taux_adoption_pct']].to_string(index=False, max_colwidth=50))
+    
+    return stats_enrichi
 
 
 if __name__ == '__main__':
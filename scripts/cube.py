@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Cube d'agrégats des amendements
+Agrège une seule fois amendements.csv par acteur × groupe × texte × sort ×
+mois de dépôt (nombre d'amendements, cosignataires, article 40). Le cube est
+mis en cache sur disque ; les statistiques par député, par groupe ou par
+famille politique, et toute autre vue, en sont des regroupements (roll-ups)
+qui ne relisent pas les amendements. Le cache conserve aussi la contribution
+de chaque amendement : quand amendements.csv change, seules les lignes
+ajoutées, modifiées ou supprimées sont appliquées au cube
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from dataset import TableSource, as_table, table_signature
+from groupes_temporels import build_group_index, groups_at_depot
+from normalize_utils import files_signature, save_npz_atomic
+from schema import consumer_columns
+from sort_categories import categorie_counts
+
+
+# Dimensions du cube (colonnes catégorielles)
+CUBE_KEYS = ['auteur_type', 'acteur_uid', 'groupe_uid', 'texte_legislatif_ref', 'sort_categorie', 'mois']
+
+# Mesures additives de chaque cellule
+CUBE_MEASURES = ['nb_amendements', 'somme_cosignataires', 'nb_article40']
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'cube'
+
+# Colonne identifiant un amendement dans les contributions enregistrées
+LIGNE_KEY = 'amendement_uid'
+
+
+def cube_path(amendements_csv: Union[str, Path]) -> Path:
+    """Chemin du cache du cube associé au CSV des amendements (<nom du CSV>_cube.npz)"""
+    amendements_path = Path(amendements_csv)
+    return amendements_path.with_name(f"{amendements_path.stem}_cube.npz")
+
+
+def is_cube(df: pd.DataFrame) -> bool:
+    """Indique si un DataFrame est un cube (et non une table d'amendements)"""
+    return all(col in df.columns for col in CUBE_MEASURES)
+
+
+def _sorted_categories(values: pd.Series) -> pd.Categorical:
+    """Colonne catégorielle aux catégories triées (même ordre qu'un groupby sur les chaînes)"""
+    values = values.astype('category')
+    return values.cat.reorder_categories(sorted(values.cat.categories))
+
+
+def cube_rows(amendements: pd.DataFrame, mandats: Optional[pd.DataFrame] = None,
+              dossiers: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Une ligne par amendement : dimensions (colonnes catégorielles) et mesures unitaires
+
+    Le groupe d'un amendement est celui de son auteur à la date de dépôt
+    (mandats GP, voir groupes_temporels.py) si mandats est fourni ; à défaut
+    de mandat couvrant cette date, le groupe indiqué dans l'amendement est conservé.
+
+    Si la table contient article_designation_courte, la colonne est conservée ;
+    dossiers (dossier_ref indexé par amendement_uid, voir scan_amendements.py)
+    ajoute la dimension dossier_ref.
+    """
+    groupes = amendements['auteur_groupe_politique_uid']
+    if mandats is not None:
+        groupes = groups_at_depot(build_group_index(mandats), amendements)
+
+    dates = pd.to_datetime(amendements['date_depot'])
+    mois = pd.Series(dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype(str),
+                     index=amendements.index).where(dates.notna())
+
+    rows = pd.DataFrame({
+        'auteur_type': amendements['auteur_type'].astype(str).where(amendements['auteur_type'].notna()),
+        'acteur_uid': amendements['auteur_acteur_uid'],
+        'groupe_uid': groupes.replace('', np.nan),
+        'texte_legislatif_ref': amendements['texte_legislatif_ref'],
+        'sort_categorie': amendements['sort_categorie'].astype(str).where(amendements['sort_categorie'].notna()),
+        'mois': mois,
+    })
+    if 'article_designation_courte' in amendements.columns:
+        rows['article_designation_courte'] = amendements['article_designation_courte']
+    if dossiers is not None:
+        rows['dossier_ref'] = amendements['amendement_uid'].map(dossiers).replace('', np.nan)
+    for key in rows.columns:
+        rows[key] = _sorted_categories(rows[key])
+
+    rows['nb_amendements'] = 1
+    rows['somme_cosignataires'] = amendements['nb_cosignataires'].astype('int64')
+    rows['nb_article40'] = amendements['soumis_article40'].fillna(False).astype('int64')
+    return rows
+
+
+def aggregate(rows: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Somme les mesures par combinaison observée de keys (valeurs manquantes conservées)
+
+    rows est une table issue de cube_rows, ou un agrégat plus fin (dont le cube).
+    """
+    result = rows.groupby(keys, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index()
+    for key in keys:
+        result[key] = _sorted_categories(result[key])
+    return result
+
+
+def build_cube(amendements: pd.DataFrame, mandats: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Construit le cube à partir d'une table d'amendements (groupes : voir cube_rows)
+
+    Returns:
+        Une ligne par combinaison observée de CUBE_KEYS (valeurs manquantes
+        conservées), avec les mesures CUBE_MEASURES
+    """
+    return aggregate(cube_rows(amendements, mandats), CUBE_KEYS)
+
+
+def _row_hashes(amendements: pd.DataFrame) -> np.ndarray:
+    """Empreinte de chaque amendement, calculée sur les colonnes lues par le cube"""
+    columns = [col for col in consumer_columns(CONSUMER, 'amendements') if col != LIGNE_KEY]
+    return pd.util.hash_pandas_object(amendements[columns], index=False).to_numpy()
+
+
+def contributions(amendements: pd.DataFrame, mandats: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Contribution de chaque amendement au cube
+
+    Returns:
+        Une ligne par amendement : amendement_uid, empreinte de la ligne source,
+        dimensions CUBE_KEYS et mesures unitaires ; le cube en est l'agrégation
+    """
+    lignes = cube_rows(amendements, mandats)[CUBE_KEYS + CUBE_MEASURES]
+    lignes.insert(0, LIGNE_KEY, amendements[LIGNE_KEY].to_numpy())
+    lignes.insert(1, 'empreinte', _row_hashes(amendements))
+    return lignes
+
+
+def update_cube(cube: pd.DataFrame, lignes: pd.DataFrame, amendements: pd.DataFrame,
+                mandats: Optional[pd.DataFrame] = None) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]]:
+    """
+    Applique au cube les amendements ajoutés, modifiés ou supprimés
+
+    Les contributions enregistrées (lignes) des amendements modifiés ou
+    supprimés sont retranchées du cube, celles des amendements nouveaux ou
+    modifiés (empreinte différente) y sont ajoutées ; les cellules vidées sont
+    retirées. Le résultat est identique à une reconstruction complète.
+
+    Returns:
+        (cube, contributions, nombre d'amendements ajoutés / modifiés / supprimés),
+        ou None si amendement_uid n'identifie pas les lignes de façon unique
+    """
+    known_uids = pd.Index(lignes[LIGNE_KEY])
+    uids = amendements[LIGNE_KEY]
+    if not known_uids.is_unique or uids.duplicated().any():
+        return None
+
+    hashes = _row_hashes(amendements)
+    positions = known_uids.get_indexer(uids)
+    known = positions >= 0
+    changed = np.zeros(len(amendements), dtype=bool)
+    changed[known] = lignes['empreinte'].to_numpy()[positions[known]] != hashes[known]
+    unchanged = np.zeros(len(lignes), dtype=bool)
+    unchanged[positions[known & ~changed]] = True
+
+    counts = {
+        'ajoutés': int((~known).sum()),
+        'modifiés': int(changed.sum()),
+        'supprimés': int(len(lignes) - known.sum()),
+    }
+    if not (counts['ajoutés'] or counts['modifiés'] or counts['supprimés']):
+        return cube, lignes, counts
+
+    stale = lignes[~unchanged]
+    fresh = contributions(amendements[~known | changed], mandats)
+    retired = stale[CUBE_KEYS + CUBE_MEASURES].copy()
+    retired[CUBE_MEASURES] = -retired[CUBE_MEASURES]
+
+    combined = pd.concat([cube, retired, fresh[CUBE_KEYS + CUBE_MEASURES]], ignore_index=True)
+    for key in CUBE_KEYS:
+        combined[key] = _sorted_categories(combined[key])
+    cube = aggregate(combined, CUBE_KEYS)
+    cube = cube[cube['nb_amendements'] != 0].reset_index(drop=True)
+
+    lignes = pd.concat([lignes[unchanged], fresh], ignore_index=True)
+    for key in CUBE_KEYS:
+        cube[key] = cube[key].cat.remove_unused_categories()
+        lignes[key] = pd.Categorical(lignes[key], categories=cube[key].cat.categories)
+    return cube, lignes, counts
+
+
+def save_cube(cube: pd.DataFrame, path: Path, signature: str,
+              lignes: Optional[pd.DataFrame] = None, mandats_signature: str = ''):
+    """
+    Écrit le cube (codes et catégories de chaque dimension, mesures) au format .npz
+
+    lignes (voir contributions) est enregistré dans le même fichier, avec la
+    signature de mandats.csv dont dépendent les groupes, pour les mises à jour.
+    """
+    arrays = {'signature': np.array(signature)}
+    for key in CUBE_KEYS:
+        arrays[f"{key}_codes"] = cube[key].cat.codes.to_numpy(dtype=np.int32)
+        arrays[f"{key}_categories"] = np.asarray(cube[key].cat.categories, dtype=str)
+    for measure in CUBE_MEASURES:
+        arrays[measure] = cube[measure].to_numpy(dtype=np.int64)
+    if lignes is not None:
+        arrays['mandats_signature'] = np.array(mandats_signature)
+        arrays[f"lignes_{LIGNE_KEY}"] = np.asarray(lignes[LIGNE_KEY], dtype=str)
+        arrays['lignes_empreinte'] = lignes['empreinte'].to_numpy(dtype=np.uint64)
+        for key in CUBE_KEYS:
+            codes = pd.Categorical(lignes[key], categories=cube[key].cat.categories).codes
+            arrays[f"lignes_{key}_codes"] = codes.astype(np.int32)
+        for measure in CUBE_MEASURES:
+            arrays[f"lignes_{measure}"] = lignes[measure].to_numpy(dtype=np.int64)
+    save_npz_atomic(path, **arrays)
+
+
+def _read_cube(data) -> pd.DataFrame:
+    """Cube contenu dans un fichier .npz ouvert"""
+    columns = {
+        key: pd.Categorical.from_codes(data[f"{key}_codes"], categories=data[f"{key}_categories"].tolist())
+        for key in CUBE_KEYS
+    }
+    columns.update({measure: data[measure] for measure in CUBE_MEASURES})
+    return pd.DataFrame(columns)
+
+
+def load_cube(path: Path, signature: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Relit un cube enregistré ; None s'il n'existe pas ou si sa signature diffère"""
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        if signature is not None and str(data['signature']) != signature:
+            return None
+        return _read_cube(data)
+
+
+def load_contributions(path: Path, mandats_signature: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Relit un cube et les contributions de ses amendements, quelle que soit sa signature
+
+    None si le fichier n'existe pas, ne contient pas les contributions ou si
+    mandats.csv a changé (les groupes de tous les amendements seraient à revoir).
+    """
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        if 'mandats_signature' not in data.files or str(data['mandats_signature']) != mandats_signature:
+            return None
+        cube = _read_cube(data)
+        lignes = pd.DataFrame({
+            LIGNE_KEY: data[f"lignes_{LIGNE_KEY}"],
+            'empreinte': data['lignes_empreinte'],
+        })
+        for key in CUBE_KEYS:
+            lignes[key] = pd.Categorical.from_codes(data[f"lignes_{key}_codes"], dtype=cube[key].dtype)
+        for measure in CUBE_MEASURES:
+            lignes[measure] = data[f"lignes_{measure}"]
+    return cube, lignes
+
+
+def _sources_signature(amendements_csv: Path, mandats: Optional[TableSource]) -> str:
+    """Tables dont dépend le cube : amendements.csv, et mandats si les groupes en sont déduits"""
+    return ';'.join([files_signature([amendements_csv]), _mandats_signature(mandats)])
+
+
+def _mandats_signature(mandats: Optional[TableSource]) -> str:
+    """Empreinte de la table mandats fournie (chaîne vide si les groupes n'en sont pas déduits)"""
+    return table_signature(mandats) if mandats is not None else ''
+
+
+def cached_cube(amendements_csv: Union[str, Path], mandats: Optional[TableSource] = None,
+                amendements: Optional[pd.DataFrame] = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Cube des amendements d'amendements_csv, relu depuis son cache s'il est à jour
+
+    Le cache amendements_cube.npz est réutilisé tant qu'amendements.csv (et
+    la table mandats, si elle est fournie : voir dataset.table_signature) n'ont
+    pas changé. Si seul amendements.csv a changé, le cube est mis à jour à partir
+    des seuls amendements ajoutés, modifiés ou supprimés (voir update_cube).
+    amendements évite de relire amendements_csv si la table est déjà chargée ;
+    use_cache=False force une reconstruction complète.
+    """
+    amendements_csv = Path(amendements_csv)
+    cache = cube_path(amendements_csv)
+    signature = _sources_signature(amendements_csv, mandats)
+    mandats_signature = _mandats_signature(mandats)
+    if use_cache:
+        cube = load_cube(cache, signature)
+        if cube is not None:
+            print(f"✓ Cube de {len(cube)} cellules relu depuis {cache}")
+            return cube
+
+    start = time.perf_counter()
+    amendements = as_table(amendements if amendements is not None else amendements_csv,
+                           columns=consumer_columns(CONSUMER, 'amendements'), table='amendements')
+    if mandats is not None:
+        mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+
+    saved = load_contributions(cache, mandats_signature) if use_cache else None
+    updated = update_cube(*saved, amendements, mandats) if saved is not None else None
+    if updated is not None:
+        cube, lignes, counts = updated
+        save_cube(cube, cache, signature, lignes, mandats_signature)
+        print(f"✓ Cube de {len(cube)} cellules mis à jour en {time.perf_counter() - start:.1f} s : "
+              + ', '.join(f"{count} amendements {label}" for label, count in counts.items()))
+        return cube
+
+    lignes = contributions(amendements, mandats)
+    cube = aggregate(lignes, CUBE_KEYS)
+    save_cube(cube, cache, signature, lignes, mandats_signature)
+
+    print(f"✓ Cube de {len(cube)} cellules ({len(amendements)} amendements) construit en "
+          f"{time.perf_counter() - start:.1f} s (cache {cache})")
+    return cube
+
+
+def as_cube(source: TableSource, mandats: Optional[TableSource] = None) -> pd.DataFrame:
+    """
+    Cube correspondant à source : cube déjà construit, table d'amendements
+    chargée (cube calculé en mémoire) ou chemin d'amendements.csv (cube en cache)
+    """
+    if isinstance(source, pd.DataFrame):
+        if is_cube(source):
+            return source
+        if mandats is not None:
+            mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+        return build_cube(source, mandats)
+    return cached_cube(source, mandats)
+
+
+def rollup(cube: pd.DataFrame, by: Union[str, List[str]]) -> pd.DataFrame:
+    """
+    Regroupe les cellules du cube selon une ou plusieurs dimensions
+
+    Les lignes dont une dimension de by est manquante sont ignorées.
+
+    Returns:
+        DataFrame indexé par by : mesures sommées, nombre d'acteurs distincts
+        (nb_acteurs) et une colonne nb_amendements_<suffixe> par catégorie de sort
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    grouped = cube.groupby(keys, observed=True)
+    result = grouped[CUBE_MEASURES].sum()
+    result['nb_acteurs'] = grouped['acteur_uid'].nunique()
+    return result.join(categorie_counts(cube, keys, weights='nb_amendements'))
+
+
+def main():
+    """Affiche un regroupement du cube (ex. --par groupe_uid mois)"""
+    parser = argparse.ArgumentParser(description="Regroupements du cube d'agrégats des amendements")
+    parser.add_argument('--par', nargs='+', choices=CUBE_KEYS, default=['groupe_uid'],
+                        help="Dimensions du regroupement (défaut: groupe_uid)")
+    parser.add_argument('--deputes', action='store_true', help="Uniquement les amendements déposés par des députés")
+    parser.add_argument('--texte', help="Uniquement les amendements de ce texte (texte_legislatif_ref)")
+    parser.add_argument('--sortie', help="CSV de sortie (défaut: affichage)")
+    parser.add_argument('--reconstruire', action='store_true', help="Ignorer le cache et reconstruire le cube")
+    args = parser.parse_args()
+
+    csv_dir = Path(__file__).parent.parent / "data" / "csv"
+    amendements_csv = csv_dir / "amendements.csv"
+    if not amendements_csv.exists():
+        print(f"Erreur: amendements.csv non trouvé dans {csv_dir}")
+        sys.exit(1)
+
+    mandats = csv_dir / "mandats.csv"
+    cube = cached_cube(amendements_csv, mandats if mandats.exists() else None, use_cache=not args.reconstruire)
+
+    start = time.perf_counter()
+    if args.deputes:
+        cube = cube[cube['auteur_type'] == 'Député']
+    if args.texte:
+        cube = cube[cube['texte_legislatif_ref'] == args.texte]
+    result = rollup(cube, args.par)
+    elapsed = time.perf_counter() - start
+
+    if args.sortie:
+        result.to_csv(args.sortie, encoding='utf-8')
+        print(f"✓ {len(result)} lignes exportées vers {args.sortie}")
+    else:
+        print(result.to_string())
+    print(f"\n✓ Regroupement par {', '.join(args.par)} calculé en {elapsed * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Jeu de données partagé par les étapes de calcul des statistiques
+Charge chaque table normalisée une seule fois (colonnes utiles à toutes les
+étapes), applique une seule fois les filtres communs et conserve en mémoire
+les statistiques produites pour les étapes suivantes
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+
+from schema import combined_columns, load_table
+
+
+# Table passée à une étape : chemin du CSV normalisé ou DataFrame déjà chargé
+TableSource = Union[str, Path, pd.DataFrame]
+
+# Colonnes lues pour l'ensemble des étapes de run_statistics : union des
+# colonnes de chaque consommateur (schema.CONSUMER_COLUMNS)
+DATASET_COLUMNS: Dict[str, List[str]] = {
+    table: combined_columns(table) for table in ('amendements', 'acteurs', 'mandats', 'organes')
+}
+
+# Marqueur (DataFrame.attrs) d'une table d'amendements déjà restreinte aux députés auteurs
+_DEPUTES_ONLY = 'auteurs_deputes'
+
+# Marqueur (DataFrame.attrs) du CSV d'où une table a été chargée, pour les empreintes de cache
+_SOURCE_CSV = 'csv_source'
+
+
+def _load(csv_path: Union[str, Path], columns: Optional[List[str]], table: Optional[str]) -> pd.DataFrame:
+    """Charge une table normalisée en notant le CSV d'origine (voir table_signature)"""
+    df = load_table(str(csv_path), columns=columns, table=table)
+    df.attrs[_SOURCE_CSV] = str(csv_path)
+    return df
+
+
+def as_table(source: TableSource, columns: Optional[List[str]] = None, table: Optional[str] = None) -> pd.DataFrame:
+    """
+    Renvoie la table demandée, chargée depuis le disque si source est un chemin
+
+    Un DataFrame est utilisé tel quel (restreint aux colonnes demandées, sans copie
+    des données) : c'est ainsi qu'un StatsDataset partage ses tables entre étapes.
+    """
+    if isinstance(source, pd.DataFrame):
+        return source if columns is None else source[columns]
+    return _load(source, columns, table)
+
+
+def table_signature(source: TableSource) -> str:
+    """
+    Empreinte d'une table dont dépend un cache : chemin, taille et date de
+    modification du CSV (chemin donné, ou CSV d'où le DataFrame a été chargé),
+    sinon contenu du DataFrame
+    """
+    if isinstance(source, pd.DataFrame):
+        if _SOURCE_CSV not in source.attrs:
+            digest = hashlib.blake2b(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes(),
+                                     digest_size=16)
+            return f"contenu:{','.join(map(str, source.columns))}:{digest.hexdigest()}"
+        source = source.attrs[_SOURCE_CSV]
+    path = Path(source).resolve()
+    stat = path.stat()
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def as_stats(source: TableSource) -> pd.DataFrame:
+    """Statistiques déjà calculées (DataFrame) ou relues depuis leur CSV"""
+    if isinstance(source, pd.DataFrame):
+        return source
+    return pd.read_csv(source)
+
+
+def deputes_only(amendements: pd.DataFrame) -> pd.DataFrame:
+    """Amendements déposés par des députés (auteur_type = 'Député'), filtrés une seule fois"""
+    if amendements.attrs.get(_DEPUTES_ONLY):
+        return amendements
+    filtered = amendements[amendements['auteur_type'] == 'Député']
+    filtered.attrs[_DEPUTES_ONLY] = True
+    return filtered
+
+
+class StatsDataset:
+    """
+    Tables normalisées chargées à la demande, une seule fois chacune, y compris
+    quand plusieurs étapes s'exécutent en parallèle (voir pipeline.py)
+
+    Exemple:
+        dataset = StatsDataset('data/csv')
+        compute_depute_stats(dataset.amendements_deputes, dataset.acteurs, dataset.mandats, output_csv)
+    """
+
+    def __init__(self, csv_dir: Union[str, Path]):
+        self.csv_dir = Path(csv_dir)
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._amendements_deputes: Optional[pd.DataFrame] = None
+        # Statistiques produites par les étapes (ex. 'stats_par_groupe'), réutilisées par les suivantes
+        self.results: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.RLock()
+
+    def result(self, name: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Résultat d'une étape précédente, ou calculé par compute (une seule fois) s'il manque"""
+        with self._lock:
+            if name not in self.results:
+                self.results[name] = compute()
+            return self.results[name]
+
+    def path(self, name: str) -> Path:
+        """Chemin du CSV normalisé d'une table"""
+        return self.csv_dir / f"{name}.csv"
+
+    def table(self, name: str) -> pd.DataFrame:
+        """Table typée avec les colonnes utiles à toutes les étapes (lue au premier accès)"""
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = _load(self.path(name), DATASET_COLUMNS.get(name), name)
+            return self._tables[name]
+
+    @property
+    def amendements(self) -> pd.DataFrame:
+        return self.table('amendements')
+
+    @property
+    def acteurs(self) -> pd.DataFrame:
+        return self.table('acteurs')
+
+    @property
+    def mandats(self) -> pd.DataFrame:
+        return self.table('mandats')
+
+    @property
+    def organes(self) -> pd.DataFrame:
+        return self.table('organes')
+
+    @property
+    def amendements_deputes(self) -> pd.DataFrame:
+        """Amendements dont l'auteur est un député"""
+        with self._lock:
+            if self._amendements_deputes is None:
+                self._amendements_deputes = deputes_only(self.amendements)
+            return self._amendements_deputes
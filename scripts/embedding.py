@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Nuage de points des députés
+Décrit chaque député par une matrice creuse de caractéristiques (répartition
+des sorts de ses amendements, partenaires de co-signature, textes visés,
+groupe politique), la projette en 2 ou 3 dimensions par une ACP tronquée
+randomisée (NumPy seul, sans densifier la matrice) et exporte les
+coordonnées ; la projection est mise en cache tant que ses sources n'ont pas
+changé
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from cosignatures import CosignatureMatrix, build_cosignature_matrix, edges_path
+from cube import cached_cube
+from dataset import TableSource, as_table, table_signature
+from groupes_temporels import build_group_index, latest_groups
+from normalize_utils import files_signature, save_npz_atomic
+from schema import consumer_columns
+
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'embedding'
+
+DEFAULT_DIMENSIONS = 3
+
+# Colonnes supplémentaires de l'ACP randomisée et itérations de puissance
+# (Halko, Martinsson et Tropp, 2011) : précision des premières composantes
+OVERSAMPLING = 10
+POWER_ITERATIONS = 4
+
+# Noms des colonnes de coordonnées, dans l'ordre des composantes
+AXES = ['x', 'y', 'z']
+
+
+class FeatureMatrix(NamedTuple):
+    """
+    Matrice creuse député × caractéristiques au format coordonnées (COO)
+
+    Les colonnes sont les blocs concaténés (sorts, textes, cosignataires,
+    groupes) ; dans chaque bloc, la ligne d'un député est la racine carrée de
+    ses proportions (transformation de Hellinger) : elle est de norme 1, et
+    chaque bloc pèse autant dans les distances, quelle que soit sa largeur.
+    """
+    acteurs: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    values: np.ndarray
+    n_cols: int
+
+    def dot(self, x: np.ndarray) -> np.ndarray:
+        """Produit A @ x (x : n_cols × k), colonne par colonne avec np.bincount"""
+        return np.column_stack([np.bincount(self.rows, weights=self.values * x[self.cols, j],
+                                            minlength=len(self.acteurs)) for j in range(x.shape[1])])
+
+    def tdot(self, y: np.ndarray) -> np.ndarray:
+        """Produit Aᵀ @ y (y : nb acteurs × k)"""
+        return np.column_stack([np.bincount(self.cols, weights=self.values * y[self.rows, j],
+                                            minlength=self.n_cols) for j in range(y.shape[1])])
+
+
+class Embedding(NamedTuple):
+    """Coordonnées de chaque acteur et part de la variance expliquée par chaque axe"""
+    acteurs: np.ndarray
+    coordonnees: np.ndarray
+    variance: np.ndarray
+
+
+def embedding_path(amendements_csv: Union[str, Path]) -> Path:
+    """Chemin du cache de la projection associé au CSV des amendements (<nom du CSV>_nuage.npz)"""
+    amendements_path = Path(amendements_csv)
+    return amendements_path.with_name(f"{amendements_path.stem}_nuage.npz")
+
+
+def _hellinger_block(rows: np.ndarray, keys: np.ndarray, weights: np.ndarray,
+                     n_rows: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Bloc de la matrice : poids sommés par (ligne, clé), ramenés à des proportions
+    par ligne puis passés à la racine carrée ; une clé manquante (texte ou sort
+    inconnu) forme sa propre colonne
+
+    Returns:
+        (lignes, colonnes, valeurs, nombre de colonnes du bloc)
+    """
+    key_codes, key_values = pd.factorize(keys, sort=True, use_na_sentinel=False)
+    n_keys = len(key_values)
+    cells, summed = np.unique(rows.astype(np.int64) * n_keys + key_codes, return_inverse=True)
+    totals = np.bincount(summed, weights=weights, minlength=len(cells))
+    cell_rows = (cells // n_keys).astype(np.int64)
+    row_sums = np.bincount(cell_rows, weights=totals, minlength=n_rows)
+    keep = totals > 0
+    values = np.sqrt(totals[keep] / row_sums[cell_rows[keep]])
+    return cell_rows[keep], (cells[keep] % n_keys).astype(np.int64), values, n_keys
+
+
+def build_features(cube: pd.DataFrame, matrix: CosignatureMatrix, groupes: pd.Series) -> FeatureMatrix:
+    """
+    Matrice des caractéristiques de chaque député
+
+    Lignes : députés auteurs d'amendements, cosignataires ou membres d'un groupe.
+    Blocs de colonnes :
+        - sorts : répartition de ses amendements par catégorie de sort ;
+        - textes : répartition de ses amendements par texte visé ;
+        - cosignataires : députés avec qui il a co-signé, pondérés par le nombre d'amendements ;
+        - groupes : groupes au dépôt de ses amendements, ou dernier groupe s'il n'en a déposé aucun.
+    """
+    deputes = cube[(cube['auteur_type'] == 'Député') & cube['acteur_uid'].notna()]
+    deputes = deputes[deputes['nb_amendements'] > 0]
+    auteurs = deputes['acteur_uid'].astype(str).to_numpy()
+
+    acteurs = np.unique(np.concatenate([auteurs, matrix.acteurs, groupes.index.to_numpy(dtype=str)]).astype(str))
+    index = pd.Index(acteurs)
+    n = len(acteurs)
+    author_rows = index.get_indexer(auteurs)
+    weights = deputes['nb_amendements'].to_numpy(dtype=np.float64)
+
+    with_group = deputes['groupe_uid'].notna().to_numpy()
+    without_group = ~np.isin(acteurs, auteurs[with_group])
+    latest = groupes.reindex(acteurs[without_group])
+    latest = latest[latest.notna()]
+
+    blocks = [
+        _hellinger_block(author_rows, deputes['sort_categorie'].to_numpy(), weights, n),
+        _hellinger_block(author_rows, deputes['texte_legislatif_ref'].to_numpy(), weights, n),
+        _hellinger_block(index.get_indexer(matrix.acteurs[matrix.rows]), matrix.cols,
+                         matrix.counts.astype(np.float64), n),
+        _hellinger_block(np.concatenate([author_rows[with_group], index.get_indexer(latest.index)]),
+                         np.concatenate([deputes['groupe_uid'].astype(str).to_numpy()[with_group],
+                                         latest.to_numpy(dtype=str)]),
+                         np.concatenate([weights[with_group], np.ones(len(latest))]), n),
+    ]
+
+    offset = 0
+    rows, cols, values = [], [], []
+    for block_rows, block_cols, block_values, width in blocks:
+        rows.append(block_rows)
+        cols.append(block_cols + offset)
+        values.append(block_values)
+        offset += width
+    return FeatureMatrix(acteurs, np.concatenate(rows), np.concatenate(cols), np.concatenate(values), offset)
+
+
+def randomized_pca(features: FeatureMatrix, n_components: int, seed: int = 0,
+                   oversampling: int = OVERSAMPLING,
+                   power_iterations: int = POWER_ITERATIONS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Premières composantes principales de la matrice, par SVD tronquée randomisée
+
+    La matrice n'est jamais centrée ni densifiée : le centrage est appliqué dans
+    les produits (A - 1μᵀ) @ x = A @ x - 1 (μᵀ x), qui ne coûtent que
+    O(nnz × (n_components + oversampling)). Le signe de chaque axe est fixé
+    (coordonnée de plus grande valeur absolue positive) pour des projections
+    stables d'une exécution à l'autre.
+
+    Returns:
+        (coordonnées : nb acteurs × n_components, part de la variance expliquée par axe)
+    """
+    n = len(features.acteurs)
+    mean = np.bincount(features.cols, weights=features.values, minlength=features.n_cols) / n
+    n_components = min(n_components, n, features.n_cols)
+    width = min(n_components + oversampling, n, features.n_cols)
+
+    def dot(x: np.ndarray) -> np.ndarray:
+        return features.dot(x) - mean @ x
+
+    def tdot(y: np.ndarray) -> np.ndarray:
+        return features.tdot(y) - np.outer(mean, y.sum(axis=0))
+
+    rng = np.random.default_rng(seed)
+    q, _ = np.linalg.qr(dot(rng.standard_normal((features.n_cols, width))))
+    for _ in range(power_iterations):
+        z, _ = np.linalg.qr(tdot(q))
+        q, _ = np.linalg.qr(dot(z))
+    u, s, _ = np.linalg.svd(tdot(q).T, full_matrices=False)
+    u = (q @ u)[:, :n_components]
+    s = s[:n_components]
+
+    signs = np.sign(u[np.abs(u).argmax(axis=0), np.arange(n_components)])
+    signs[signs == 0] = 1
+    total = float(features.values @ features.values) - n * float(mean @ mean)
+    return u * s * signs, s ** 2 / total if total > 0 else np.zeros(n_components)
+
+
+def _sources_signature(amendements_csv: Path, mandats: TableSource, dimensions: int, seed: int) -> str:
+    """Tables dont dépend la projection (mandats : celle fournie), et ses paramètres"""
+    paths = [amendements_csv, edges_path(str(amendements_csv))]
+    return f"{files_signature(paths)};{table_signature(mandats)};dimensions={dimensions};graine={seed}"
+
+
+def cached_embedding(amendements_csv: Union[str, Path], mandats: TableSource,
+                     cube: Optional[pd.DataFrame] = None, amendements: Optional[pd.DataFrame] = None,
+                     dimensions: int = DEFAULT_DIMENSIONS, seed: int = 0, use_cache: bool = True) -> Embedding:
+    """
+    Projection des députés, relue depuis son cache si elle est à jour
+
+    Le cache amendements_nuage.npz est réutilisé tant qu'amendements.csv,
+    amendements_cosignataires.csv et la table mandats fournie n'ont pas changé et
+    que dimensions et seed sont les mêmes. cube et amendements évitent de
+    relire le cube ou la table des amendements s'ils sont déjà chargés.
+    """
+    amendements_csv = Path(amendements_csv)
+    cache = embedding_path(amendements_csv)
+    signature = _sources_signature(amendements_csv, mandats, dimensions, seed)
+    if use_cache and cache.exists():
+        with np.load(cache, allow_pickle=False) as data:
+            if str(data['signature']) == signature:
+                print(f"✓ Projection de {len(data['acteurs'])} députés relue depuis {cache}")
+                return Embedding(data['acteurs'], data['coordonnees'], data['variance'])
+
+    start = time.perf_counter()
+    mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    if cube is None:
+        cube = cached_cube(amendements_csv, mandats)
+    matrix = build_cosignature_matrix(str(amendements_csv), amendements=amendements)
+    features = build_features(cube, matrix, latest_groups(build_group_index(mandats)))
+    coordonnees, variance = randomized_pca(features, dimensions, seed=seed)
+    embedding = Embedding(features.acteurs, coordonnees, variance)
+
+    save_npz_atomic(cache, signature=np.array(signature), **embedding._asdict())
+
+    print(f"✓ Projection de {len(features.acteurs)} députés × {features.n_cols} caractéristiques "
+          f"({len(features.values)} non nulles) calculée en {time.perf_counter() - start:.1f} s (cache {cache})")
+    return embedding
+
+
+def embedding_table(embedding: Embedding, cube: pd.DataFrame, acteurs: pd.DataFrame, mandats: pd.DataFrame,
+                    organes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Table du nuage de points : identité, dernier groupe, nombre d'amendements
+    déposés et coordonnées (arrondies à 4 décimales) de chaque député
+    """
+    nuage = pd.DataFrame({'acteur_uid': embedding.acteurs})
+    noms = acteurs.drop_duplicates('acteur_uid').set_index('acteur_uid')
+    nuage['prenom'] = nuage['acteur_uid'].map(noms['prenom'])
+    nuage['nom'] = nuage['acteur_uid'].map(noms['nom'])
+    nuage['groupe_uid'] = nuage['acteur_uid'].map(latest_groups(build_group_index(mandats)))
+    nuage['groupe'] = nuage['groupe_uid'].map(organes.drop_duplicates('organe_uid')
+                                              .set_index('organe_uid')['libelle_abrege'])
+
+    deputes = cube[cube['auteur_type'] == 'Député']
+    nb_amendements = deputes.groupby('acteur_uid', observed=True)['nb_amendements'].sum()
+    nuage['nb_amendements'] = nuage['acteur_uid'].map(nb_amendements).fillna(0).astype(np.int64)
+
+    for axis, values in zip(AXES, embedding.coordonnees.T):
+        nuage[axis] = np.round(values, 4)
+    return nuage
+
+
+def compute_nuage_deputes(amendements_csv: str, cube: pd.DataFrame, acteurs: TableSource, mandats: TableSource,
+                          organes: TableSource, output_csv: str, amendements: Optional[pd.DataFrame] = None,
+                          dimensions: int = DEFAULT_DIMENSIONS, seed: int = 0,
+                          use_cache: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Calcule le nuage de points des députés et l'exporte en CSV
+
+    acteurs, mandats et organes sont des chemins de CSV ou des DataFrames déjà
+    chargés ; la projection est lue depuis son cache (ou calculée) à côté
+    d'amendements_csv.
+    """
+    if not edges_path(amendements_csv).exists():
+        print(f"Erreur: {edges_path(amendements_csv)} non trouvé (relancer la normalisation des amendements)")
+        return None
+
+    mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    embedding = cached_embedding(amendements_csv, mandats, cube=cube, amendements=amendements,
+                                 dimensions=dimensions, seed=seed, use_cache=use_cache)
+    acteurs = as_table(acteurs, columns=consumer_columns(CONSUMER, 'acteurs'), table='acteurs')
+    organes = as_table(organes, columns=consumer_columns(CONSUMER, 'organes'), table='organes')
+    nuage = embedding_table(embedding, cube, acteurs, mandats, organes)
+
+    output_path = Path(output_csv)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    nuage.to_csv(output_csv, index=False, encoding='utf-8')
+
+    parts = ', '.join(f"{axis} {ratio * 100:.1f} %" for axis, ratio in zip(AXES, embedding.variance))
+    print(f"\n✓ Nuage de {len(nuage)} députés en {embedding.coordonnees.shape[1]} dimensions "
+          f"(variance expliquée : {parts}), exporté vers {output_csv}")
+    return nuage
+
+
+def main():
+    """Calcule le nuage de points des députés à partir des CSV normalisés"""
+    parser = argparse.ArgumentParser(description="Nuage de points des députés (ACP randomisée)")
+    parser.add_argument('--dimensions', type=int, choices=[2, 3], default=DEFAULT_DIMENSIONS,
+                        help="Nombre d'axes de la projection (défaut: 3)")
+    parser.add_argument('--graine', type=int, default=0, help="Graine de la projection aléatoire (défaut: 0)")
+    parser.add_argument('--sortie', help="CSV de sortie (défaut: data/stats/nuage_deputes.csv)")
+    parser.add_argument('--reconstruire', action='store_true', help="Ignorer le cache et recalculer la projection")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    csv_dir = base_dir / "data" / "csv"
+    for filename in ['amendements.csv', 'acteurs.csv', 'organes.csv', 'mandats.csv']:
+        if not (csv_dir / filename).exists():
+            print(f"Erreur: {filename} non trouvé dans {csv_dir}")
+            sys.exit(1)
+
+    amendements_csv = csv_dir / "amendements.csv"
+    mandats = as_table(csv_dir / "mandats.csv", columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    output_csv = args.sortie or str(base_dir / "data" / "stats" / "nuage_deputes.csv")
+    nuage = compute_nuage_deputes(str(amendements_csv), cached_cube(amendements_csv, mandats),
+                                  csv_dir / "acteurs.csv", mandats, csv_dir / "organes.csv", output_csv,
+                                  dimensions=args.dimensions, seed=args.graine, use_cache=not args.reconstruire)
+    if nuage is None:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
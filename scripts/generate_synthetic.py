@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Jeu de données synthétique au format de l'Assemblée nationale
+Écrit une arborescence Amendements/DLR…/PION…/AMAN….json et un dossier
+'Députés et organes.json' (acteur/, organe/, mandat/) lisibles par les
+fonctions extract_*, à la taille voulue (de 10 000 à 1 000 000
+d'amendements), pour mesurer les performances (voir benchmark.py)
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Description du jeu généré (paramètres et nombre de fichiers), à la racine de la sortie
+METADATA_NAME = 'synthetique.json'
+
+# Version du format des fichiers générés, enregistrée dans synthetique.json : un
+# jeu d'une version antérieure est régénéré par benchmark.py
+FORMAT_VERSION = 2
+
+# Nombre d'amendements écrits par tâche du pool
+CHUNK_SIZE = 5_000
+
+# Début de la législature et dernier jour de dépôt généré
+DEBUT_LEGISLATURE = np.datetime64('2024-07-18')
+FIN_PERIODE = np.datetime64('2026-06-30')
+
+
+class Groupe(NamedTuple):
+    """Groupe politique généré"""
+    abrege: str
+    libelle: str
+    famille: str
+    sieges: int
+    taux_adoption: float        # part des amendements rejetés reclassés adoptés (bloc central)
+
+
+GROUPES: List[Groupe] = [
+    Groupe('RN', 'Rassemblement National', 'Extrême droite', 123, 0.0),
+    Groupe('EPR', 'Ensemble pour la République', 'Centre', 92, 0.25),
+    Groupe('LFI-NFP', 'La France insoumise - Nouveau Front Populaire', 'Gauche', 71, 0.0),
+    Groupe('SOC', 'Socialistes et apparentés', 'Gauche', 66, 0.05),
+    Groupe('DR', 'Droite Républicaine', 'Droite', 47, 0.15),
+    Groupe('EcoS', 'Écologiste et Social', 'Gauche', 38, 0.02),
+    Groupe('Dem', 'Les Démocrates', 'Centre', 36, 0.2),
+    Groupe('HOR', 'Horizons & Indépendants', 'Centre', 34, 0.2),
+    Groupe('LIOT', 'Libertés, Indépendants, Outre-mer et Territoires', 'Centre', 22, 0.05),
+    Groupe('GDR', 'Gauche Démocrate et Républicaine', 'Gauche', 17, 0.02),
+    Groupe('UDR', 'Union des droites pour la République', 'Extrême droite', 16, 0.0),
+]
+
+COMMISSIONS = [
+    ('CION_LOIS', 'Commission des lois constitutionnelles, de la législation et de l\'administration générale'),
+    ('CION_FIN', 'Commission des finances, de l\'économie générale et du contrôle budgétaire'),
+    ('CION-SOC', 'Commission des affaires sociales'),
+    ('CION-ECO', 'Commission des affaires économiques'),
+    ('CION-DVP', 'Commission du développement durable et de l\'aménagement du territoire'),
+    ('CION-CEDU', 'Commission des affaires culturelles et de l\'éducation'),
+    ('CION-DEF', 'Commission de la défense nationale et des forces armées'),
+    ('CION-AFETR', 'Commission des affaires étrangères'),
+]
+
+# Identifiants synthétiques (hors des plages réelles)
+ASSEMBLEE_UID = 'PO900000'
+GOUVERNEMENT_UID = 'PO900001'
+GROUPE_UID_BASE = 900100
+COMMISSION_UID_BASE = 900200
+ACTEUR_UID_BASE = 900000
+
+# Catégorie de sort → (sort prononcé, codes d'état possibles), avec sa probabilité
+SORTS = [
+    ('Adopté', ['AC'], 0.07),
+    ('Rejeté', ['AC'], 0.50),
+    ('Retiré', ['RET'], 0.07),
+    ('Non soutenu', ['AC'], 0.08),
+    ('Tombé', ['AC'], 0.05),
+    (None, ['IRR40', 'IRRSEANCE', 'IRR45'], 0.13),
+    (None, ['DI', 'AC', 'ER'], 0.10),
+]
+
+PRENOMS = ['Marie', 'Jean', 'Sophie', 'Pierre', 'Nathalie', 'Philippe', 'Isabelle', 'Laurent', 'Claire',
+           'Nicolas', 'Anne', 'Olivier', 'Caroline', 'Julien', 'Émilie', 'François', 'Hélène', 'Thomas']
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+        'Simon', 'Laurent', 'Lefèvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier']
+PROFESSIONS = ['Avocat', 'Cadre du secteur privé', 'Enseignant', 'Médecin', 'Agriculteur', 'Ingénieur',
+               'Fonctionnaire', 'Chef d\'entreprise', 'Journaliste', 'Sans profession déclarée']
+DEPARTEMENTS = ['Paris', 'Nord', 'Bouches-du-Rhône', 'Rhône', 'Gironde', 'Haute-Garonne', 'Finistère',
+                'Bas-Rhin', 'Hérault', 'Loire-Atlantique', 'Réunion', 'Isère']
+
+MOTS = ('le la les des du de un une et à dans pour par sur au aux est sont être article alinéa loi code '
+        'disposition présent amendement vise supprimer rédiger ainsi insérer après avant mots phrase '
+        'gouvernement rapport collectivités territoriales financement sécurité sociale état public '
+        'prévoit dispositif mesure objectif garantir permettre renforcer conditions modalités décret').split()
+
+
+def _texte_pool(rng: np.random.Generator, count: int = 256) -> List[str]:
+    """Paragraphes de texte (dispositif et exposé sommaire), réutilisés d'un amendement à l'autre"""
+    lengths = rng.integers(20, 250, size=count)
+    return [' '.join(rng.choice(MOTS, size=length)).capitalize() + '.' for length in lengths]
+
+
+def _date(day: np.datetime64) -> str:
+    return str(day)
+
+
+def _write_json(path: Path, document: Dict[str, Any]):
+    path.write_text(json.dumps(document, ensure_ascii=False), encoding='utf-8')
+
+
+class Deputes(NamedTuple):
+    """Députés générés (tableaux alignés)"""
+    uids: np.ndarray            # PA…
+    groupes: np.ndarray         # indice du groupe au début de la législature
+    nouveaux_groupes: np.ndarray  # indice du groupe après changement, -1 sinon
+    changements: np.ndarray     # date de changement de groupe (NaT sinon)
+    commissions: np.ndarray     # indice de la commission permanente
+    activite: np.ndarray        # poids relatif du nombre d'amendements déposés
+
+
+def generate_deputes(rng: np.random.Generator, nb_deputes: int) -> Deputes:
+    """Répartit les députés dans les groupes (au prorata des sièges) et tire leur activité"""
+    sieges = np.array([groupe.sieges for groupe in GROUPES], dtype=float)
+    groupes = rng.choice(len(GROUPES), size=nb_deputes, p=sieges / sieges.sum())
+    # Environ 4 % des députés changent de groupe en cours de législature
+    changes = rng.random(nb_deputes) < 0.04
+    nouveaux = np.where(changes, (groupes + rng.integers(1, len(GROUPES), size=nb_deputes)) % len(GROUPES), -1)
+    jours = int((FIN_PERIODE - DEBUT_LEGISLATURE).astype(int))
+    dates = DEBUT_LEGISLATURE + rng.integers(60, jours - 60, size=nb_deputes).astype('timedelta64[D]')
+    changements = np.where(changes, dates, np.datetime64('NaT'))
+    # Activité très inégale : quelques députés déposent des milliers d'amendements
+    activite = rng.lognormal(mean=0.0, sigma=1.3, size=nb_deputes)
+    return Deputes(
+        uids=np.array([f"PA{ACTEUR_UID_BASE + i}" for i in range(nb_deputes)]),
+        groupes=groupes,
+        nouveaux_groupes=nouveaux,
+        changements=changements,
+        commissions=rng.integers(0, len(COMMISSIONS), size=nb_deputes),
+        activite=activite / activite.sum(),
+    )
+
+
+def groupe_uid(index: int) -> str:
+    return f"PO{GROUPE_UID_BASE + index}"
+
+
+def commission_uid(index: int) -> str:
+    return f"PO{COMMISSION_UID_BASE + index}"
+
+
+def write_organes(organe_dir: Path) -> int:
+    """Assemblée, gouvernement, groupes politiques et commissions permanentes"""
+    organes = [(ASSEMBLEE_UID, 'ASSEMBLEE', 'Assemblée nationale', 'AN'),
+               (GOUVERNEMENT_UID, 'GOUVERNEMENT', 'Gouvernement', 'GOUV')]
+    organes += [(groupe_uid(i), 'GP', groupe.libelle, groupe.abrege) for i, groupe in enumerate(GROUPES)]
+    organes += [(commission_uid(i), 'COMPER', libelle, code) for i, (code, libelle) in enumerate(COMMISSIONS)]
+
+    for uid, code_type, libelle, abrege in organes:
+        _write_json(organe_dir / f"{uid}.json", {'organe': {
+            'uid': uid,
+            'codeType': code_type,
+            'libelle': libelle,
+            'libelleEdition': libelle,
+            'libelleAbrege': abrege,
+            'libelleAbrev': abrege.upper()[:6],
+            'viMoDe': {'dateDebut': _date(DEBUT_LEGISLATURE), 'dateAgrement': None, 'dateFin': None},
+            'organeParent': None,
+            'chambre': None,
+            'regime': '5ème République',
+            'legislature': '17',
+            'regimeJuridique': None,
+            'siteInternet': None,
+            'nombreReunionsAnnuelles': None,
+        }})
+    return len(organes)
+
+
+def write_acteurs(acteur_dir: Path, deputes: Deputes, rng: np.random.Generator) -> int:
+    """Un fichier par député (état civil, profession, adresse électronique)"""
+    for i, uid in enumerate(deputes.uids):
+        prenom, nom = PRENOMS[rng.integers(len(PRENOMS))], NOMS[rng.integers(len(NOMS))]
+        naissance = np.datetime64('1950-01-01') + int(rng.integers(0, 365 * 48))
+        _write_json(acteur_dir / f"{uid}.json", {'acteur': {
+            'uid': {'@xsi:type': 'IdActeur_type', '#text': uid},
+            'etatCivil': {
+                'ident': {'civ': 'Mme' if i % 2 else 'M.', 'prenom': prenom, 'nom': nom,
+                          'alpha': nom.upper(), 'trigramme': (prenom[0] + nom[:2]).upper()},
+                'infoNaissance': {'dateNais': _date(naissance), 'villeNais': DEPARTEMENTS[i % len(DEPARTEMENTS)],
+                                  'depNais': DEPARTEMENTS[i % len(DEPARTEMENTS)], 'paysNais': 'France'},
+                'dateDeces': None,
+            },
+            'profession': {'libelleCourant': PROFESSIONS[rng.integers(len(PROFESSIONS))],
+                           'socProcINSEE': {'catSocPro': None, 'famSocPro': None}},
+            'uri_hatvp': f"https://www.hatvp.fr/pages_nominatives/{nom.lower()}-{prenom.lower()}",
+            'adresses': {'adresse': [
+                {'@xsi:type': 'AdressePostale_Type', 'typeLibelle': 'Adresse officielle',
+                 'numeroRue': '126', 'nomRue': 'Rue de l\'Université', 'codePostal': '75355', 'ville': 'Paris 07 SP'},
+                {'@xsi:type': 'AdresseMail_Type', 'typeLibelle': 'Mèl',
+                 'valElec': f"{prenom.lower()}.{nom.lower()}{i}@assemblee-nationale.fr"},
+            ]},
+        }})
+    return len(deputes.uids)
+
+
+def write_mandats(mandat_dir: Path, deputes: Deputes) -> int:
+    """Mandats de député (ASSEMBLEE), de groupe (GP, un ou deux successifs) et de commission (COMPER)"""
+    count = 0
+
+    def mandat(acteur_uid: str, type_organe: str, organe: str, debut: np.datetime64,
+               fin: Optional[np.datetime64], qualite: str):
+        nonlocal count
+        count += 1
+        uid = f"PM{900000 + count}"
+        _write_json(mandat_dir / f"{uid}.json", {'mandat': {
+            'uid': uid,
+            'acteurRef': acteur_uid,
+            'legislature': '17',
+            'typeOrgane': type_organe,
+            'dateDebut': _date(debut),
+            'datePublication': _date(debut + 2),
+            'dateFin': None if fin is None else _date(fin),
+            'preseance': '20',
+            'nominPrincipale': '1',
+            'infosQualite': {'codeQualite': qualite, 'libQualite': qualite, 'libQualiteSex': qualite},
+            'organes': {'organeRef': organe},
+        }})
+
+    for i, uid in enumerate(deputes.uids):
+        mandat(uid, 'ASSEMBLEE', ASSEMBLEE_UID, DEBUT_LEGISLATURE, None, 'membre')
+        changement = deputes.changements[i]
+        if np.isnat(changement):
+            mandat(uid, 'GP', groupe_uid(deputes.groupes[i]), DEBUT_LEGISLATURE, None, 'Membre')
+        else:
+            mandat(uid, 'GP', groupe_uid(deputes.groupes[i]), DEBUT_LEGISLATURE, changement - 1, 'Membre')
+            mandat(uid, 'GP', groupe_uid(deputes.nouveaux_groupes[i]), changement, None, 'Membre')
+        mandat(uid, 'COMPER', commission_uid(deputes.commissions[i]), DEBUT_LEGISLATURE + 2, None, 'Membre')
+    return count
+
+
+class Textes(NamedTuple):
+    """Textes examinés (tableaux alignés)"""
+    refs: np.ndarray            # PIONANR5L17B…, PRJLANR5L17BTC…
+    dossiers: np.ndarray        # DLR5L17N…
+    examens: np.ndarray         # organe d'examen (séance ou commission)
+    debuts: np.ndarray          # premier jour de dépôt
+    durees: np.ndarray          # nombre de jours de dépôt
+    articles: np.ndarray        # nombre d'articles
+
+
+def generate_textes(rng: np.random.Generator, nb_amendements: int) -> Textes:
+    """Dossiers législatifs de un à trois textes (texte déposé, texte de la commission…)"""
+    nb_textes = max(5, nb_amendements // 250)
+    numeros = rng.permutation(np.arange(1, nb_textes * 3))[:nb_textes] + 100
+    prefixes = np.where(rng.random(nb_textes) < 0.3, 'PRJL', 'PION')
+    commission = rng.random(nb_textes) < 0.35
+    refs = np.array([f"{prefix}ANR5L17B{'TC' if tc else ''}{numero:04d}"
+                     for prefix, tc, numero in zip(prefixes, commission, numeros)])
+    # Les textes se suivent par dossier : 1 à 3 textes par dossier
+    dossier_ids = np.cumsum(rng.random(nb_textes) < 0.55)
+    jours = int((FIN_PERIODE - DEBUT_LEGISLATURE).astype(int))
+    return Textes(
+        refs=refs,
+        dossiers=np.array([f"DLR5L17N{50000 + i}" for i in dossier_ids]),
+        examens=np.where(commission, rng.integers(COMMISSION_UID_BASE, COMMISSION_UID_BASE + len(COMMISSIONS),
+                                                  size=nb_textes), int(ASSEMBLEE_UID[2:])),
+        debuts=DEBUT_LEGISLATURE + rng.integers(0, jours - 60, size=nb_textes).astype('timedelta64[D]'),
+        durees=rng.integers(2, 60, size=nb_textes),
+        articles=rng.integers(1, 40, size=nb_textes),
+    )
+
+
+class Plan(NamedTuple):
+    """Attributs tirés pour chaque amendement (tableaux alignés), avant écriture"""
+    textes: np.ndarray          # indice du texte
+    numeros: np.ndarray         # numéro dans le texte
+    auteurs: np.ndarray         # indice du député auteur, -1 pour le gouvernement
+    jours: np.ndarray           # date de dépôt
+    sorts: np.ndarray           # indice dans SORTS
+    articles: np.ndarray        # article visé
+
+
+def plan_amendements(rng: np.random.Generator, nb_amendements: int, deputes: Deputes, textes: Textes) -> Plan:
+    """Tire texte, auteur, date et sort de chaque amendement (vectorisé)"""
+    # Taille des textes très inégale (loi de finances contre proposition de loi de deux articles)
+    poids = rng.pareto(1.2, size=len(textes.refs)) + 0.05
+    texte = np.sort(rng.choice(len(textes.refs), size=nb_amendements, p=poids / poids.sum()))
+    numeros = np.arange(nb_amendements) - np.searchsorted(texte, texte) + 1
+
+    auteurs = rng.choice(len(deputes.uids), size=nb_amendements, p=deputes.activite)
+    auteurs[rng.random(nb_amendements) < 0.03] = -1
+
+    jours = textes.debuts[texte] + (rng.random(nb_amendements) * textes.durees[texte]).astype('timedelta64[D]')
+
+    probas = np.array([proba for _, _, proba in SORTS])
+    sorts = rng.choice(len(SORTS), size=nb_amendements, p=probas / probas.sum())
+    # Les groupes du bloc central voient davantage d'amendements adoptés
+    taux = np.array([groupe.taux_adoption for groupe in GROUPES])
+    groupe_auteur = np.where(auteurs >= 0, deputes.groupes[np.maximum(auteurs, 0)], 0)
+    promus = (sorts == 1) & (auteurs >= 0) & (rng.random(nb_amendements) < taux[groupe_auteur])
+    sorts[promus] = 0
+    sorts[auteurs < 0] = np.where(rng.random(int((auteurs < 0).sum())) < 0.8, 0, 1)
+
+    articles = (rng.random(nb_amendements) * textes.articles[texte]).astype(int) + 1
+    return Plan(texte, numeros, auteurs, jours, sorts, articles)
+
+
+def _groupe_a(deputes: Deputes, auteur: int, jour: np.datetime64) -> int:
+    """Groupe d'un député à une date"""
+    changement = deputes.changements[auteur]
+    if not np.isnat(changement) and jour >= changement:
+        return int(deputes.nouveaux_groupes[auteur])
+    return int(deputes.groupes[auteur])
+
+
+def write_amendements_chunk(root: str, seed: int, chunk: int, deputes: Deputes, textes: Textes,
+                            plan: Plan) -> int:
+    """
+    Écrit un morceau d'amendements (plan restreint au morceau numéro chunk)
+
+    Les cosignataires et les textes sont tirés avec une graine propre au
+    morceau : le résultat ne dépend pas du nombre de processus.
+    """
+    rng = np.random.default_rng([seed, chunk])
+    paragraphes = _texte_pool(np.random.default_rng([seed, 0, 0]))
+    membres = [np.flatnonzero(deputes.groupes == i) for i in range(len(GROUPES))]
+    root_path = Path(root)
+
+    for k in range(len(plan.textes)):
+        t, auteur, jour = plan.textes[k], int(plan.auteurs[k]), plan.jours[k]
+        texte_ref = textes.refs[t]
+        bulletin = texte_ref.split('B', 1)[1]
+        uid = f"AMANR5L17PO{textes.examens[t]}B{bulletin}P0D1N{plan.numeros[k]:06d}"
+
+        if auteur >= 0:
+            groupe = _groupe_a(deputes, auteur, jour)
+            signataire = {'acteurRef': deputes.uids[auteur], 'typeAuteur': 'Député',
+                          'groupePolitiqueRef': groupe_uid(groupe)}
+            # Cosignataires : souvent aucun, parfois tout le groupe
+            tirage = rng.random()
+            nombre = 0 if tirage < 0.35 else int(rng.geometric(0.25)) if tirage < 0.93 else int(rng.integers(10, 60))
+            pool = membres[groupe] if rng.random() < 0.85 else np.arange(len(deputes.uids))
+            cosignataires = [deputes.uids[i] for i in rng.choice(pool, size=min(nombre, len(pool)), replace=False)
+                             if i != auteur]
+        else:
+            signataire = {'acteurRef': GOUVERNEMENT_UID, 'typeAuteur': 'Gouvernement', 'groupePolitiqueRef': None}
+            cosignataires = []
+
+        sort, etats, _ = SORTS[plan.sorts[k]]
+        etat_code = etats[rng.integers(len(etats))]
+        article = int(plan.articles[k])
+        additionnel = rng.random() < 0.15
+        designation = f"Après l'article {article}" if additionnel else f"Article {article}"
+        jour_sort = jour + int(rng.integers(0, 20)) if sort else None
+        document = {'amendement': {
+            'uid': uid,
+            'chronotag': uid,
+            'legislature': '17',
+            'identification': {
+                'numeroLong': str(plan.numeros[k]),
+                'numeroOrdreDepot': str(plan.numeros[k]),
+                'prefixeOrganeExamen': 'AN',
+                'numeroRect': '0',
+            },
+            'examenRef': f"EXANR5L17PO{textes.examens[t]}B{bulletin}P0D1",
+            'texteLegislatifRef': texte_ref,
+            'signataires': {
+                'auteur': signataire,
+                # Objet vide sans cosignataire, comme dans les données ouvertes
+                'cosignataires': {'acteurRef': cosignataires[0] if len(cosignataires) == 1 else cosignataires}
+                if cosignataires else {},
+                'texteAffichable': None,
+            },
+            'pointeurFragmentTexte': {
+                'division': {
+                    'titre': designation,
+                    'articleDesignationCourte': f"APRÈS ART. {article}" if additionnel else f"ART. {article}",
+                    'articleDesignation': designation,
+                    'type': 'ARTICLE',
+                    'avant_A_Apres': 'A' if additionnel else None,
+                    'articleAdditionnel': 'true' if additionnel else 'false',
+                },
+                'alinea': {'numero': str(int(rng.integers(1, 12)))},
+            },
+            'corps': {
+                'contenuAuteur': {
+                    'dispositif': paragraphes[rng.integers(len(paragraphes))],
+                    'exposeSommaire': ' '.join(paragraphes[i] for i in rng.integers(len(paragraphes), size=2)),
+                },
+            },
+            'cycleDeVie': {
+                'dateDepot': _date(jour),
+                'datePublication': _date(jour + 1),
+                'dateSort': None if jour_sort is None else f"{_date(jour_sort)}T15:30:00.000+02:00",
+                'soumisArticle40': 'true' if (etat_code == 'IRR40' or rng.random() < 0.08) else 'false',
+                'etatDesTraitements': {
+                    'etat': {'code': etat_code, 'libelle': etat_code},
+                    'sousEtat': {'code': None, 'libelle': None},
+                },
+                'sort': sort,
+            },
+            'article99': 'false',
+        }}
+
+        directory = root_path / textes.dossiers[t] / texte_ref
+        _write_json(directory / f"{uid}.json", document)
+    return len(plan.textes)
+
+
+def write_manual_mapping(output_csv: Path):
+    """Correspondance manuelle des groupes (voir apply_groupe_mapping.py)"""
+    output_csv.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'code_po': [groupe_uid(i) for i in range(len(GROUPES))],
+        'nom_complet': [groupe.libelle for groupe in GROUPES],
+        'abreviation': [groupe.abrege for groupe in GROUPES],
+        'famille_politique': [groupe.famille for groupe in GROUPES],
+    }).to_csv(output_csv, index=False, encoding='utf-8')
+
+
+def generate_dataset(output_dir: str, nb_amendements: int, nb_deputes: int = 577, seed: int = 0,
+                     workers: int = 1) -> Dict[str, Any]:
+    """
+    Génère un jeu complet dans output_dir
+
+    output_dir reçoit Amendements/, 'Députés et organes.json/' et
+    data/groupes_politiques_l17_manuel.csv, c'est-à-dire la disposition
+    attendue par run_normalization.py et pipeline.py à la racine du dépôt.
+    Le même couple (graine, tailles) produit toujours les mêmes fichiers.
+
+    Returns:
+        Description du jeu (paramètres et nombre de fichiers de chaque type),
+        aussi écrite dans output_dir/synthetique.json
+    """
+    root = Path(output_dir)
+    amendements_dir = root / "Amendements"
+    deputes_dir = root / "Députés et organes.json"
+    for name in ('acteur', 'organe', 'mandat'):
+        (deputes_dir / name).mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    deputes = generate_deputes(rng, nb_deputes)
+    textes = generate_textes(rng, nb_amendements)
+    plan = plan_amendements(rng, nb_amendements, deputes, textes)
+
+    counts = {
+        'acteurs': write_acteurs(deputes_dir / "acteur", deputes, rng),
+        'organes': write_organes(deputes_dir / "organe"),
+        'mandats': write_mandats(deputes_dir / "mandat", deputes),
+    }
+    print(f"✓ {counts['acteurs']} acteurs, {counts['organes']} organes, {counts['mandats']} mandats")
+
+    for dossier, texte_ref in set(zip(textes.dossiers[plan.textes], textes.refs[plan.textes])):
+        (amendements_dir / dossier / texte_ref).mkdir(parents=True, exist_ok=True)
+
+    chunks = [(str(amendements_dir), seed, i + 1, deputes, textes,
+               Plan(*(values[start:start + CHUNK_SIZE] for values in plan)))
+              for i, start in enumerate(range(0, nb_amendements, CHUNK_SIZE))]
+    written = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for count in executor.map(write_amendements_chunk, *zip(*chunks)):
+                written += count
+                print(f"  {written}/{nb_amendements} amendements écrits...")
+    else:
+        for chunk in chunks:
+            written += write_amendements_chunk(*chunk)
+            print(f"  {written}/{nb_amendements} amendements écrits...")
+    counts['amendements'] = written
+
+    write_manual_mapping(root / "data" / "groupes_politiques_l17_manuel.csv")
+
+    metadata = {
+        'format': FORMAT_VERSION,
+        'amendements': nb_amendements,
+        'deputes': nb_deputes,
+        'graine': seed,
+        'fichiers': counts,
+        'textes': int(len(set(plan.textes))),
+        'dossiers': int(len(set(textes.dossiers[plan.textes]))),
+    }
+    (root / METADATA_NAME).write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✓ {written} amendements ({metadata['textes']} textes, {metadata['dossiers']} dossiers) "
+          f"générés dans {root}")
+    return metadata
+
+
+def load_metadata(output_dir: str) -> Optional[Dict[str, Any]]:
+    """Description d'un jeu déjà généré, None s'il n'existe pas"""
+    path = Path(output_dir) / METADATA_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def main():
+    """Génère un jeu de données synthétique"""
+    parser = argparse.ArgumentParser(description="Jeu de données synthétique au format de l'Assemblée nationale")
+    parser.add_argument('--amendements', type=int, default=10_000,
+                        help="Nombre d'amendements (défaut: 10000)")
+    parser.add_argument('--deputes', type=int, default=577, help="Nombre de députés (défaut: 577)")
+    parser.add_argument('--graine', type=int, default=0, help="Graine du tirage (défaut: 0)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus d'écriture des amendements (défaut: 1)")
+    parser.add_argument('--sortie', help="Dossier de sortie (défaut: data/synthetique/<amendements>)")
+    args = parser.parse_args()
+
+    output_dir = args.sortie or Path(__file__).parent.parent / "data" / "synthetique" / str(args.amendements)
+    if load_metadata(output_dir) is not None:
+        print(f"Erreur: {output_dir} contient déjà un jeu généré (supprimer le dossier pour le régénérer)")
+        sys.exit(1)
+    generate_dataset(str(output_dir), args.amendements, nb_deputes=args.deputes, seed=args.graine,
+                     workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
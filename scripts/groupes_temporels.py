@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Index temporel d'appartenance aux groupes politiques
+Construit, à partir des mandats de type GP, des intervalles [date_debut,
+date_fin] triés par acteur puis par date, et attribue à chaque amendement
+le groupe de son auteur à sa date de dépôt par une jointure « as-of »
+vectorisée (np.searchsorted)
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from schema import consumer_columns, load_table
+
+
+# Fin d'un mandat en cours (date_fin manquante), en jours
+OPEN_END = np.iinfo(np.int64).max
+
+
+class GroupIndex(NamedTuple):
+    """
+    Mandats de groupe politique triés par (acteur, date_debut)
+
+    Les dates sont des nombres de jours depuis le 1970-01-01 ; codes[i] est
+    la position de l'acteur du mandat i dans acteurs (uid triés, sans doublon).
+    """
+    acteurs: np.ndarray
+    codes: np.ndarray
+    debuts: np.ndarray
+    fins: np.ndarray
+    organes: np.ndarray
+
+
+def _days(dates: pd.Series) -> np.ndarray:
+    """Dates en nombre de jours (int64) ; les dates manquantes valent OPEN_END"""
+    dates = pd.to_datetime(dates)
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    days[dates.isna().to_numpy()] = OPEN_END
+    return days
+
+
+def build_group_index(mandats: pd.DataFrame) -> GroupIndex:
+    """
+    Construit l'index à partir d'une table de mandats
+
+    Colonnes utilisées : acteur_uid, organe_uid, type_organe, date_debut, date_fin.
+    Les mandats sans date de début sont ignorés.
+    """
+    gp = mandats[(mandats['type_organe'] == 'GP') & mandats['acteur_uid'].notna()
+                 & mandats['date_debut'].notna()]
+
+    acteur_uids = gp['acteur_uid'].to_numpy(dtype=str)
+    debuts = _days(gp['date_debut'])
+    fins = _days(gp['date_fin'])
+    organes = gp['organe_uid'].fillna('').to_numpy(dtype=str)
+
+    # Tri stable par acteur puis par date de début
+    order = np.lexsort((debuts, acteur_uids))
+    acteurs, codes = np.unique(acteur_uids[order], return_inverse=True)
+    return GroupIndex(acteurs, codes.astype(np.int64), debuts[order], fins[order], organes[order])
+
+
+def load_group_index(mandats_csv: str) -> GroupIndex:
+    """Charge mandats.csv (colonnes utiles uniquement) et construit l'index"""
+    mandats = load_table(mandats_csv, columns=consumer_columns('groupes_temporels', 'mandats'), table='mandats')
+    return build_group_index(mandats)
+
+
+def groups_at(index: GroupIndex, acteur_uids: pd.Series, dates: pd.Series) -> np.ndarray:
+    """
+    Groupe politique de chaque acteur à la date correspondante (jointure as-of)
+
+    Pour chaque ligne, le mandat retenu est celui de l'acteur ayant la date de
+    début la plus récente inférieure ou égale à la date demandée, s'il n'est pas
+    terminé à cette date. Une seule recherche dichotomique vectorisée sur une
+    clé composite (acteur, jour) traite toutes les lignes à la fois.
+
+    Returns:
+        Tableau des organe_uid ('' si aucun groupe à cette date)
+    """
+    result = np.full(len(acteur_uids), '', dtype=object)
+    if len(index.codes) == 0 or len(acteur_uids) == 0:
+        return result
+
+    query_uids = acteur_uids.fillna('').to_numpy(dtype=str)
+    query_days = _days(dates)
+    query_codes = np.searchsorted(index.acteurs, query_uids)
+    known = (query_codes < len(index.acteurs)) & (query_days != OPEN_END)
+    known[known] = index.acteurs[query_codes[known]] == query_uids[known]
+    if not known.any():
+        return result
+
+    # Clé composite acteur × jour, croissante dans l'index (tri par acteur puis début)
+    day0 = min(index.debuts.min(), query_days[known].min())
+    span = max(index.debuts.max(), query_days[known].max()) - day0 + 1
+    index_keys = index.codes * span + (index.debuts - day0)
+    query_keys = query_codes[known] * span + (query_days[known] - day0)
+
+    pos = np.searchsorted(index_keys, query_keys, side='right') - 1
+    found = pos >= 0
+    found[found] = index.codes[pos[found]] == query_codes[known][found]
+    found[found] &= query_days[known][found] <= index.fins[pos[found]]
+
+    rows = np.flatnonzero(known)[found]
+    result[rows] = index.organes[pos[found]]
+    return result
+
+
+def groups_at_depot(index: GroupIndex, amendements: pd.DataFrame) -> pd.Series:
+    """
+    Groupe de l'auteur de chaque amendement à sa date de dépôt
+
+    À défaut de mandat couvrant cette date, le groupe indiqué dans l'amendement
+    (auteur_groupe_politique_uid) est conservé ; les groupes vides valent NaN.
+    """
+    groupes_depot = groups_at(index, amendements['auteur_acteur_uid'], amendements['date_depot'])
+    groupes = amendements['auteur_groupe_politique_uid'].where(groupes_depot == '', groupes_depot)
+    return groupes.replace('', np.nan)
+
+
+def latest_groups(index: GroupIndex) -> pd.Series:
+    """Groupe du mandat GP le plus récent de chaque acteur, indexé par acteur_uid"""
+    if len(index.codes) == 0:
+        return pd.Series(dtype=object)
+    # Dernier mandat de chaque acteur : position précédant le début de l'acteur suivant
+    last = np.r_[np.flatnonzero(np.diff(index.codes)), len(index.codes) - 1]
+    return pd.Series(index.organes[last], index=pd.Index(index.acteurs, name='acteur_uid'), name='organe_uid')
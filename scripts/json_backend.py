@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Décodage JSON rapide et extraction déclarative de champs
+Utilise orjson s'il est installé (repli sur le module json standard) et
+extrait les champs d'un document à partir d'une table de chemins
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Tuple, Union
+
+import metrics
+from sources import SourceFile, read_bytes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Backend choisi : 'orjson' si disponible, sinon 'json'.
+# La variable d'environnement NUAGE_JSON_BACKEND=json force la bibliothèque standard
+# (elle est héritée par les processus du pool d'extraction).
+if orjson is not None and os.environ.get('NUAGE_JSON_BACKEND', 'orjson') != 'json':
+    BACKEND = 'orjson'
+else:
+    BACKEND = 'json'
+
+# Un champ est soit un chemin de clés depuis l'objet racine, soit une fonction
+# recevant l'objet racine (pour les champs calculés)
+FieldSpec = Dict[str, Union[Tuple[str, ...], Callable[[Dict[str, Any]], Any]]]
+
+
+@metrics.phase('decodage_json')
+def loads(raw: bytes) -> Any:
+    """Décode un document JSON avec le backend actif"""
+    if BACKEND == 'orjson':
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_json(json_file: SourceFile) -> Any:
+    """Lit et décode un fichier JSON, sur disque ou dans une archive ZIP"""
+    return loads(read_bytes(json_file))
+
+
+def get_path(obj: Dict[str, Any], path: Tuple[str, ...], default: Any = '') -> Any:
+    """
+    Suit un chemin de clés comme une chaîne de .get(key, {}) : une étape absente
+    donne default en bout de chemin ; une étape présente mais qui n'est pas un
+    objet (null, chaîne…) lève AttributeError, et le fichier est signalé en erreur
+    """
+    for key in path[:-1]:
+        obj = obj.get(key, {})
+    return obj.get(path[-1], default)
+
+
+@metrics.phase('extraction_champs')
+def extract_fields(obj: Dict[str, Any], spec: FieldSpec) -> Dict[str, Any]:
+    """
+    Construit une ligne à partir d'une table de champs
+
+    Seules les clés listées dans spec sont lues ; l'ordre des colonnes est celui de spec.
+    """
+    return {
+        name: field(obj) if callable(field) else get_path(obj, field)
+        for name, field in spec.items()
+    }
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test de charge du service de requêtes (query_service.py)
+Envoie un mélange de recherches filtrées et d'agrégations, depuis plusieurs
+threads, et affiche le débit et les latences p50, p90 et p99. Sans --url, le
+service est lancé localement sur les CSV de data/csv
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def fetch(url: str) -> Tuple[int, bytes]:
+    """Statut HTTP et corps d'une requête GET"""
+    try:
+        with urlopen(url, timeout=30) as response:
+            return response.status, response.read()
+    except HTTPError as e:
+        return e.code, e.read()
+
+
+def fetch_json(url: str) -> Any:
+    """Réponse JSON d'une requête GET"""
+    return json.loads(fetch(url)[1])
+
+
+def sample_values(base_url: str) -> Dict[str, List[str]]:
+    """Identifiants réels (acteurs, groupes, textes, organes) servant à construire les requêtes"""
+    values = {}
+    for key in ('acteur_uid', 'groupe_politique_uid', 'texte_legislatif_ref'):
+        rows = fetch_json(f"{base_url}/agregats?par={key}&limite=1000")['lignes']
+        values[key] = [row[key] for row in rows]
+    values['organe_uid'] = [row['organe_uid'] for row in fetch_json(f"{base_url}/organes?limite=1000")['lignes']]
+    return values
+
+
+def build_queries(values: Dict[str, List[str]], count: int, rng: random.Random) -> List[str]:
+    """count requêtes distinctes (chemin et paramètres) tirées au hasard"""
+    templates = [
+        lambda: ('/amendements', {'acteur_uid': rng.choice(values['acteur_uid'])}),
+        lambda: ('/amendements', {'texte_legislatif_ref': rng.choice(values['texte_legislatif_ref']),
+                                  'sort_categorie': rng.choice(['adopté', 'rejeté', 'irrecevable'])}),
+        lambda: ('/amendements', {'groupe_politique_uid': rng.choice(values['groupe_politique_uid']), 'limite': 20}),
+        lambda: ('/agregats', {'par': 'sort_categorie', 'acteur_uid': rng.choice(values['acteur_uid'])}),
+        lambda: ('/agregats', {'par': 'groupe_politique_uid',
+                               'texte_legislatif_ref': rng.choice(values['texte_legislatif_ref'])}),
+        lambda: ('/agregats', {'par': 'mois', 'groupe_politique_uid': rng.choice(values['groupe_politique_uid'])}),
+        lambda: ('/mandats', {'organe_uid': rng.choice(values['organe_uid'])}),
+        lambda: ('/acteurs', {'acteur_uid': rng.choice(values['acteur_uid'])}),
+    ]
+    queries = set()
+    for _ in range(count * 20):
+        if len(queries) >= count:
+            break
+        path, params = rng.choice(templates)()
+        queries.add(f"{path}?{urlencode(params)}")
+    return sorted(queries)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile par rang le plus proche d'une liste triée"""
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_load(base_url: str, plan: List[str], concurrency: int) -> Tuple[List[float], int, float]:
+    """
+    Envoie les requêtes de plan depuis concurrency threads
+
+    Returns:
+        (latences en secondes, nombre d'erreurs, durée totale en secondes)
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def send(query: str):
+        nonlocal errors
+        start = time.perf_counter()
+        status, _ = fetch(base_url + query)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, plan))
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(label: str, latencies: List[float], errors: int, elapsed: float):
+    """Affiche débit et latences d'une série de requêtes"""
+    ordered = sorted(latencies)
+    ms = {pct: percentile(ordered, pct) * 1000 for pct in (50, 90, 99)}
+    print(f"{label}: {len(ordered)} requêtes, {errors} erreurs, {len(ordered) / elapsed:.0f} req/s")
+    print(f"  p50 {ms[50]:.2f} ms   p90 {ms[90]:.2f} ms   p99 {ms[99]:.2f} ms   max {ordered[-1] * 1000:.2f} ms")
+
+
+def main():
+    """Mesure les latences du service (premier passage sans cache, puis charge mixte)"""
+    parser = argparse.ArgumentParser(description="Test de charge du service de requêtes")
+    parser.add_argument('--url', help="URL du service (défaut: service lancé localement sur data/csv)")
+    parser.add_argument('--requetes', type=int, default=2000, help="Nombre de requêtes (défaut: 2000)")
+    parser.add_argument('--distinctes', type=int, default=300,
+                        help="Nombre de requêtes distinctes, les autres sont des répétitions (défaut: 300)")
+    parser.add_argument('--concurrence', type=int, default=4, help="Nombre de threads clients (défaut: 4)")
+    parser.add_argument('--graine', type=int, default=0, help="Graine du tirage des requêtes (défaut: 0)")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        from query_service import QueryEngine, make_server
+
+        csv_dir = Path(__file__).parent.parent / "data" / "csv"
+        if not (csv_dir / "amendements.csv").exists():
+            print(f"Erreur: amendements.csv non trouvé dans {csv_dir}")
+            sys.exit(1)
+        engine = QueryEngine(csv_dir)
+        server = make_server(engine, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        print(f"✓ Service lancé sur {base_url} (chargement {engine.load_seconds:.1f} s)")
+
+    try:
+        rng = random.Random(args.graine)
+        queries = build_queries(sample_values(base_url), args.distinctes, rng)
+        print(f"✓ {len(queries)} requêtes distinctes, {args.concurrence} threads\n")
+
+        # 1. Chaque requête une fois : réponses calculées (cache vide, sauf service déjà sollicité)
+        latencies, errors, elapsed = run_load(base_url, rng.sample(queries, len(queries)), args.concurrence)
+        report("Premier passage", latencies, errors, elapsed)
+
+        # 2. Charge mixte : requêtes tirées au hasard, en partie servies par le cache
+        plan = [rng.choice(queries) for _ in range(args.requetes)]
+        latencies, errors, elapsed = run_load(base_url, plan, args.concurrence)
+        report("Charge mixte", latencies, errors, elapsed)
+
+        cache = fetch_json(f"{base_url}/sante")['cache']
+        print(f"\n✓ Cache: {cache['hits']} hits, {cache['misses']} misses ({cache['taille']}/{cache['max']} entrées)")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
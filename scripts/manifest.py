@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Manifeste des fichiers sources et re-normalisation incrémentale
+Mémorise taille, date de modification et empreinte de chaque fichier JSON
+pour ne ré-extraire que les fichiers ajoutés ou modifiés
+"""
+
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import metrics
+from normalize_utils import current_umask, iter_extractions, write_csv_atomic
+from sources import PackedRecord, SourceFile, ZipMember, member_crc, quick_stat, read_bytes
+
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_csv: str) -> Path:
+    """Chemin du manifeste associé à un CSV (ex. amendements.manifest.json)"""
+    output_path = Path(output_csv)
+    return output_path.with_name(f"{output_path.stem}.manifest.json")
+
+
+def file_signature(json_file: SourceFile) -> Dict[str, Any]:
+    """
+    Taille, date de modification et empreinte du contenu d'un fichier
+
+    Pour un membre d'archive ZIP, l'empreinte est le CRC-32 de l'en-tête (aucune décompression) ;
+    pour un document compacté, celle enregistrée dans l'index du magasin.
+    """
+    size, mtime_ns = quick_stat(json_file)
+    if isinstance(json_file, PackedRecord):
+        digest = json_file.hash
+    elif isinstance(json_file, ZipMember):
+        digest = f"crc32:{member_crc(json_file):08x}"
+    else:
+        digest = hashlib.blake2b(read_bytes(json_file), digest_size=16).hexdigest()
+    return {'size': size, 'mtime_ns': mtime_ns, 'hash': digest}
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    """Charge un manifeste (dictionnaire vide s'il est absent ou d'une autre version)"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(path: Path, key: str, files: Dict[str, Dict[str, Any]]):
+    """Enregistre le manifeste de façon atomique (fichier temporaire puis renommage)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'key': key, 'files': files}, f)
+        os.chmod(tmp_name, 0o666 & ~current_umask())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _extract_signed(extract_fn: Callable[[SourceFile], Dict[str, Any]], json_file: SourceFile) -> Dict[str, Any]:
+    """Extrait un fichier et calcule sa signature (exécuté dans un processus du pool)"""
+    return {'record': extract_fn(json_file), 'signature': file_signature(json_file)}
+
+
+def _read_csv_header(csv_file: Path) -> List[str]:
+    """Renvoie la liste des colonnes d'un CSV existant"""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _iter_signed(json_files: List[SourceFile], input_path: Path, extract_fn: Callable[[SourceFile], Dict[str, Any]],
+                 key: str, files: Dict[str, Dict[str, Any]], workers: int = 1):
+    """
+    Extrait les fichiers en calculant leur signature
+
+    Génère (chemin relatif, ligne extraite, signature) ; les fichiers en erreur sont
+    signalés et ignorés. Alimente files au passage pour les fichiers extraits.
+    """
+    signed_extract = partial(_extract_signed, extract_fn)
+    for json_file, result, erreur in iter_extractions(json_files, signed_extract, workers=workers):
+        rel = json_file.relative_to(input_path).as_posix()
+        metrics.count('fichiers')
+        if erreur:
+            metrics.count('erreurs')
+            print(f"Erreur avec {json_file.name}: {erreur}")
+            continue
+        record, signature = result['record'], result['signature']
+        files[rel] = dict(signature, uid=record[key])
+        yield rel, record, signature
+
+
+def normalize_incremental(json_files: Iterable[SourceFile], input_dir: str, output_csv: str,
+                          extract_fn: Callable[[SourceFile], Dict[str, Any]], key: str,
+                          label: str, workers: int = 1, columns: Optional[List[str]] = None) -> int:
+    """
+    Met à jour un CSV normalisé en ne ré-extrayant que les fichiers ajoutés ou modifiés
+
+    Args:
+        json_files: Fichiers sources actuellement présents
+        input_dir: Dossier racine des sources (les chemins du manifeste y sont relatifs)
+        output_csv: CSV normalisé à mettre à jour
+        extract_fn: Fonction d'extraction d'un fichier
+        key: Colonne identifiant une ligne (ex. 'amendement_uid')
+        label: Nom des entités pour l'affichage (ex. 'amendements')
+        workers: Nombre de processus pour l'extraction
+        columns: Colonnes produites par extract_fn ; si elles diffèrent de l'en-tête
+            du CSV existant (colonne ajoutée au code), tout est ré-extrait
+
+    Un fichier dont la taille et la date de modification n'ont pas changé est
+    considéré inchangé sans être relu. Les lignes des fichiers modifiés sont
+    remplacées à leur place, celles des fichiers supprimés sont retirées et les
+    nouvelles sont ajoutées en fin de fichier. Sans manifeste (ou sans CSV),
+    tout est ré-extrait et le manifeste est créé.
+
+    Returns:
+        Nombre de lignes du CSV après mise à jour
+    """
+    input_path = Path(input_dir)
+    output_path = Path(output_csv)
+    manifest_file = manifest_path(output_csv)
+    json_files = list(json_files)
+
+    old_files = load_manifest(manifest_file).get('files', {}) if output_path.exists() else {}
+    if not old_files:
+        print("Aucun manifeste exploitable: reconstruction complète")
+        return _rebuild(json_files, input_path, output_csv, extract_fn, key, label, workers)
+
+    if columns is not None and columns != _read_csv_header(output_path):
+        print("Les colonnes ont changé depuis la dernière normalisation: reconstruction complète")
+        return _rebuild(json_files, input_path, output_csv, extract_fn, key, label, workers)
+
+    # 1. Comparer l'arborescence au manifeste (stat uniquement, aucun fichier lu)
+    files = {}
+    seen = set()
+    candidates = []
+    for json_file in json_files:
+        rel = json_file.relative_to(input_path).as_posix()
+        seen.add(rel)
+        previous = old_files.get(rel)
+        if previous is not None:
+            size, mtime_ns = quick_stat(json_file)
+            if size == previous['size'] and mtime_ns == previous['mtime_ns']:
+                files[rel] = previous
+                continue
+        candidates.append(json_file)
+
+    deleted = [rel for rel in old_files if rel not in seen]
+    print(f"  {len(files)} fichiers inchangés, {len(candidates)} à examiner, {len(deleted)} supprimés")
+
+    # 2. Ré-extraire les fichiers nouveaux ou modifiés (contenu identique = inchangé)
+    new_rows = {}
+    removed_uids = {old_files[rel]['uid'] for rel in deleted}
+    nb_added = nb_changed = 0
+
+    for rel, record, signature in _iter_signed(candidates, input_path, extract_fn, key, files, workers):
+        previous = old_files.get(rel)
+        if previous is None:
+            nb_added += 1
+        elif previous['hash'] != signature['hash']:
+            nb_changed += 1
+            if previous['uid'] != record[key]:
+                removed_uids.add(previous['uid'])
+        else:
+            continue
+        new_rows[record[key]] = record
+
+    # Un fichier en erreur garde son entrée précédente (sa ligne est conservée)
+    for rel in seen:
+        if rel not in files and rel in old_files:
+            files[rel] = old_files[rel]
+
+    removed_uids -= set(new_rows)
+
+    if new_rows and list(next(iter(new_rows.values())).keys()) != _read_csv_header(output_path):
+        print("Les colonnes ont changé depuis la dernière normalisation: reconstruction complète")
+        return _rebuild(json_files, input_path, output_csv, extract_fn, key, label, workers)
+
+    # 3. Réécrire le CSV (lignes remplacées sur place, nouvelles en fin de fichier)
+    if new_rows or removed_uids:
+        count = write_csv_atomic(_merged_rows(output_path, new_rows, removed_uids, key), output_csv)
+    else:
+        with open(output_path, 'r', encoding='utf-8', newline='') as f:
+            count = sum(1 for _ in csv.DictReader(f))
+
+    save_manifest(manifest_file, key, files)
+
+    print(f"\n✓ Mise à jour incrémentale de {output_csv}: {nb_added} {label} ajoutés, "
+          f"{nb_changed} modifiés, {len(removed_uids)} supprimés ({count} au total)")
+    return count
+
+
+def _rebuild(json_files: List[SourceFile], input_path: Path, output_csv: str,
+             extract_fn: Callable[[SourceFile], Dict[str, Any]], key: str, label: str, workers: int) -> int:
+    """Ré-extrait tous les fichiers au fil de l'eau et crée le manifeste"""
+    files = {}
+    rows = (record for _, record, _ in _iter_signed(json_files, input_path, extract_fn, key, files, workers))
+    count = write_csv_atomic(rows, output_csv)
+    save_manifest(manifest_path(output_csv), key, files)
+
+    print(f"\n✓ {count} {label} exportés vers {output_csv} (manifeste créé)")
+    return count
+
+
+def _merged_rows(output_path: Path, new_rows: Dict[str, Dict[str, Any]], removed_uids: set, key: str):
+    """Fusionne le CSV existant avec les lignes ré-extraites, au fil de l'eau"""
+    pending = dict(new_rows)
+    with open(output_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            uid = row[key]
+            if uid in removed_uids:
+                continue
+            if uid in pending:
+                yield pending.pop(uid)
+            elif uid not in new_rows:
+                yield row
+    yield from pending.values()
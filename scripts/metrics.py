@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Mesures d'exécution (option --profile de run_normalization.py et run_statistics.py)
+Durées réelle et CPU de chaque étape et de ses sous-phases (lecture disque,
+décodage JSON, extraction des champs, écriture CSV, chargement des tables),
+débit en fichiers/s, pic de mémoire et nombre d'erreurs, écrits dans un
+rapport JSON ; profil cProfile optionnel de l'étape la plus longue
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Mesures actives : positionné par enable() ; la variable d'environnement
+# NUAGE_PROFILE=1 est héritée par les processus du pool d'extraction
+PROFILING = os.environ.get('NUAGE_PROFILE') == '1'
+
+# Lignes du profil cProfile affichées pour l'étape la plus longue
+CPROFILE_TOP = 15
+
+# Sous-phase → [durée réelle, durée CPU, nombre d'appels], cumulées dans le processus courant
+_phases: Dict[str, List[float]] = {}
+# Compteurs ('fichiers', 'erreurs'), cumulés dans le processus courant
+_counters: Dict[str, int] = {}
+# Étapes terminées, dans l'ordre d'exécution
+_stages: List[Dict[str, Any]] = []
+# Profil cProfile de chaque étape (si enable(cprofile=True))
+_profiles: Dict[str, cProfile.Profile] = {}
+_cprofile = False
+_started: Optional[float] = None
+
+
+def enable(cprofile: bool = False):
+    """Active les mesures (et le profil cProfile de chaque étape) pour ce processus et ses fils"""
+    global PROFILING, _cprofile, _started
+    PROFILING = True
+    _cprofile = cprofile
+    _started = time.time()
+    os.environ['NUAGE_PROFILE'] = '1'
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus et de ses processus fils terminés, en Mo"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss est en octets sous macOS, en kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _cpu_seconds() -> float:
+    """Temps CPU (utilisateur + système) du processus et de ses processus fils terminés"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def phase(name: str) -> Callable:
+    """
+    Décorateur : cumule durée réelle, durée CPU et nombre d'appels dans la sous-phase name
+
+    Sans mesures actives, la fonction est appelée directement.
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILING:
+                return fn(*args, **kwargs)
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals = _phases.setdefault(name, [0.0, 0.0, 0])
+                totals[0] += time.perf_counter() - wall
+                totals[1] += time.process_time() - cpu
+                totals[2] += 1
+        return wrapper
+    return decorate
+
+
+def count(name: str, increment: int = 1):
+    """Incrémente un compteur ('fichiers', 'erreurs'…)"""
+    if PROFILING:
+        _counters[name] = _counters.get(name, 0) + increment
+
+
+def take_phases() -> Dict[str, List[float]]:
+    """Sous-phases cumulées depuis le dernier appel (renvoyées par les processus du pool), remises à zéro"""
+    if not _phases:
+        return {}
+    taken = {name: list(values) for name, values in _phases.items()}
+    _phases.clear()
+    return taken
+
+
+def merge_phases(phases: Dict[str, List[float]]):
+    """Ajoute les sous-phases mesurées dans un processus du pool"""
+    for name, values in phases.items():
+        totals = _phases.setdefault(name, [0.0, 0.0, 0])
+        for i, value in enumerate(values):
+            totals[i] += value
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Mesure une étape : durées réelle et CPU (processus fils compris), sous-phases,
+    fichiers traités et erreurs pendant l'étape, pic de mémoire atteint à sa fin
+    """
+    if not PROFILING:
+        yield
+        return
+
+    phases_before = {key: list(values) for key, values in _phases.items()}
+    counters_before = dict(_counters)
+    wall, cpu = time.perf_counter(), _cpu_seconds()
+    profile = cProfile.Profile() if _cprofile else None
+    status = 'ok'
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    except BaseException:
+        status = 'échec'
+        raise
+    finally:
+        if profile is not None:
+            profile.disable()
+            _profiles[name] = profile
+        elapsed = time.perf_counter() - wall
+        files = _counters.get('fichiers', 0) - counters_before.get('fichiers', 0)
+        phases = {}
+        for key, values in _phases.items():
+            before = phases_before.get(key, [0.0, 0.0, 0])
+            if values[2] > before[2]:
+                phases[key] = {'duree_s': round(values[0] - before[0], 3), 'cpu_s': round(values[1] - before[1], 3),
+                               'appels': int(values[2] - before[2])}
+        _stages.append({
+            'etape': name,
+            'statut': status,
+            'duree_s': round(elapsed, 3),
+            'cpu_s': round(_cpu_seconds() - cpu, 3),
+            'fichiers': files,
+            'fichiers_par_s': round(files / elapsed, 1) if files and elapsed > 0 else None,
+            'erreurs': _counters.get('erreurs', 0) - counters_before.get('erreurs', 0),
+            'rss_max_mo': round(peak_rss_mb(), 1),
+            'phases': phases,
+        })
+
+
+def report_path(command: str) -> Path:
+    """Chemin par défaut du rapport : data/metrics/<commande>_<date>.json"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return Path(__file__).parent.parent / "data" / "metrics" / f"{command}_{stamp}.json"
+
+
+def write_report(output_json: str, command: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Écrit le rapport JSON de l'exécution et en affiche le résumé
+
+    Les durées des sous-phases sont cumulées sur tous les processus : avec
+    plusieurs processus d'extraction, elles peuvent dépasser la durée de l'étape.
+    Avec cProfile, le profil de l'étape la plus longue (processus principal
+    seulement) est enregistré à côté du rapport (.prof, lisible par pstats ou snakeviz).
+    """
+    from json_backend import BACKEND
+
+    output_path = Path(output_json)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        'commande': command,
+        'options': options or {},
+        'debut': datetime.fromtimestamp(_started or time.time()).isoformat(timespec='seconds'),
+        'fin': datetime.now().isoformat(timespec='seconds'),
+        'duree_s': round(sum(stage_metrics['duree_s'] for stage_metrics in _stages), 3),
+        'cpu_s': round(sum(stage_metrics['cpu_s'] for stage_metrics in _stages), 3),
+        'rss_max_mo': round(peak_rss_mb(), 1),
+        'erreurs': sum(stage_metrics['erreurs'] for stage_metrics in _stages),
+        'machine': {'python': platform.python_version(), 'systeme': platform.platform(),
+                    'processeurs': os.cpu_count(), 'backend_json': BACKEND},
+        'etapes': _stages,
+    }
+
+    if _profiles and _stages:
+        hottest = max(_stages, key=lambda stage_metrics: stage_metrics['duree_s'])['etape']
+        profile_path = output_path.with_suffix('.prof')
+        _profiles[hottest].dump_stats(str(profile_path))
+        report['cprofile'] = {'etape': hottest, 'fichier': str(profile_path)}
+
+    output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    print("\nMesures par étape:")
+    print(f"  {'étape':<28}{'durée':>9}{'CPU':>9}{'fichiers/s':>12}{'erreurs':>9}{'RSS max':>10}")
+    for stage_metrics in _stages:
+        rate = stage_metrics['fichiers_par_s']
+        print(f"  {stage_metrics['etape']:<28}{stage_metrics['duree_s']:>8.2f}s{stage_metrics['cpu_s']:>8.2f}s"
+              f"{rate if rate is not None else '-':>12}{stage_metrics['erreurs']:>9}"
+              f"{stage_metrics['rss_max_mo']:>7.0f} Mo")
+        for name, values in stage_metrics['phases'].items():
+            print(f"    {name:<26}{values['duree_s']:>8.2f}s{values['cpu_s']:>8.2f}s  ({values['appels']} appel(s))")
+    if 'cprofile' in report:
+        stream = io.StringIO()
+        pstats.Stats(report['cprofile']['fichier'], stream=stream).sort_stats('cumulative').print_stats(CPROFILE_TOP)
+        print(f"\nProfil cProfile de l'étape la plus longue ({report['cprofile']['etape']}):")
+        print('\n'.join(stream.getvalue().strip().splitlines()[-(CPROFILE_TOP + 2):]))
+        print(f"✓ Profil complet: {report['cprofile']['fichier']}")
+    print(f"\n✓ Rapport de mesures: {output_path}")
+    return report
@@ -4,93 +4,108 @@ Normalisation des fichiers acteurs JSON vers CSV
 Extrait les députés avec leurs informations de base
 """
 
-import json
-import csv
 import os
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional
 
+from json_backend import extract_fields, get_path, load_json
+from manifest import normalize_incremental
+from normalize_utils import iter_rows, write_csv_atomic
+from schema import export_parquet
+from sqlite_store import load_sqlite
+from sources import SourceFile, list_json_files, source_exists
 
-def extract_acteur_data(json_file: Path) -> Dict[str, Any]:
-    """Extrait les données pertinentes d'un fichier acteur JSON"""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    acteur = data.get('acteur', {})
-    uid = acteur.get('uid', {}).get('#text', '') if isinstance(acteur.get('uid'), dict) else acteur.get('uid', '')
-    
-    etat_civil = acteur.get('etatCivil', {})
-    ident = etat_civil.get('ident', {})
-    info_naissance = etat_civil.get('infoNaissance', {})
-    
-    profession = acteur.get('profession', {})
-    
-    # Extraire l'adresse email
-    email = None
-    adresses = acteur.get('adresses', {}).get('adresse', [])
+
+def _acteur_uid(acteur: Dict[str, Any]) -> str:
+    """Identifiant de l'acteur (uid peut être un objet {'#text': ...})"""
+    uid = acteur.get('uid', '')
+    return uid.get('#text', '') if isinstance(uid, dict) else uid
+
+
+def _acteur_email(acteur: Dict[str, Any]) -> str:
+    """Première adresse de type 'Mèl' de l'acteur"""
+    adresses = get_path(acteur, ('adresses', 'adresse'), [])
     if not isinstance(adresses, list):
         adresses = [adresses]
     
     for adresse in adresses:
         if adresse.get('typeLibelle') == 'Mèl':
-            email = adresse.get('valElec')
-            break
-    
-    return {
-        'acteur_uid': uid,
-        'civilite': ident.get('civ', ''),
-        'prenom': ident.get('prenom', ''),
-        'nom': ident.get('nom', ''),
-        'nom_alpha': ident.get('alpha', ''),
-        'trigramme': ident.get('trigramme', ''),
-        'date_naissance': info_naissance.get('dateNais', ''),
-        'ville_naissance': info_naissance.get('villeNais', ''),
-        'departement_naissance': info_naissance.get('depNais', ''),
-        'pays_naissance': info_naissance.get('paysNais', ''),
-        'date_deces': etat_civil.get('dateDeces', ''),
-        'profession_libelle': profession.get('libelleCourant', ''),
-        'email': email or '',
-        'uri_hatvp': acteur.get('uri_hatvp', '') or ''
-    }
-
-
-def normalize_acteurs(input_dir: str, output_csv: str):
-    """Normalise tous les fichiers acteurs vers un CSV"""
-    input_path = Path(input_dir)
+            return adresse.get('valElec') or ''
+    return ''
+
+
+# Colonnes du CSV → chemin dans l'objet 'acteur' (ou fonction de calcul)
+ACTEUR_FIELDS = {
+    'acteur_uid': _acteur_uid,
+    'civilite': ('etatCivil', 'ident', 'civ'),
+    'prenom': ('etatCivil', 'ident', 'prenom'),
+    'nom': ('etatCivil', 'ident', 'nom'),
+    'nom_alpha': ('etatCivil', 'ident', 'alpha'),
+    'trigramme': ('etatCivil', 'ident', 'trigramme'),
+    'date_naissance': ('etatCivil', 'infoNaissance', 'dateNais'),
+    'ville_naissance': ('etatCivil', 'infoNaissance', 'villeNais'),
+    'departement_naissance': ('etatCivil', 'infoNaissance', 'depNais'),
+    'pays_naissance': ('etatCivil', 'infoNaissance', 'paysNais'),
+    'date_deces': ('etatCivil', 'dateDeces'),
+    'profession_libelle': ('profession', 'libelleCourant'),
+    'email': _acteur_email,
+    'uri_hatvp': lambda acteur: acteur.get('uri_hatvp', '') or '',
+}
+
+
+def extract_acteur_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un document acteur déjà décodé"""
+    return extract_fields(data.get('acteur', {}), ACTEUR_FIELDS)
+
+
+def extract_acteur_data(json_file: SourceFile) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un fichier acteur JSON"""
+    return extract_acteur_record(load_json(json_file))
+
+
+def normalize_acteurs(input_dir: str, output_csv: str, workers: int = 1, incremental: bool = False,
+                      sqlite_db: Optional[str] = None):
+    """
+    Normalise tous les fichiers acteurs vers un CSV
     
-    if not input_path.exists():
+    Args:
+        input_dir: Dossier (ou dossier d'une archive .zip) contenant les fichiers acteurs JSON
+        output_csv: Fichier CSV de sortie
+        workers: Nombre de processus pour l'extraction (1 = séquentiel)
+        incremental: Ne ré-extraire que les fichiers ajoutés ou modifiés depuis
+            la dernière exécution (voir manifest.py)
+        sqlite_db: Base SQLite dans laquelle charger aussi la table (voir sqlite_store.py)
+    """
+    if not source_exists(input_dir):
         print(f"Erreur: le dossier {input_dir} n'existe pas")
         return
     
-    acteurs = []
-    json_files = list(input_path.glob('*.json'))
+    json_files = list_json_files(input_dir)
     
     print(f"Traitement de {len(json_files)} fichiers acteurs...")
     
-    for i, json_file in enumerate(json_files, 1):
-        try:
-            acteur_data = extract_acteur_data(json_file)
-            acteurs.append(acteur_data)
-            
-            if i % 100 == 0:
-                print(f"  Traité {i}/{len(json_files)} fichiers...")
-        except Exception as e:
-            print(f"Erreur avec {json_file.name}: {e}")
-    
-    # Écrire le CSV
-    if acteurs:
-        output_path = Path(output_csv)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        fieldnames = acteurs[0].keys()
-        with open(output_csv, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(acteurs)
-        
-        print(f"\n✓ {len(acteurs)} acteurs exportés vers {output_csv}")
+    if incremental:
+        count = normalize_incremental(json_files, input_dir, output_csv, extract_acteur_data,
+                                      key='acteur_uid', label='acteurs', workers=workers,
+                                      columns=list(ACTEUR_FIELDS))
     else:
-        print("Aucun acteur trouvé")
+        # Extraction et écriture au fil de l'eau (mémoire constante)
+        rows = iter_rows(json_files, extract_acteur_data, workers=workers,
+                         progress_every=100, total=len(json_files))
+        count = write_csv_atomic(rows, output_csv)
+        
+        if count:
+            print(f"\n✓ {count} acteurs exportés vers {output_csv}")
+        else:
+            print("Aucun acteur trouvé")
+    
+    # Export typé (catégories, dates, entiers) pour les scripts de statistiques
+    if count:
+        export_parquet(output_csv, table='acteurs')
+    
+    # Chargement optionnel dans la base SQLite indexée
+    if count and sqlite_db:
+        load_sqlite(output_csv, sqlite_db, table='acteurs')
 
 
 if __name__ == '__main__':
@@ -4,117 +4,200 @@ Normalisation des fichiers amendements JSON vers CSV
 Extrait les amendements avec leur métadonnées principales
 """
 
-import json
-import csv
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
+import re
 
+from cosignatures import COSIGNATAIRES_SEP, edges_path, export_cosignataires
+from json_backend import extract_fields, get_path, load_json, loads
+from manifest import normalize_incremental
+from normalize_utils import AtomicCsvWriter, iter_rows, write_csv_atomic
+from scan_amendements import CATALOG_COLUMNS, catalog_path, iter_cataloged_files
+from schema import export_parquet
+from sort_categories import classify_sort
+from sqlite_store import load_sqlite
+from sources import SourceFile, read_bytes, source_exists
 
-def extract_amendement_data(json_file: Path) -> Dict[str, Any]:
-    """Extrait les données pertinentes d'un fichier amendement JSON"""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    amendement = data.get('amendement', {})
-    identification = amendement.get('identification', {})
-    signataires = amendement.get('signataires', {})
-    auteur = signataires.get('auteur', {})
-    cycle_de_vie = amendement.get('cycleDeVie', {})
-    etat_traitements = cycle_de_vie.get('etatDesTraitements', {})
-    etat = etat_traitements.get('etat', {})
-    sous_etat = etat_traitements.get('sousEtat', {})
-    pointeur = amendement.get('pointeurFragmentTexte', {})
-    division = pointeur.get('division', {})
-    
-    # Extraire les cosignataires
-    cosignataires_refs = signataires.get('cosignataires', {}).get('acteurRef', [])
+
+def _cosignataires(amendement: Dict[str, Any]) -> List[str]:
+    """uid des cosignataires (acteurRef peut être une chaîne ou une liste)"""
+    cosignataires_refs = get_path(amendement, ('signataires', 'cosignataires', 'acteurRef'), [])
     if not isinstance(cosignataires_refs, list):
         cosignataires_refs = [cosignataires_refs] if cosignataires_refs else []
-    
-    nb_cosignataires = len(cosignataires_refs)
-    
-    return {
-        'amendement_uid': amendement.get('uid', ''),
-        'legislature': amendement.get('legislature', ''),
-        'numero_long': identification.get('numeroLong', ''),
-        'numero_ordre_depot': identification.get('numeroOrdreDepot', ''),
-        'prefixe_organe_examen': identification.get('prefixeOrganeExamen', ''),
-        'numero_rect': identification.get('numeroRect', ''),
-        'examen_ref': amendement.get('examenRef', ''),
-        'texte_legislatif_ref': amendement.get('texteLegislatifRef', ''),
-        'auteur_acteur_uid': auteur.get('acteurRef', ''),
-        'auteur_type': auteur.get('typeAuteur', ''),
-        'auteur_groupe_politique_uid': auteur.get('groupePolitiqueRef', ''),
-        'nb_cosignataires': nb_cosignataires,
-        'date_depot': cycle_de_vie.get('dateDepot', ''),
-        'date_publication': cycle_de_vie.get('datePublication', ''),
-        'date_sort': cycle_de_vie.get('dateSort', ''),
-        'soumis_article40': cycle_de_vie.get('soumisArticle40', ''),
-        'etat_code': etat.get('code', ''),
-        'etat_libelle': etat.get('libelle', ''),
-        'sous_etat_code': sous_etat.get('code', ''),
-        'sous_etat_libelle': sous_etat.get('libelle', ''),
-        'sort': cycle_de_vie.get('sort', ''),
-        'article_designation': division.get('articleDesignation', ''),
-        'article_designation_courte': division.get('articleDesignationCourte', ''),
-        'division_titre': division.get('titre', ''),
-        'division_type': division.get('type', ''),
-        'article_additionnel': division.get('articleAdditionnel', ''),
-        'article99': amendement.get('article99', ''),
-    }
-
-
-def normalize_amendements(input_dir: str, output_csv: str, limit: int = None):
+    return cosignataires_refs
+
+
+def _nb_cosignataires(amendement: Dict[str, Any]) -> int:
+    """Nombre de cosignataires"""
+    return len(_cosignataires(amendement))
+
+
+def _sort_categorie(amendement: Dict[str, Any]) -> str:
+    """Catégorie de sort (voir sort_categories.py)"""
+    return classify_sort(get_path(amendement, ('cycleDeVie', 'sort')),
+                         get_path(amendement, ('cycleDeVie', 'etatDesTraitements', 'etat', 'code')))
+
+
+# Colonnes du CSV → chemin dans l'objet 'amendement' (ou fonction de calcul)
+AMENDEMENT_FIELDS = {
+    'amendement_uid': ('uid',),
+    'legislature': ('legislature',),
+    'numero_long': ('identification', 'numeroLong'),
+    'numero_ordre_depot': ('identification', 'numeroOrdreDepot'),
+    'prefixe_organe_examen': ('identification', 'prefixeOrganeExamen'),
+    'numero_rect': ('identification', 'numeroRect'),
+    'examen_ref': ('examenRef',),
+    'texte_legislatif_ref': ('texteLegislatifRef',),
+    'auteur_acteur_uid': ('signataires', 'auteur', 'acteurRef'),
+    'auteur_type': ('signataires', 'auteur', 'typeAuteur'),
+    'auteur_groupe_politique_uid': ('signataires', 'auteur', 'groupePolitiqueRef'),
+    'nb_cosignataires': _nb_cosignataires,
+    'cosignataires_uids': lambda amendement: COSIGNATAIRES_SEP.join(_cosignataires(amendement)),
+    'date_depot': ('cycleDeVie', 'dateDepot'),
+    'date_publication': ('cycleDeVie', 'datePublication'),
+    'date_sort': ('cycleDeVie', 'dateSort'),
+    'soumis_article40': ('cycleDeVie', 'soumisArticle40'),
+    'etat_code': ('cycleDeVie', 'etatDesTraitements', 'etat', 'code'),
+    'etat_libelle': ('cycleDeVie', 'etatDesTraitements', 'etat', 'libelle'),
+    'sous_etat_code': ('cycleDeVie', 'etatDesTraitements', 'sousEtat', 'code'),
+    'sous_etat_libelle': ('cycleDeVie', 'etatDesTraitements', 'sousEtat', 'libelle'),
+    'sort': ('cycleDeVie', 'sort'),
+    'sort_categorie': _sort_categorie,
+    'article_designation': ('pointeurFragmentTexte', 'division', 'articleDesignation'),
+    'article_designation_courte': ('pointeurFragmentTexte', 'division', 'articleDesignationCourte'),
+    'division_titre': ('pointeurFragmentTexte', 'division', 'titre'),
+    'division_type': ('pointeurFragmentTexte', 'division', 'type'),
+    'article_additionnel': ('pointeurFragmentTexte', 'division', 'articleAdditionnel'),
+    'article99': ('article99',),
+}
+
+
+# Date de dépôt lue dans le contenu brut, avant tout décodage JSON
+DATE_DEPOT_RE = re.compile(rb'"dateDepot"\s*:\s*"(\d{4}-\d{2}-\d{2})')
+
+
+def extract_amendement_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un document amendement déjà décodé"""
+    return extract_fields(data.get('amendement', {}), AMENDEMENT_FIELDS)
+
+
+def extract_amendement_data(json_file: SourceFile) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un fichier amendement JSON"""
+    return extract_amendement_record(load_json(json_file))
+
+
+def extract_amendement_depuis(json_file: SourceFile, depuis: str) -> Optional[Dict[str, Any]]:
+    """
+    Extrait un amendement déposé le jour depuis (AAAA-MM-JJ) ou après, None sinon
+
+    La date de dépôt est d'abord cherchée dans le contenu brut : les amendements
+    plus anciens sont écartés sans décodage JSON.
+    """
+    raw = read_bytes(json_file)
+    match = DATE_DEPOT_RE.search(raw)
+    if match and match.group(1).decode('ascii') < depuis:
+        return None
+
+    record = extract_amendement_record(loads(raw))
+    date_depot = record['date_depot']
+    if not isinstance(date_depot, str) or date_depot[:10] < depuis:
+        return None
+    return record
+
+
+def normalize_amendements(input_dir: str, output_csv: str, limit: int = None, workers: int = 1,
+                          incremental: bool = False, dossiers: Optional[List[str]] = None,
+                          textes: Optional[List[str]] = None, depuis: Optional[str] = None,
+                          sqlite_db: Optional[str] = None):
     """
     Normalise les fichiers amendements vers un CSV
     
     Args:
-        input_dir: Dossier racine Amendements/
+        input_dir: Dossier racine Amendements/ (ou archive .zip, éventuellement suivie
+            d'un dossier interne : 'Amendements.json.zip/json')
         output_csv: Fichier CSV de sortie
         limit: Limite optionnelle du nombre d'amendements à traiter (pour tests)
+        workers: Nombre de processus pour l'extraction (1 = séquentiel)
+        incremental: Ne ré-extraire que les fichiers ajoutés ou modifiés depuis
+            la dernière exécution (voir manifest.py)
+        dossiers: Ne traiter que ces dossiers législatifs (ex. ['DLR5L17N50168']) ;
+            les autres sous-arborescences ne sont pas parcourues
+        textes: Ne traiter que ces textes (ex. ['PIONANR5L17B0482'])
+        depuis: Ne garder que les amendements déposés à cette date (AAAA-MM-JJ) ou après
+        sqlite_db: Base SQLite dans laquelle charger aussi les amendements et leurs
+            cosignataires (voir sqlite_store.py) ; ignoré pour une sélection filtrée
     """
     input_path = Path(input_dir)
+    filtered = bool(dossiers or textes or depuis)
     
-    if not input_path.exists():
-        print(f"Erreur: le dossier {input_dir} n'existe pas")
+    if (limit or filtered) and incremental:
+        print("Erreur: le mode incrémental ne peut pas être combiné avec limit ou des filtres")
         return
     
-    amendements = []
+    if depuis and not re.fullmatch(r'\d{4}-\d{2}-\d{2}', depuis):
+        print(f"Erreur: date invalide '{depuis}' (format attendu: AAAA-MM-JJ)")
+        return
     
-    # Parcourir récursivement tous les fichiers JSON
-    json_files = list(input_path.rglob('AMAN*.json'))
+    if not source_exists(input_dir):
+        print(f"Erreur: le dossier {input_dir} n'existe pas")
+        return
     
-    if limit:
-        json_files = json_files[:limit]
-        print(f"Mode TEST: traitement limité à {limit} amendements")
+    # Parcourir l'arborescence au fil de l'eau : l'extraction démarre sans attendre
+    # la fin du parcours, et le catalogue des fichiers est écrit au passage
+    # (sauf en mode test ou filtré, pour ne pas remplacer un catalogue complet)
+    with AtomicCsvWriter(str(catalog_path(output_csv)), CATALOG_COLUMNS) as catalog:
+        json_files = iter_cataloged_files(input_path, None if limit or filtered else catalog,
+                                          dossiers=dossiers, textes=textes)
+        extract_fn = partial(extract_amendement_depuis, depuis=depuis) if depuis else extract_amendement_data
+        
+        if limit:
+            json_files = islice(json_files, limit)
+            print(f"Mode TEST: traitement limité à {limit} amendements")
+        if dossiers:
+            print(f"Filtre dossiers: {', '.join(dossiers)}")
+        if textes:
+            print(f"Filtre textes: {', '.join(textes)}")
+        if depuis:
+            print(f"Filtre date de dépôt: à partir du {depuis}")
+        
+        print("Traitement des fichiers amendements (parcours en flux)...")
+        
+        if incremental:
+            count = normalize_incremental(json_files, input_dir, output_csv, extract_amendement_data,
+                                          key='amendement_uid', label='amendements', workers=workers,
+                                          columns=list(AMENDEMENT_FIELDS))
+        else:
+            # Extraction et écriture au fil de l'eau (mémoire constante)
+            rows = iter_rows(json_files, extract_fn, workers=workers, progress_every=1000)
+            count = write_csv_atomic(rows, output_csv)
+            
+            if count:
+                print(f"\n✓ {count} amendements exportés vers {output_csv}")
+            else:
+                print("Aucun amendement trouvé")
     
-    print(f"Traitement de {len(json_files)} fichiers amendements...")
+    if catalog.count:
+        print(f"✓ Catalogue de {catalog.count} fichiers: {catalog_path(output_csv)}")
     
-    for i, json_file in enumerate(json_files, 1):
-        try:
-            amendement_data = extract_amendement_data(json_file)
-            amendements.append(amendement_data)
-            
-            if i % 1000 == 0:
-                print(f"  Traité {i}/{len(json_files)} fichiers...")
-        except Exception as e:
-            print(f"Erreur avec {json_file.name}: {e}")
+    # Export typé (catégories, dates, entiers) pour les scripts de statistiques
+    if count:
+        export_parquet(output_csv, table='amendements')
     
-    # Écrire le CSV
-    if amendements:
-        output_path = Path(output_csv)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        fieldnames = amendements[0].keys()
-        with open(output_csv, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(amendements)
-        
-        print(f"\n✓ {len(amendements)} amendements exportés vers {output_csv}")
-    else:
-        print("Aucun amendement trouvé")
+    # Table amendement ↔ cosignataire (sauf pour une sélection filtrée)
+    if count and not filtered:
+        export_cosignataires(output_csv)
+    
+    # Chargement optionnel dans la base SQLite indexée (une sélection ne remplace pas la table complète)
+    if count and sqlite_db:
+        if filtered:
+            print("  (sélection filtrée: chargement SQLite ignoré)")
+        else:
+            load_sqlite(output_csv, sqlite_db, table='amendements')
+            if edges_path(output_csv).exists():
+                load_sqlite(edges_path(output_csv), sqlite_db, table='amendement_cosignataires')
 
 
 if __name__ == '__main__':
@@ -4,80 +4,96 @@ Normalisation des fichiers mandats JSON vers CSV
 Établit les relations entre acteurs et organes (qui fait partie de quoi, quand)
 """
 
-import json
-import csv
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 
+from json_backend import extract_fields, get_path, load_json
+from manifest import normalize_incremental
+from normalize_utils import iter_rows, write_csv_atomic
+from schema import export_parquet
+from sqlite_store import load_sqlite
+from sources import SourceFile, list_json_files, source_exists
 
-def extract_mandat_data(json_file: Path) -> Dict[str, Any]:
-    """Extrait les données pertinentes d'un fichier mandat JSON"""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    mandat = data.get('mandat', {})
-    infos_qualite = mandat.get('infosQualite', {})
-    organes = mandat.get('organes', {})
-    
-    # Gérer organeRef qui peut être une chaîne ou une liste
-    organe_ref = organes.get('organeRef', '')
+
+def _mandat_organe_uid(mandat: Dict[str, Any]) -> str:
+    """Organe du mandat (organeRef peut être une chaîne ou une liste)"""
+    organe_ref = get_path(mandat, ('organes', 'organeRef'))
     if isinstance(organe_ref, list):
         organe_ref = organe_ref[0] if organe_ref else ''
-    
-    return {
-        'mandat_uid': mandat.get('uid', ''),
-        'acteur_uid': mandat.get('acteurRef', ''),
-        'legislature': mandat.get('legislature', ''),
-        'type_organe': mandat.get('typeOrgane', ''),
-        'date_debut': mandat.get('dateDebut', ''),
-        'date_fin': mandat.get('dateFin', ''),
-        'date_publication': mandat.get('datePublication', ''),
-        'preseance': mandat.get('preseance', ''),
-        'nomin_principale': mandat.get('nominPrincipale', ''),
-        'code_qualite': infos_qualite.get('codeQualite', ''),
-        'lib_qualite': infos_qualite.get('libQualite', ''),
-        'lib_qualite_sex': infos_qualite.get('libQualiteSex', ''),
-        'organe_uid': organe_ref
-    }
+    return organe_ref
+
+
+# Colonnes du CSV → chemin dans l'objet 'mandat' (ou fonction de calcul)
+MANDAT_FIELDS = {
+    'mandat_uid': ('uid',),
+    'acteur_uid': ('acteurRef',),
+    'legislature': ('legislature',),
+    'type_organe': ('typeOrgane',),
+    'date_debut': ('dateDebut',),
+    'date_fin': ('dateFin',),
+    'date_publication': ('datePublication',),
+    'preseance': ('preseance',),
+    'nomin_principale': ('nominPrincipale',),
+    'code_qualite': ('infosQualite', 'codeQualite'),
+    'lib_qualite': ('infosQualite', 'libQualite'),
+    'lib_qualite_sex': ('infosQualite', 'libQualiteSex'),
+    'organe_uid': _mandat_organe_uid,
+}
+
+
+def extract_mandat_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un document mandat déjà décodé"""
+    return extract_fields(data.get('mandat', {}), MANDAT_FIELDS)
 
 
-def normalize_mandats(input_dir: str, output_csv: str):
-    """Normalise tous les fichiers mandats vers un CSV"""
-    input_path = Path(input_dir)
+def extract_mandat_data(json_file: SourceFile) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un fichier mandat JSON"""
+    return extract_mandat_record(load_json(json_file))
+
+
+def normalize_mandats(input_dir: str, output_csv: str, workers: int = 1, incremental: bool = False,
+                      sqlite_db: Optional[str] = None):
+    """
+    Normalise tous les fichiers mandats vers un CSV
     
-    if not input_path.exists():
+    Args:
+        input_dir: Dossier (ou dossier d'une archive .zip) contenant les fichiers mandats JSON
+        output_csv: Fichier CSV de sortie
+        workers: Nombre de processus pour l'extraction (1 = séquentiel)
+        incremental: Ne ré-extraire que les fichiers ajoutés ou modifiés depuis
+            la dernière exécution (voir manifest.py)
+        sqlite_db: Base SQLite dans laquelle charger aussi la table (voir sqlite_store.py)
+    """
+    if not source_exists(input_dir):
         print(f"Erreur: le dossier {input_dir} n'existe pas")
         return
     
-    mandats = []
-    json_files = list(input_path.glob('*.json'))
+    json_files = list_json_files(input_dir)
     
     print(f"Traitement de {len(json_files)} fichiers mandats...")
     
-    for i, json_file in enumerate(json_files, 1):
-        try:
-            mandat_data = extract_mandat_data(json_file)
-            mandats.append(mandat_data)
-            
-            if i % 500 == 0:
-                print(f"  Traité {i}/{len(json_files)} fichiers...")
-        except Exception as e:
-            print(f"Erreur avec {json_file.name}: {e}")
-    
-    # Écrire le CSV
-    if mandats:
-        output_path = Path(output_csv)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        fieldnames = mandats[0].keys()
-        with open(output_csv, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(mandats)
-        
-        print(f"\n✓ {len(mandats)} mandats exportés vers {output_csv}")
+    if incremental:
+        count = normalize_incremental(json_files, input_dir, output_csv, extract_mandat_data,
+                                      key='mandat_uid', label='mandats', workers=workers,
+                                      columns=list(MANDAT_FIELDS))
     else:
-        print("Aucun mandat trouvé")
+        # Extraction et écriture au fil de l'eau (mémoire constante)
+        rows = iter_rows(json_files, extract_mandat_data, workers=workers,
+                         progress_every=500, total=len(json_files))
+        count = write_csv_atomic(rows, output_csv)
+        
+        if count:
+            print(f"\n✓ {count} mandats exportés vers {output_csv}")
+        else:
+            print("Aucun mandat trouvé")
+    
+    # Export typé (catégories, dates, entiers) pour les scripts de statistiques
+    if count:
+        export_parquet(output_csv, table='mandats')
+    
+    # Chargement optionnel dans la base SQLite indexée
+    if count and sqlite_db:
+        load_sqlite(output_csv, sqlite_db, table='mandats')
 
 
 if __name__ == '__main__':
@@ -4,79 +4,91 @@ Normalisation des fichiers organes JSON vers CSV
 Extrait les groupes politiques, commissions, délégations, etc.
 """
 
-import json
-import csv
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 
+from json_backend import extract_fields, load_json
+from manifest import normalize_incremental
+from normalize_utils import iter_rows, write_csv_atomic
+from schema import export_parquet
+from sqlite_store import load_sqlite
+from sources import SourceFile, list_json_files, source_exists
 
-def extract_organe_data(json_file: Path) -> Dict[str, Any]:
+
+# Colonnes du CSV → chemin dans l'objet 'organe'
+ORGANE_FIELDS = {
+    'organe_uid': ('uid',),
+    'code_type': ('codeType',),
+    'libelle': ('libelle',),
+    'libelle_edition': ('libelleEdition',),
+    'libelle_abrege': ('libelleAbrege',),
+    'libelle_abrev': ('libelleAbrev',),
+    'date_debut': ('viMoDe', 'dateDebut'),
+    'date_fin': ('viMoDe', 'dateFin'),
+    'date_agrement': ('viMoDe', 'dateAgrement'),
+    'organe_parent': ('organeParent',),
+    'chambre': ('chambre',),
+    'regime': ('regime',),
+    'legislature': ('legislature',),
+    'regime_juridique': ('regimeJuridique',),
+    'site_internet': ('siteInternet',),
+    'nombre_reunions_annuelles': ('nombreReunionsAnnuelles',),
+}
+
+
+def extract_organe_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données pertinentes d'un document organe déjà décodé"""
+    return extract_fields(data.get('organe', {}), ORGANE_FIELDS)
+
+
+def extract_organe_data(json_file: SourceFile) -> Dict[str, Any]:
     """Extrait les données pertinentes d'un fichier organe JSON"""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    organe = data.get('organe', {})
-    
-    uid = organe.get('uid', '')
-    vim_ode = organe.get('viMoDe', {})
-    
-    return {
-        'organe_uid': uid,
-        'code_type': organe.get('codeType', ''),
-        'libelle': organe.get('libelle', ''),
-        'libelle_edition': organe.get('libelleEdition', ''),
-        'libelle_abrege': organe.get('libelleAbrege', ''),
-        'libelle_abrev': organe.get('libelleAbrev', ''),
-        'date_debut': vim_ode.get('dateDebut', ''),
-        'date_fin': vim_ode.get('dateFin', ''),
-        'date_agrement': vim_ode.get('dateAgrement', ''),
-        'organe_parent': organe.get('organeParent', ''),
-        'chambre': organe.get('chambre', ''),
-        'regime': organe.get('regime', ''),
-        'legislature': organe.get('legislature', ''),
-        'regime_juridique': organe.get('regimeJuridique', ''),
-        'site_internet': organe.get('siteInternet', ''),
-        'nombre_reunions_annuelles': organe.get('nombreReunionsAnnuelles', '')
-    }
+    return extract_organe_record(load_json(json_file))
 
 
-def normalize_organes(input_dir: str, output_csv: str):
-    """Normalise tous les fichiers organes vers un CSV"""
-    input_path = Path(input_dir)
+def normalize_organes(input_dir: str, output_csv: str, workers: int = 1, incremental: bool = False,
+                      sqlite_db: Optional[str] = None):
+    """
+    Normalise tous les fichiers organes vers un CSV
     
-    if not input_path.exists():
+    Args:
+        input_dir: Dossier (ou dossier d'une archive .zip) contenant les fichiers organes JSON
+        output_csv: Fichier CSV de sortie
+        workers: Nombre de processus pour l'extraction (1 = séquentiel)
+        incremental: Ne ré-extraire que les fichiers ajoutés ou modifiés depuis
+            la dernière exécution (voir manifest.py)
+        sqlite_db: Base SQLite dans laquelle charger aussi la table (voir sqlite_store.py)
+    """
+    if not source_exists(input_dir):
         print(f"Erreur: le dossier {input_dir} n'existe pas")
         return
     
-    organes = []
-    json_files = list(input_path.glob('*.json'))
+    json_files = list_json_files(input_dir)
     
     print(f"Traitement de {len(json_files)} fichiers organes...")
     
-    for i, json_file in enumerate(json_files, 1):
-        try:
-            organe_data = extract_organe_data(json_file)
-            organes.append(organe_data)
-            
-            if i % 100 == 0:
-                print(f"  Traité {i}/{len(json_files)} fichiers...")
-        except Exception as e:
-            print(f"Erreur avec {json_file.name}: {e}")
-    
-    # Écrire le CSV
-    if organes:
-        output_path = Path(output_csv)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        fieldnames = organes[0].keys()
-        with open(output_csv, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(organes)
-        
-        print(f"\n✓ {len(organes)} organes exportés vers {output_csv}")
+    if incremental:
+        count = normalize_incremental(json_files, input_dir, output_csv, extract_organe_data,
+                                      key='organe_uid', label='organes', workers=workers,
+                                      columns=list(ORGANE_FIELDS))
     else:
-        print("Aucun organe trouvé")
+        # Extraction et écriture au fil de l'eau (mémoire constante)
+        rows = iter_rows(json_files, extract_organe_data, workers=workers,
+                         progress_every=100, total=len(json_files))
+        count = write_csv_atomic(rows, output_csv)
+        
+        if count:
+            print(f"\n✓ {count} organes exportés vers {output_csv}")
+        else:
+            print("Aucun organe trouvé")
+    
+    # Export typé (catégories, dates, entiers) pour les scripts de statistiques
+    if count:
+        export_parquet(output_csv, table='organes')
+    
+    # Chargement optionnel dans la base SQLite indexée
+    if count and sqlite_db:
+        load_sqlite(output_csv, sqlite_db, table='organes')
 
 
 if __name__ == '__main__':
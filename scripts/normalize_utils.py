@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Utilitaires partagés par les scripts de normalisation
+Extraction parallèle des fichiers JSON par lots (pool de processus)
+et écriture des CSV au fil de l'eau avec remplacement atomique
+"""
+
+import csv
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+
+
+# Nombre de fichiers envoyés à un processus à la fois
+DEFAULT_BATCH_SIZE = 256
+
+# (fichier, données extraites ou None, message d'erreur ou None)
+Extraction = Tuple[Path, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _extract_one(extract_fn: Callable[[Path], Dict[str, Any]], json_file: Path) -> Extraction:
+    """Extrait un fichier en capturant l'erreur éventuelle"""
+    try:
+        return json_file, extract_fn(json_file), None
+    except Exception as e:
+        return json_file, None, str(e)
+
+
+def _extract_batch(extract_fn: Callable[[Path], Dict[str, Any]],
+                   json_files: List[Path]) -> Tuple[List[Extraction], Dict[str, List[float]]]:
+    """
+    Extrait un lot de fichiers (exécuté dans un processus du pool)
+
+    Renvoie aussi les sous-phases mesurées pendant le lot (vide sans --profile),
+    cumulées ensuite dans le processus principal ; celles héritées du processus
+    principal lors du fork sont d'abord écartées.
+    """
+    metrics.take_phases()
+    extractions = [_extract_one(extract_fn, json_file) for json_file in json_files]
+    return extractions, metrics.take_phases()
+
+
+def _batch_result(future) -> List[Extraction]:
+    """Résultats d'un lot, après report de ses mesures dans le processus principal"""
+    extractions, phases = future.result()
+    metrics.merge_phases(phases)
+    return extractions
+
+
+def _batched(items: Iterable[Path], batch_size: int) -> Iterator[List[Path]]:
+    """Découpe un itérable en lots de taille fixe"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_extractions(json_files: Iterable[Path], extract_fn: Callable[[Path], Dict[str, Any]],
+                     workers: int = 1, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Extraction]:
+    """
+    Applique extract_fn à chaque fichier et renvoie les résultats dans l'ordre d'entrée
+
+    Args:
+        json_files: Fichiers JSON à traiter
+        extract_fn: Fonction d'extraction (doit être définie au niveau d'un module)
+        workers: Nombre de processus (1 = traitement séquentiel dans le processus courant)
+        batch_size: Nombre de fichiers par lot envoyé à un processus
+
+    Les lots sont soumis au fur et à mesure (au plus 2 lots en attente par processus)
+    et leurs résultats sont restitués dans l'ordre de soumission : le CSV produit est
+    identique à celui du mode séquentiel.
+    """
+    if workers is None or workers <= 1:
+        for json_file in json_files:
+            yield _extract_one(extract_fn, json_file)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in _batched(json_files, batch_size):
+            pending.append(executor.submit(_extract_batch, extract_fn, batch))
+            if len(pending) >= 2 * workers:
+                yield from _batch_result(pending.popleft())
+        while pending:
+            yield from _batch_result(pending.popleft())
+
+
+def iter_rows(json_files: Iterable[Path], extract_fn: Callable[[Path], Dict[str, Any]],
+              workers: int = 1, progress_every: int = 1000, total: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Génère les lignes extraites une par une, en affichant erreurs et progression
+
+    Aucune liste n'est constituée : chaque ligne peut être écrite dès sa production.
+    Une fonction d'extraction peut renvoyer None pour écarter un fichier.
+    La progression affiche le débit en fichiers par seconde.
+    """
+    start = time.perf_counter()
+    extractions = iter_extractions(json_files, extract_fn, workers=workers)
+    for i, (json_file, data, erreur) in enumerate(extractions, 1):
+        metrics.count('fichiers')
+        if erreur:
+            metrics.count('erreurs')
+            print(f"Erreur avec {json_file.name}: {erreur}")
+            continue
+        
+        # None : fichier écarté par un filtre de l'extraction
+        if data is not None:
+            yield data
+        
+        if i % progress_every == 0:
+            suffix = f"/{total}" if total is not None else ""
+            rate = i / max(time.perf_counter() - start, 1e-9)
+            print(f"  Traité {i}{suffix} fichiers... ({rate:.0f} fichiers/s)")
+
+
+def current_umask() -> int:
+    """Renvoie le umask du processus (mkstemp crée les fichiers en 0600)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def files_signature(paths: Iterable[Path]) -> str:
+    """Taille et date de modification des fichiers dont dépend un cache"""
+    parts = []
+    for path in paths:
+        stat = Path(path).stat()
+        parts.append(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ';'.join(parts)
+
+
+def save_npz_atomic(path: Path, **arrays: np.ndarray):
+    """Écrit des tableaux NumPy (.npz) dans un fichier temporaire puis le renomme"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.chmod(tmp_name, 0o666 & ~current_umask())
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+class AtomicCsvWriter:
+    """
+    Écrit un CSV ligne par ligne dans un fichier temporaire, renommé à la sortie du bloc
+
+    Les colonnes sont celles de la première ligne (ou fieldnames). En cas d'exception,
+    ou si aucune ligne n'a été écrite, le fichier temporaire est supprimé et le CSV
+    existant reste intact ; avec allow_empty (et fieldnames), un CSV sans ligne
+    remplace le CSV existant par le seul en-tête.
+
+    Exemple:
+        with AtomicCsvWriter('data/csv/amendements.csv') as writer:
+            for row in rows:
+                writer.writerow(row)
+    """
+
+    def __init__(self, output_csv: str, fieldnames: Optional[List[str]] = None, allow_empty: bool = False):
+        self.output_path = Path(output_csv)
+        self.fieldnames = fieldnames
+        self.allow_empty = allow_empty and fieldnames is not None
+        self.count = 0
+        self._file = None
+        self._writer = None
+        self._tmp_name = None
+
+    def __enter__(self) -> 'AtomicCsvWriter':
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_name = tempfile.mkstemp(dir=self.output_path.parent,
+                                              prefix=f".{self.output_path.name}.", suffix='.tmp')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        return self
+
+    @metrics.phase('ecriture_csv')
+    def writerow(self, row: Dict[str, Any]):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames or list(row.keys()))
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            replace = exc_type is None and (self.count > 0 or self.allow_empty)
+            if replace:
+                if self._writer is None:
+                    csv.DictWriter(self._file, fieldnames=self.fieldnames).writeheader()
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            if replace:
+                os.chmod(self._tmp_name, 0o666 & ~current_umask())
+                os.replace(self._tmp_name, self.output_path)
+        finally:
+            if os.path.exists(self._tmp_name):
+                os.unlink(self._tmp_name)
+        return False
+
+
+def write_csv_atomic(rows: Iterable[Dict[str, Any]], output_csv: str) -> int:
+    """
+    Écrit les lignes dans un CSV au fur et à mesure de leur production
+
+    Les colonnes sont celles de la première ligne. Le fichier est d'abord écrit
+    dans un fichier temporaire du même dossier puis renommé : en cas d'interruption,
+    le CSV existant reste intact. Aucun fichier n'est créé si rows est vide.
+
+    Returns:
+        Nombre de lignes écrites
+    """
+    with AtomicCsvWriter(output_csv) as writer:
+        for row in rows:
+            writer.writerow(row)
+    return writer.count
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Magasin compacté des documents JSON bruts
+Concatène les milliers de petits fichiers JSON en quelques gros segments
+JSON-lines, avec un index uid → (segment, position, longueur) permettant
+de relire un document en un seul accès disque
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from json_backend import BACKEND, loads
+from normalize_utils import AtomicCsvWriter
+from scan_amendements import iter_amendement_files
+from sources import STORE_INDEX, STORE_INFO, SourceFile, list_json_files, read_bytes, source_exists
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Taille maximale d'un segment avant de passer au suivant
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024
+
+INDEX_COLUMNS = ['uid', 'segment', 'offset', 'length', 'source', 'hash']
+
+
+def _compact(document: Any) -> bytes:
+    """Sérialise un document sur une seule ligne"""
+    if BACKEND == 'orjson':
+        return orjson.dumps(document)
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def document_uid(document: Dict[str, Any]) -> str:
+    """uid d'un document AN ({'amendement': {'uid': ...}}, uid éventuellement {'#text': ...})"""
+    entity = next(iter(document.values()), {}) if document else {}
+    uid = entity.get('uid', '') if isinstance(entity, dict) else ''
+    return uid.get('#text', '') if isinstance(uid, dict) else uid
+
+
+def pack_sources(json_files: Iterable[SourceFile], input_dir: str, store_dir: str,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+    """
+    Compacte des fichiers JSON dans un magasin (segments JSON-lines + index)
+
+    Args:
+        json_files: Fichiers à compacter (dossier, archive ZIP...)
+        input_dir: Dossier source (les chemins d'origine enregistrés y sont relatifs)
+        store_dir: Dossier du magasin (remplacé s'il existe)
+        segment_size: Taille maximale d'un segment en octets
+
+    Les segments d'un compactage portent un numéro de génération : l'ancien
+    magasin reste lisible jusqu'au remplacement de son index, et ses segments
+    ne sont supprimés qu'ensuite. Un compactage interrompu laisse le magasin
+    précédent intact ; un compactage sans document donne un magasin vide.
+
+    Returns:
+        Nombre de documents compactés
+    """
+    root = Path(input_dir)
+    store_path = Path(store_dir)
+    store_path.mkdir(parents=True, exist_ok=True)
+    generation = _store_generation(store_path) + 1
+
+    segment_names = []
+    segment_file = None
+    offset = 0
+    try:
+        with AtomicCsvWriter(str(store_path / STORE_INDEX), INDEX_COLUMNS, allow_empty=True) as index:
+            for json_file in json_files:
+                try:
+                    document = loads(read_bytes(json_file))
+                    line = _compact(document)
+                except Exception as e:
+                    print(f"Erreur avec {json_file.name}: {e}")
+                    continue
+
+                if segment_file is None or offset + len(line) + 1 > segment_size:
+                    if segment_file is not None:
+                        segment_file.close()
+                    segment_name = f"segment-{generation:04d}-{len(segment_names):05d}.jsonl"
+                    segment_names.append(segment_name)
+                    segment_file = open(store_path / segment_name, 'wb')
+                    offset = 0
+
+                segment_file.write(line + b'\n')
+                index.writerow({
+                    'uid': document_uid(document),
+                    'segment': segment_name,
+                    'offset': offset,
+                    'length': len(line),
+                    'source': json_file.relative_to(root).as_posix(),
+                    'hash': hashlib.blake2b(line, digest_size=16).hexdigest(),
+                })
+                offset += len(line) + 1
+
+                if index.count % 10000 == 0:
+                    print(f"  Compacté {index.count} documents...")
+    finally:
+        if segment_file is not None:
+            segment_file.close()
+
+    info_tmp = store_path / f".{STORE_INFO}.tmp"
+    with open(info_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'source': str(input_dir), 'documents': index.count, 'segments': len(segment_names)}, f)
+    os.replace(info_tmp, store_path / STORE_INFO)
+
+    # Segments des compactages précédents (ou interrompus), plus référencés par l'index
+    for old_segment in store_path.glob('segment-*.jsonl'):
+        if old_segment.name not in segment_names:
+            old_segment.unlink()
+
+    print(f"✓ {index.count} documents compactés dans {store_dir} ({len(segment_names)} segment(s))")
+    return index.count
+
+
+def _store_generation(store_path: Path) -> int:
+    """
+    Plus grande génération des segments présents (0 sans segment ou pour les
+    segments d'avant les générations, segment-NNNNN.jsonl)
+    """
+    generations = [0]
+    for segment in store_path.glob('segment-*-*.jsonl'):
+        prefix = segment.name.split('-')[1]
+        if prefix.isdigit():
+            generations.append(int(prefix))
+    return max(generations)
+
+
+class PackedStore:
+    """
+    Accès direct aux documents d'un magasin compacté par uid
+
+    Exemple:
+        store = PackedStore('data/packed/amendement')
+        amendement = store.get('AMANR5L17PO849323B0482P0D1N000001')
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = Path(store_dir)
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        with open(self.store_dir / STORE_INDEX, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                self._index[row['uid']] = (row['segment'], int(row['offset']), int(row['length']))
+        self._fds: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._index
+
+    def get_raw(self, uid: str) -> Optional[bytes]:
+        """Ligne JSON brute d'un document (une seule lecture positionnée), None si absent"""
+        location = self._index.get(uid)
+        if location is None:
+            return None
+        segment, offset, length = location
+        fd = self._fds.get(segment)
+        if fd is None:
+            fd = self._fds[segment] = os.open(self.store_dir / segment, os.O_RDONLY)
+        return os.pread(fd, length, offset)
+
+    def get(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Document décodé, None si absent"""
+        raw = self.get_raw(uid)
+        return loads(raw) if raw is not None else None
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+def pack_all(deputes_dir: Path, amendements_dir: Path, packed_dir: Path,
+             segment_size: int = DEFAULT_SEGMENT_SIZE):
+    """Compacte acteurs, organes, mandats et amendements dans packed_dir/<type>"""
+    for kind in ['acteur', 'organe', 'mandat']:
+        input_dir = deputes_dir / kind
+        if not source_exists(input_dir):
+            print(f"Erreur: le dossier {input_dir} n'existe pas")
+            continue
+        print(f"\nCompactage des {kind}s...")
+        pack_sources(list_json_files(input_dir), str(input_dir), str(packed_dir / kind), segment_size)
+
+    if source_exists(amendements_dir):
+        print("\nCompactage des amendements...")
+        pack_sources(iter_amendement_files(amendements_dir), str(amendements_dir),
+                     str(packed_dir / 'amendement'), segment_size)
+    else:
+        print(f"Erreur: le dossier {amendements_dir} n'existe pas")
+
+
+if __name__ == '__main__':
+    base_dir = Path(__file__).parent.parent
+    packed_dir = base_dir / "data" / "packed"
+
+    parser = argparse.ArgumentParser(description="Magasin compacté des documents JSON bruts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = subparsers.add_parser('pack', help="Compacter les sources JSON dans data/packed/")
+    pack_parser.add_argument('--deputes', default=str(base_dir / "Députés et organes.json"),
+                             help="Dossier (ou archive) contenant acteur/, organe/ et mandat/")
+    pack_parser.add_argument('--amendements', default=str(base_dir / "Amendements"),
+                             help="Dossier (ou archive) des amendements")
+    pack_parser.add_argument('--segment-mo', type=int, default=DEFAULT_SEGMENT_SIZE // (1024 * 1024),
+                             help="Taille maximale d'un segment en Mo")
+
+    get_parser = subparsers.add_parser('get', help="Afficher le document JSON d'un uid")
+    get_parser.add_argument('uid')
+    get_parser.add_argument('--type', default='amendement', choices=['amendement', 'acteur', 'organe', 'mandat'])
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        pack_all(Path(args.deputes), Path(args.amendements), packed_dir, args.segment_mo * 1024 * 1024)
+        print(f"\nUtilisation: python scripts/run_normalization.py "
+              f"--deputes {packed_dir} --amendements {packed_dir / 'amendement'}")
+    else:
+        store = PackedStore(str(packed_dir / args.type))
+        document = store.get(args.uid)
+        if document is None:
+            print(f"Erreur: {args.uid} absent du magasin {packed_dir / args.type}")
+            sys.exit(1)
+        print(json.dumps(document, ensure_ascii=False, indent=2))
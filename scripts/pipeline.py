@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Pipeline complet : normalisation puis statistiques
+Chaque étape déclare ses entrées et ses sorties, dont se déduisent les
+dépendances ; les étapes indépendantes s'exécutent en parallèle, et une étape
+dont les sorties sont plus récentes que ses entrées et que son code est
+ignorée : relancer le pipeline sans changement ne recalcule rien
+"""
+
+import argparse
+import ast
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from apply_groupe_mapping import apply_manual_mapping
+from compute_depute_stats import compute_depute_stats
+from compute_groupe_stats import compute_groupe_stats
+from cosignatures import compute_groupe_affinity, edges_path
+from create_groupe_mapping import create_enhanced_groupe_mapping, create_groupe_mapping
+from cube import cached_cube, cube_path
+from dataset import StatsDataset
+from embedding import compute_nuage_deputes
+from normalize_acteurs import normalize_acteurs
+from normalize_amendements import normalize_amendements
+from normalize_mandats import normalize_mandats
+from normalize_organes import normalize_organes
+from reports import DEFAULT_REPORTS, run_reports
+from scan_amendements import catalog_path
+from schema import parquet_available, parquet_path
+from sources import source_mtime
+from timeseries import compute_timeseries
+
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# Nombre d'étapes exécutées en même temps (défaut de --jobs)
+DEFAULT_JOBS = 4
+
+
+class Stage(NamedTuple):
+    """Étape du pipeline"""
+    name: str
+    inputs: List[Path]          # fichiers ou dossiers sources lus
+    outputs: List[Path]         # fichiers écrits
+    run: Callable[[], Any]
+    modules: List[str]          # modules de scripts/ exécutés (leurs imports locaux sont suivis)
+    process: bool = False       # exécutée dans un processus séparé (extraction JSON, limitée par le GIL)
+
+
+@lru_cache(maxsize=None)
+def _imported_names(path: Path) -> FrozenSet[str]:
+    """Modules de premier niveau importés par un fichier source"""
+    names: Set[str] = set()
+    for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return frozenset(names)
+
+
+def local_modules(module: str) -> Set[str]:
+    """Module de scripts/ et modules de scripts/ qu'il importe, directement ou non"""
+    found: Set[str] = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = SCRIPTS_DIR / f"{name}.py"
+        if name in found or not path.exists():
+            continue
+        found.add(name)
+        pending.extend(_imported_names(path))
+    return found
+
+
+def code_mtime(modules: List[str]) -> float:
+    """Date de modification la plus récente du code d'une étape"""
+    names = set().union(*(local_modules(module) for module in modules))
+    return max(((SCRIPTS_DIR / f"{name}.py").stat().st_mtime for name in names), default=0.0)
+
+
+def stale_reason(stage: Stage) -> Optional[str]:
+    """Raison de réexécuter une étape, ou None si ses sorties sont à jour"""
+    for output in stage.outputs:
+        if not output.exists():
+            return f"{output.name} absent"
+    oldest = min((output.stat().st_mtime for output in stage.outputs), default=0.0)
+
+    for path in stage.inputs:
+        mtime = source_mtime(path)
+        if mtime == 0.0:
+            return f"entrée {path.name} absente"
+        if mtime > oldest:
+            return f"{path.name} modifié"
+    if code_mtime(stage.modules) > oldest:
+        return "code modifié"
+    return None
+
+
+def touch_outputs(stage: Stage, started: float):
+    """
+    Date les sorties non réécrites par l'étape (résultat inchangé, cache réutilisé)
+
+    Sans cela, une étape relancée après une modification de son code resterait
+    plus ancienne que ce code et serait réexécutée à chaque fois. Toutes les
+    sorties reçoivent la même date : un Parquet n'est pas plus ancien que son CSV.
+    """
+    now = time.time()
+    for output in stage.outputs:
+        if output.exists() and output.stat().st_mtime < started:
+            os.utime(output, (now, now))
+
+
+def stage_dependencies(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """Étapes dont dépend chaque étape : celles qui produisent ses entrées"""
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    return {
+        stage.name: {producers[path] for path in stage.inputs if producers.get(path, stage.name) != stage.name}
+        for stage in stages
+    }
+
+
+def select_stages(stages: List[Stage], targets: Optional[List[str]]) -> List[Stage]:
+    """Étapes demandées et toutes celles dont elles dépendent, dans l'ordre déclaré"""
+    if not targets:
+        return stages
+    dependencies = stage_dependencies(stages)
+    selected: Set[str] = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dependencies[name])
+    return [stage for stage in stages if stage.name in selected]
+
+
+def run_pipeline(stages: List[Stage], jobs: int = DEFAULT_JOBS, force: bool = False,
+                 dry_run: bool = False) -> bool:
+    """
+    Exécute les étapes dans l'ordre des dépendances, jusqu'à jobs à la fois
+
+    Une étape est lancée dès que les étapes dont elle dépend sont terminées ;
+    elle est ignorée si ses sorties sont à jour (sauf force ou étape amont
+    réexécutée). L'échec d'une étape n'interrompt que les étapes qui en dépendent.
+
+    Returns:
+        True si aucune étape n'a échoué
+    """
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    pending = [stage.name for stage in stages]
+    status: Dict[str, str] = {}
+    running = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as threads, ProcessPoolExecutor(max_workers=jobs) as processes:
+        while pending or running:
+            for name in list(pending):
+                if len(running) >= jobs:
+                    break
+                upstream = dependencies[name]
+                if any(up not in status for up in upstream):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+
+                failed = sorted(up for up in upstream if status[up] in ('échec', 'annulée'))
+                if failed:
+                    print(f"✗ {name}: annulée ({', '.join(failed)} en échec)")
+                    status[name] = 'annulée'
+                    continue
+
+                rerun = sorted(up for up in upstream if status[up] == 'exécutée')
+                reason = 'forcée' if force else (f"après {', '.join(rerun)}" if rerun else stale_reason(stage))
+                if reason is None:
+                    print(f"= {name}: à jour")
+                    status[name] = 'à jour'
+                    continue
+                if dry_run:
+                    print(f"▶ {name}: à exécuter ({reason})")
+                    status[name] = 'exécutée'
+                    continue
+
+                print(f"▶ {name} ({reason})...")
+                pool = processes if stage.process else threads
+                running[pool.submit(stage.run)] = (name, time.time(), time.perf_counter())
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, started, perf_started = running.pop(future)
+                stage = by_name[name]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Erreur: étape {name}: {type(e).__name__}: {e}")
+                    status[name] = 'échec'
+                    continue
+                missing = [output.name for output in stage.outputs if not output.exists()]
+                if missing:
+                    print(f"Erreur: étape {name}: {', '.join(missing)} non produit")
+                    status[name] = 'échec'
+                    continue
+                touch_outputs(stage, started)
+                print(f"✓ {name} terminée en {time.perf_counter() - perf_started:.1f} s")
+                status[name] = 'exécutée'
+
+    counts = {label: sum(1 for value in status.values() if value == label)
+              for label in ('exécutée', 'à jour', 'échec', 'annulée')}
+    verb = "à exécuter" if dry_run else "exécutées"
+    print(f"\n✓ {counts['exécutée']} étapes {verb}, {counts['à jour']} à jour, "
+          f"{counts['échec']} en échec, {counts['annulée']} annulées ({time.perf_counter() - start:.1f} s)")
+    return counts['échec'] == 0 and counts['annulée'] == 0
+
+
+def build_stages(base_dir: Path, workers: int = 1, incremental: bool = False,
+                 deputes_source: Optional[str] = None, amendements_source: Optional[str] = None) -> List[Stage]:
+    """
+    Étapes de run_normalization.py puis de run_statistics.py
+
+    Les normalisations s'exécutent dans des processus séparés ; les étapes de
+    statistiques partagent un même StatsDataset (tables chargées une seule fois)
+    et le cube d'agrégats, dans des threads.
+    """
+    deputes_dir = Path(deputes_source) if deputes_source else base_dir / "Députés et organes.json"
+    amendements_input = Path(amendements_source) if amendements_source else base_dir / "Amendements"
+    csv_dir = base_dir / "data" / "csv"
+    stats_dir = base_dir / "data" / "stats"
+    dataset = StatsDataset(csv_dir)
+
+    def table(name: str) -> Path:
+        return csv_dir / f"{name}.csv"
+
+    def normalized(name: str) -> List[Path]:
+        """CSV normalisé et son export Parquet (si pyarrow est installé)"""
+        return [table(name)] + ([parquet_path(str(table(name)))] if parquet_available() else [])
+
+    def stat(name: str) -> Path:
+        return stats_dir / f"{name}.csv"
+
+    def cube():
+        return dataset.result('cube', lambda: cached_cube(dataset.path('amendements'), dataset.mandats,
+                                                          amendements=dataset.amendements))
+
+    def stats_par_groupe():
+        return dataset.results.get('stats_par_groupe', str(stat('stats_par_groupe')))
+
+    def store(name: str, compute: Callable[[], Any]) -> Callable[[], None]:
+        """Étape dont le résultat est conservé pour les étapes suivantes"""
+        def run():
+            dataset.results[name] = compute()
+        return run
+
+    amendements_csv = table('amendements')
+    normalize = {'workers': workers, 'incremental': incremental}
+    stages = [
+        Stage('acteurs', [deputes_dir / "acteur"], normalized('acteurs'),
+              partial(normalize_acteurs, str(deputes_dir / "acteur"), str(table('acteurs')), **normalize),
+              ['normalize_acteurs'], process=True),
+        Stage('organes', [deputes_dir / "organe"], normalized('organes'),
+              partial(normalize_organes, str(deputes_dir / "organe"), str(table('organes')), **normalize),
+              ['normalize_organes'], process=True),
+        Stage('mandats', [deputes_dir / "mandat"], normalized('mandats'),
+              partial(normalize_mandats, str(deputes_dir / "mandat"), str(table('mandats')), **normalize),
+              ['normalize_mandats'], process=True),
+        Stage('amendements', [amendements_input],
+              normalized('amendements') + [catalog_path(str(amendements_csv)), edges_path(str(amendements_csv))],
+              partial(normalize_amendements, str(amendements_input), str(amendements_csv), **normalize),
+              ['normalize_amendements'], process=True),
+
+        Stage('cube', [amendements_csv, table('mandats')], [cube_path(amendements_csv)], cube, ['cube']),
+        Stage('stats_par_depute', [cube_path(amendements_csv), table('acteurs'), table('mandats')],
+              [stat('stats_par_depute')],
+              store('stats_par_depute', lambda: compute_depute_stats(
+                  cube(), dataset.acteurs, dataset.mandats, str(stat('stats_par_depute')))),
+              ['compute_depute_stats']),
+        Stage('stats_par_groupe', [cube_path(amendements_csv), table('organes'), table('mandats')],
+              [stat('stats_par_groupe')],
+              store('stats_par_groupe', lambda: compute_groupe_stats(
+                  cube(), dataset.organes, str(stat('stats_par_groupe')), dataset.mandats)),
+              ['compute_groupe_stats']),
+        Stage('rapports', [cube_path(amendements_csv), amendements_csv, catalog_path(str(amendements_csv)),
+                           table('acteurs'), table('organes'), table('mandats')],
+              [stat(name) for name in DEFAULT_REPORTS],
+              lambda: dataset.results.update(run_reports(dataset, DEFAULT_REPORTS, str(stats_dir))),
+              ['reports']),
+        Stage('activite_temporelle', [amendements_csv, table('mandats')], [stat('activite_temporelle')],
+              store('timeseries', lambda: compute_timeseries(
+                  dataset.amendements, dataset.mandats, str(stat('activite_temporelle')))),
+              ['timeseries']),
+        Stage('affinite_groupes', [amendements_csv, edges_path(str(amendements_csv)), table('mandats'),
+                                   table('organes')],
+              [stat('affinite_groupes')],
+              lambda: compute_groupe_affinity(str(amendements_csv), dataset.mandats, dataset.organes,
+                                              str(stat('affinite_groupes')), amendements=dataset.amendements_deputes),
+              ['cosignatures']),
+        Stage('nuage_deputes', [cube_path(amendements_csv), amendements_csv, edges_path(str(amendements_csv)),
+                                table('acteurs'), table('organes'), table('mandats')],
+              [stat('nuage_deputes')],
+              lambda: compute_nuage_deputes(str(amendements_csv), cube(), dataset.acteurs, dataset.mandats,
+                                            dataset.organes, str(stat('nuage_deputes')),
+                                            amendements=dataset.amendements_deputes),
+              ['embedding']),
+        Stage('groupes_mapping', [table('organes')], [table('groupes_politiques_mapping')],
+              lambda: create_groupe_mapping(dataset.organes, str(table('groupes_politiques_mapping'))),
+              ['create_groupe_mapping']),
+        Stage('stats_par_groupe_enrichi', [table('organes'), stat('stats_par_groupe')],
+              [stat('stats_par_groupe_enrichi')],
+              lambda: create_enhanced_groupe_mapping(dataset.organes, stats_par_groupe(),
+                                                     str(stat('stats_par_groupe_enrichi'))),
+              ['create_groupe_mapping']),
+    ]
+
+    # Correspondance manuelle des groupes, si le fichier est fourni
+    manual_csv = base_dir / "data" / "groupes_politiques_l17_manuel.csv"
+    if manual_csv.exists():
+        stages.append(Stage(
+            'stats_par_groupe_avec_noms', [stat('stats_par_groupe'), manual_csv, cube_path(amendements_csv)],
+            [stat('stats_par_groupe_avec_noms')],
+            lambda: apply_manual_mapping(stats_par_groupe(), str(manual_csv),
+                                         str(stat('stats_par_groupe_avec_noms')), cube=cube()),
+            ['apply_groupe_mapping']))
+    return stages
+
+
+def main():
+    """Exécute les étapes du pipeline qui ne sont pas à jour"""
+    parser = argparse.ArgumentParser(description="Pipeline complet : normalisation puis statistiques")
+    parser.add_argument('--etapes', nargs='+', metavar='ETAPE',
+                        help="Étapes à exécuter (avec celles dont elles dépendent ; défaut: toutes)")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f"Nombre d'étapes exécutées en parallèle (défaut: {DEFAULT_JOBS})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus de chaque normalisation (défaut: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Normalisation incrémentale (voir run_normalization.py)")
+    parser.add_argument('--deputes', metavar='SOURCE', help="Source des acteurs, organes et mandats")
+    parser.add_argument('--amendements', metavar='SOURCE', help="Source des amendements")
+    parser.add_argument('--forcer', action='store_true', help="Réexécuter les étapes même à jour")
+    parser.add_argument('--plan', action='store_true', help="Afficher les étapes à exécuter, sans les exécuter")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    stages = build_stages(base_dir, workers=args.workers, incremental=args.incremental,
+                          deputes_source=args.deputes, amendements_source=args.amendements)
+    unknown = sorted(set(args.etapes or []) - {stage.name for stage in stages})
+    if unknown:
+        print(f"Erreur: étapes inconnues: {', '.join(unknown)}")
+        print(f"Étapes: {', '.join(stage.name for stage in stages)}")
+        sys.exit(1)
+
+    ok = run_pipeline(select_stages(stages, args.etapes), jobs=max(1, args.jobs),
+                      force=args.forcer, dry_run=args.plan)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
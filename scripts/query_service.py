@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Service local de requêtes HTTP/JSON sur les tables normalisées
+Charge les tables une seule fois, construit des index de hachage (valeur →
+positions des lignes) sur les identifiants, répond aux recherches filtrées et
+aux petites agrégations en quelques millisecondes et garde en cache (LRU) les
+réponses récentes. Serveur de la bibliothèque standard (http.server)
+"""
+
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_MEASURES, cube_rows
+from dataset import as_table
+from reports import METRICS
+from sort_categories import CATEGORIE_COLONNES, SORT_CATEGORIES
+
+
+# Colonnes chargées et servies pour chaque table
+SERVED_COLUMNS: Dict[str, List[str]] = {
+    'amendements': ['amendement_uid', 'numero_long', 'texte_legislatif_ref', 'auteur_acteur_uid', 'auteur_type',
+                    'auteur_groupe_politique_uid', 'nb_cosignataires', 'date_depot', 'date_sort',
+                    'soumis_article40', 'sort', 'sort_categorie', 'article_designation_courte'],
+    'acteurs': ['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'profession_libelle'],
+    'organes': ['organe_uid', 'code_type', 'libelle', 'libelle_abrege', 'legislature', 'date_debut', 'date_fin'],
+    'mandats': ['mandat_uid', 'acteur_uid', 'organe_uid', 'type_organe', 'date_debut', 'date_fin', 'code_qualite'],
+}
+
+# Paramètre de filtre → colonne indexée (index de hachage) de chaque table
+INDEXES: Dict[str, Dict[str, str]] = {
+    'amendements': {'acteur_uid': 'auteur_acteur_uid', 'groupe_politique_uid': 'groupe_politique_uid',
+                    'texte_legislatif_ref': 'texte_legislatif_ref'},
+    'acteurs': {'acteur_uid': 'acteur_uid'},
+    'organes': {'organe_uid': 'organe_uid'},
+    'mandats': {'acteur_uid': 'acteur_uid', 'organe_uid': 'organe_uid'},
+}
+
+# Colonnes indexées calculées, absentes des lignes servies → colonne de cube.cube_rows.
+# Le groupe d'un amendement est celui de son auteur à la date de dépôt.
+DERIVED_COLUMNS: Dict[str, Dict[str, str]] = {
+    'amendements': {'groupe_politique_uid': 'groupe_uid'},
+}
+
+# Filtres d'égalité non indexés (appliqués aux lignes retenues par les index)
+FILTERS: Dict[str, List[str]] = {
+    'amendements': ['auteur_type', 'sort_categorie'],
+    'acteurs': [],
+    'organes': ['code_type', 'legislature'],
+    'mandats': ['type_organe'],
+}
+
+# Dimensions d'agrégation des amendements → colonne de cube.cube_rows
+AGGREGATION_KEYS = {
+    'acteur_uid': 'acteur_uid',
+    'groupe_politique_uid': 'groupe_uid',
+    'texte_legislatif_ref': 'texte_legislatif_ref',
+    'sort_categorie': 'sort_categorie',
+    'auteur_type': 'auteur_type',
+    'mois': 'mois',
+}
+
+# Métriques des agrégations (voir reports.METRICS)
+AGGREGATION_METRICS = ['nb_amendements_total',
+                       *[f"nb_amendements_{suffixe}" for suffixe in CATEGORIE_COLONNES.values()],
+                       'taux_adoption_pct', 'taux_rejet_pct', 'taux_irrecevable_pct',
+                       'moyenne_cosignataires', 'nb_amendements_article40', 'nb_auteurs']
+
+# Nombre de réponses gardées en cache, lignes renvoyées par défaut et au plus
+CACHE_SIZE = 1024
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+DEFAULT_PORT = 8765
+
+# Paramètres d'une requête, sous une forme hachable (clé du cache)
+Params = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+class QueryError(ValueError):
+    """Requête invalide (réponse HTTP 400)"""
+
+
+def build_index(values: pd.Series) -> Dict[Any, np.ndarray]:
+    """Index de hachage d'une colonne : valeur → positions (croissantes) des lignes"""
+    return values.groupby(values, observed=True, sort=False).indices
+
+
+def encode(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Codes entiers d'une colonne (-1 : valeur manquante) et valeurs triées correspondantes"""
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def freeze_params(params: Dict[str, List[str]]) -> Params:
+    """Paramètres d'URL triés : deux requêtes équivalentes partagent leur entrée de cache"""
+    return tuple(sorted((key, tuple(values)) for key, values in params.items()))
+
+
+def _int_param(params: Dict[str, Tuple[str, ...]], name: str, default: int, maximum: Optional[int] = None) -> int:
+    """Paramètre entier positif (limite, decalage)"""
+    if name not in params:
+        return default
+    try:
+        value = int(params[name][-1])
+    except ValueError:
+        raise QueryError(f"{name} doit être un entier")
+    if value < 0:
+        raise QueryError(f"{name} doit être positif")
+    return min(value, maximum) if maximum is not None else value
+
+
+class QueryEngine:
+    """
+    Tables normalisées en mémoire et index de hachage
+
+    Exemple:
+        engine = QueryEngine('data/csv')
+        status, body = engine.answer('/amendements', (('acteur_uid', ('PA1008',)),))
+    """
+
+    def __init__(self, csv_dir: Union[str, Path], cache_size: int = CACHE_SIZE):
+        start = time.perf_counter()
+        csv_dir = Path(csv_dir)
+        self.tables: Dict[str, pd.DataFrame] = {
+            name: as_table(csv_dir / f"{name}.csv", columns=columns, table=name)
+            for name, columns in SERVED_COLUMNS.items()
+        }
+
+        # Une ligne par amendement (mêmes positions) : dimensions et mesures des agrégations
+        self.rows = cube_rows(self.tables['amendements'], self.tables['mandats'])
+
+        self.indexes: Dict[str, Dict[str, Dict[Any, np.ndarray]]] = {
+            table: {name: build_index(self.column(table, column)) for name, column in indexes.items()}
+            for table, indexes in INDEXES.items()
+        }
+        # Filtres non indexés et dimensions d'agrégation comparés sur des codes entiers
+        self.filter_codes = {
+            table: {name: encode(self.tables[table][name]) for name in names}
+            for table, names in FILTERS.items()
+        }
+        self.key_codes = {key: encode(self.rows[column]) for key, column in AGGREGATION_KEYS.items()}
+        self.measures = {measure: self.rows[measure].to_numpy(dtype=np.int64) for measure in CUBE_MEASURES}
+        self.sort_codes = pd.Categorical(self.rows['sort_categorie'], categories=SORT_CATEGORIES).codes
+        self.answer = lru_cache(maxsize=cache_size)(self._answer)
+        self.load_seconds = time.perf_counter() - start
+
+    def column(self, table: str, column: str) -> pd.Series:
+        """Colonne d'une table servie, ou colonne calculée (DERIVED_COLUMNS) aux mêmes positions"""
+        derived = DERIVED_COLUMNS.get(table, {})
+        if column in derived:
+            return self.rows[derived[column]]
+        return self.tables[table][column]
+
+    def positions(self, table: str, params: Dict[str, Tuple[str, ...]]) -> Optional[np.ndarray]:
+        """
+        Positions des lignes de table retenues par les filtres (None : toutes)
+
+        Chaque paramètre répété est une alternative (acteur_uid=A&acteur_uid=B) ;
+        les paramètres différents se combinent. Les filtres indexés sont résolus
+        par les index (intersection des positions), les autres sur les seules
+        lignes retenues.
+        """
+        unknown = [name for name in params if name not in INDEXES[table] and name not in FILTERS[table]]
+        if unknown:
+            raise QueryError(f"filtre inconnu pour {table}: {', '.join(unknown)}")
+
+        positions = None
+        for name, column in INDEXES[table].items():
+            if name not in params:
+                continue
+            index = self.indexes[table][name]
+            found = [index[value] for value in params[name] if value in index]
+            matches = np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.intp)
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+
+        for name in FILTERS[table]:
+            if name not in params:
+                continue
+            codes, uniques = self.filter_codes[table][name]
+            if positions is None:
+                positions = np.arange(len(codes))
+            wanted = uniques.get_indexer(list(params[name]))
+            positions = positions[np.isin(codes[positions], wanted[wanted >= 0])]
+        return positions
+
+    def lookup(self, table: str, params: Dict[str, Tuple[str, ...]]) -> Dict[str, Any]:
+        """Lignes de table retenues par les filtres (pagination : limite, decalage)"""
+        limit = _int_param(params, 'limite', DEFAULT_LIMIT, MAX_LIMIT)
+        offset = _int_param(params, 'decalage', 0)
+        filters = {name: values for name, values in params.items() if name not in ('limite', 'decalage')}
+
+        frame = self.tables[table]
+        positions = self.positions(table, filters)
+        total = len(frame) if positions is None else len(positions)
+        page = frame.iloc[offset:offset + limit] if positions is None else frame.iloc[positions[offset:offset + limit]]
+        return {'total': total, 'lignes': json.loads(page.to_json(orient='records', date_format='iso', date_unit='s'))}
+
+    def aggregate(self, params: Dict[str, Tuple[str, ...]]) -> Dict[str, Any]:
+        """
+        Agrégation des amendements filtrés selon une ou plusieurs dimensions (par)
+
+        Les métriques sont celles des rapports (voir reports.METRICS).
+        """
+        keys = [key for values in params.get('par', ()) for key in values.split(',') if key]
+        if not keys:
+            raise QueryError(f"paramètre par requis ({', '.join(AGGREGATION_KEYS)})")
+        unknown = [key for key in keys if key not in AGGREGATION_KEYS]
+        if unknown:
+            raise QueryError(f"dimension inconnue: {', '.join(unknown)}")
+        limit = _int_param(params, 'limite', DEFAULT_LIMIT, MAX_LIMIT)
+        offset = _int_param(params, 'decalage', 0)
+        filters = {name: values for name, values in params.items() if name not in ('par', 'limite', 'decalage')}
+
+        positions = self.positions('amendements', filters)
+        if positions is None:
+            positions = np.arange(len(self.rows))
+        grouped = self.rollup(positions, keys)
+        if len(grouped) == 0:
+            return {'total': 0, 'lignes': []}
+
+        columns = {key: grouped[key] for key in keys}
+        columns.update({metric: METRICS[metric](grouped) for metric in AGGREGATION_METRICS})
+        result = pd.DataFrame(columns)
+        page = result.iloc[offset:offset + limit]
+        return {'total': len(result), 'lignes': json.loads(page.to_json(orient='records'))}
+
+    def rollup(self, positions: np.ndarray, keys: List[str]) -> pd.DataFrame:
+        """
+        Équivalent NumPy de cube.rollup sur les amendements aux positions données
+
+        Chaque combinaison de codes des dimensions est numérotée (base mixte),
+        puis les mesures, les catégories de sort et les auteurs distincts sont
+        comptés par np.bincount. Les lignes dont une dimension manque sont
+        ignorées ; les groupes sont triés par valeur des dimensions.
+        """
+        codes = [self.key_codes[key][0][positions] for key in keys]
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        positions = positions[valid]
+        sizes = [len(self.key_codes[key][1]) for key in keys]
+        group_ids = np.ravel_multi_index([c[valid] for c in codes], sizes)
+        groups, inverse = np.unique(group_ids, return_inverse=True)
+        n_groups = len(groups)
+
+        columns = {
+            key: self.key_codes[key][1].take(key_codes).to_numpy()
+            for key, key_codes in zip(keys, np.unravel_index(groups, sizes))
+        }
+        for measure in CUBE_MEASURES:
+            columns[measure] = np.bincount(inverse, weights=self.measures[measure][positions],
+                                           minlength=n_groups).astype(np.int64)
+
+        acteurs = self.key_codes['acteur_uid'][0][positions]
+        n_acteurs = len(self.key_codes['acteur_uid'][1])
+        pairs = np.unique(inverse[acteurs >= 0].astype(np.int64) * n_acteurs + acteurs[acteurs >= 0])
+        columns['nb_acteurs'] = np.bincount(pairs // n_acteurs, minlength=n_groups)
+
+        sorts = self.sort_codes[positions]
+        known = sorts >= 0
+        counts = np.bincount(inverse[known] * len(SORT_CATEGORIES) + sorts[known],
+                             minlength=n_groups * len(SORT_CATEGORIES)).reshape(n_groups, len(SORT_CATEGORIES))
+        for i, categorie in enumerate(SORT_CATEGORIES):
+            columns[f"nb_amendements_{CATEGORIE_COLONNES[categorie]}"] = counts[:, i]
+        return pd.DataFrame(columns)
+
+    def _answer(self, path: str, params: Params) -> Tuple[int, bytes]:
+        """Réponse (statut HTTP, corps JSON) à une requête ; mise en cache par answer"""
+        arguments = dict(params)
+        try:
+            if path == '/agregats':
+                payload = self.aggregate(arguments)
+            elif path.strip('/') in self.tables:
+                payload = self.lookup(path.strip('/'), arguments)
+            else:
+                return 404, _json({'erreur': f"chemin inconnu: {path}"})
+        except QueryError as e:
+            return 400, _json({'erreur': str(e)})
+        return 200, _json(payload)
+
+    def health(self) -> Dict[str, Any]:
+        """Taille des tables et des index, état du cache"""
+        cache = self.answer.cache_info()
+        return {
+            'lignes': {name: len(frame) for name, frame in self.tables.items()},
+            'index': {table: {name: len(index) for name, index in indexes.items()}
+                      for table, indexes in self.indexes.items()},
+            'cache': {'hits': cache.hits, 'misses': cache.misses, 'taille': cache.currsize, 'max': cache.maxsize},
+            'chargement_s': round(self.load_seconds, 2),
+        }
+
+
+def _json(payload: Any) -> bytes:
+    """Encode une réponse en JSON (UTF-8)"""
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Requêtes GET : /amendements, /acteurs, /organes, /mandats, /agregats, /sante"""
+
+    server_version = 'QueryService/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        engine: QueryEngine = self.server.engine
+        if url.path == '/sante':
+            status, body = 200, _json(engine.health())
+        else:
+            status, body = engine.answer(url.path, freeze_params(parse_qs(url.query)))
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(engine: QueryEngine, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """Serveur HTTP (un thread par requête) répondant avec engine ; port 0 : port libre"""
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.engine = engine
+    server.verbose = verbose
+    return server
+
+
+def main():
+    """Lance le service sur les CSV normalisés de data/csv"""
+    parser = argparse.ArgumentParser(description="Service local de requêtes sur les tables normalisées")
+    parser.add_argument('--hote', default='127.0.0.1', help="Adresse d'écoute (défaut: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (défaut: {DEFAULT_PORT})")
+    parser.add_argument('--cache', type=int, default=CACHE_SIZE,
+                        help=f"Nombre de réponses gardées en cache (défaut: {CACHE_SIZE})")
+    parser.add_argument('--verbeux', action='store_true', help="Journaliser chaque requête")
+    args = parser.parse_args()
+
+    csv_dir = Path(__file__).parent.parent / "data" / "csv"
+    missing = [name for name in SERVED_COLUMNS if not (csv_dir / f"{name}.csv").exists()]
+    if missing:
+        print(f"Erreur: {', '.join(f'{name}.csv' for name in missing)} non trouvé(s) dans {csv_dir}")
+        sys.exit(1)
+
+    engine = QueryEngine(csv_dir, cache_size=args.cache)
+    server = make_server(engine, args.hote, args.port, args.verbeux)
+    lignes = ', '.join(f"{count} {name}" for name, count in engine.health()['lignes'].items())
+    print(f"✓ Tables chargées et indexées en {engine.load_seconds:.1f} s ({lignes})")
+    print(f"✓ Service à l'écoute sur http://{args.hote}:{server.server_port} (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
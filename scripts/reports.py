@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Moteur de rapports statistiques déclaratifs
+Chaque rapport est un ensemble de dimensions de regroupement et de métriques ;
+tous les rapports demandés sont calculés en une seule passe sur les
+amendements (ou sur le cube d'agrégats s'il suffit), les regroupements
+intermédiaires étant partagés entre rapports
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from cube import CUBE_KEYS, aggregate, cached_cube, cube_rows, rollup
+from dataset import StatsDataset
+from groupes_temporels import build_group_index, latest_groups
+from scan_amendements import catalog_path, load_catalog
+from schema import consumer_columns
+from sort_categories import CATEGORIE_COLONNES
+
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'reports'
+
+# Nom des dimensions dans les fichiers produits
+KEY_COLUMNS = {'groupe_uid': 'groupe_politique_uid'}
+
+
+class Report(NamedTuple):
+    """
+    Rapport déclaratif, exporté dans <name>.csv
+
+    keys: dimensions de regroupement (voir cube.cube_rows)
+    metrics: colonnes calculées, dans l'ordre (voir METRICS)
+    deputes_only: ne retenir que les amendements déposés par des députés
+    labels: libellés joints aux lignes (voir LABELS)
+    columns: ordre final des colonnes (par défaut : clés, libellés, métriques)
+    """
+    name: str
+    keys: List[str]
+    metrics: List[str]
+    deputes_only: bool = False
+    labels: List[str] = []
+    columns: Optional[List[str]] = None
+
+
+def round2(values: pd.Series) -> pd.Series:
+    """Arrondi à 2 décimales avec round() (np.round peut différer au dernier chiffre)"""
+    return pd.Series([round(v, 2) for v in values], index=values.index, dtype='float64')
+
+
+def _taux(categorie: str) -> Callable[[pd.DataFrame], pd.Series]:
+    """Part (%) des amendements d'une catégorie de sort"""
+    column = f"nb_amendements_{CATEGORIE_COLONNES[categorie]}"
+    return lambda r: round2(r[column] / r['nb_amendements'] * 100)
+
+
+# Métriques calculées à partir d'un regroupement (voir cube.rollup)
+METRICS: Dict[str, Callable[[pd.DataFrame], pd.Series]] = {
+    'nb_amendements_total': lambda r: r['nb_amendements'],
+    'nb_deputes_actifs': lambda r: r['nb_acteurs'],
+    'nb_auteurs': lambda r: r['nb_acteurs'],
+    'nb_amendements_article40': lambda r: r['nb_article40'],
+    'taux_adoption_pct': _taux('adopté'),
+    'taux_rejet_pct': _taux('rejeté'),
+    'taux_irrecevable_pct': _taux('irrecevable'),
+    # Arrondi NumPy, comme lorsque chaque député était traité séparément
+    'moyenne_cosignataires': lambda r: (r['somme_cosignataires'].astype('float64') / r['nb_amendements']).round(2),
+    'moyenne_amendements_par_depute': lambda r: round2(r['nb_amendements'] / r['nb_acteurs']),
+}
+METRICS.update({
+    f"nb_amendements_{suffixe}": (lambda column: lambda r: r[column])(f"nb_amendements_{suffixe}")
+    for suffixe in CATEGORIE_COLONNES.values()
+})
+
+
+def _depute_labels(report: pd.DataFrame, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Groupe politique le plus récent (mandats GP) et identité de chaque député"""
+    groupes = latest_groups(build_group_index(tables['mandats']))
+    report['groupe_politique_uid'] = report['acteur_uid'].map(groupes).fillna('')
+    acteurs = tables['acteurs'][['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'profession_libelle']]
+    return report.merge(acteurs, on='acteur_uid', how='left')
+
+
+def _groupe_labels(report: pd.DataFrame, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Libellés du groupe politique (organes)"""
+    organes = tables['organes'][['organe_uid', 'libelle', 'libelle_abrege']]
+    report = report.merge(organes, left_on='groupe_politique_uid', right_on='organe_uid', how='left')
+    return report.drop(columns='organe_uid')
+
+
+# Libellés joints aux rapports, et tables nécessaires à chacun
+LABELS: Dict[str, Callable[[pd.DataFrame, Dict[str, pd.DataFrame]], pd.DataFrame]] = {
+    'depute': _depute_labels,
+    'groupe': _groupe_labels,
+}
+LABEL_TABLES: Dict[str, List[str]] = {
+    'depute': ['acteurs', 'mandats'],
+    'groupe': ['organes'],
+}
+
+_RATES = ['taux_adoption_pct', 'taux_rejet_pct', 'taux_irrecevable_pct']
+
+REPORTS: Dict[str, Report] = {report.name: report for report in [
+    Report(
+        name='stats_par_depute',
+        keys=['acteur_uid'],
+        metrics=['nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables',
+                 'nb_amendements_non_soutenus', 'nb_amendements_tombes',
+                 *_RATES, 'moyenne_cosignataires', 'nb_amendements_article40'],
+        deputes_only=True,
+        labels=['depute'],
+        columns=['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'groupe_politique_uid',
+                 'nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables',
+                 'nb_amendements_non_soutenus', 'nb_amendements_tombes',
+                 *_RATES, 'moyenne_cosignataires', 'nb_amendements_article40', 'profession_libelle'],
+    ),
+    Report(
+        name='stats_par_groupe',
+        keys=['groupe_uid'],
+        metrics=['nb_deputes_actifs', 'nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables',
+                 *_RATES, 'moyenne_amendements_par_depute', 'moyenne_cosignataires'],
+        deputes_only=True,
+        labels=['groupe'],
+        columns=['groupe_politique_uid', 'libelle', 'libelle_abrege', 'nb_deputes_actifs',
+                 'nb_amendements_total', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables',
+                 *_RATES, 'moyenne_amendements_par_depute', 'moyenne_cosignataires'],
+    ),
+    Report(
+        name='stats_par_texte',
+        keys=['texte_legislatif_ref'],
+        metrics=['nb_amendements_total', 'nb_auteurs', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables', *_RATES, 'moyenne_cosignataires'],
+    ),
+    Report(
+        name='stats_par_texte_groupe',
+        keys=['texte_legislatif_ref', 'groupe_uid'],
+        metrics=['nb_amendements_total', 'nb_deputes_actifs', 'nb_amendements_adoptes', 'taux_adoption_pct'],
+        deputes_only=True,
+        labels=['groupe'],
+    ),
+    Report(
+        name='stats_par_dossier',
+        keys=['dossier_ref'],
+        metrics=['nb_amendements_total', 'nb_auteurs', 'nb_amendements_adoptes', 'nb_amendements_rejetes',
+                 'nb_amendements_retires', 'nb_amendements_irrecevables', *_RATES, 'moyenne_cosignataires'],
+    ),
+    Report(
+        name='stats_par_dossier_groupe',
+        keys=['dossier_ref', 'groupe_uid'],
+        metrics=['nb_amendements_total', 'nb_deputes_actifs', 'nb_amendements_adoptes', 'taux_adoption_pct'],
+        deputes_only=True,
+        labels=['groupe'],
+    ),
+    Report(
+        name='stats_par_article',
+        keys=['texte_legislatif_ref', 'article_designation_courte'],
+        metrics=['nb_amendements_total', 'nb_auteurs', 'nb_amendements_adoptes', 'taux_adoption_pct'],
+    ),
+]}
+
+# Rapports calculés par run_statistics en plus des statistiques par député et par groupe
+DEFAULT_REPORTS = ['stats_par_texte', 'stats_par_texte_groupe', 'stats_par_dossier',
+                   'stats_par_dossier_groupe', 'stats_par_article']
+
+
+def finalize_report(report: Report, grouped: pd.DataFrame, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Métriques, libellés, ordre des colonnes et tri d'un rapport regroupé"""
+    result = pd.DataFrame({metric: METRICS[metric](grouped) for metric in report.metrics}, index=grouped.index)
+    result = result.reset_index().rename(columns=KEY_COLUMNS)
+    keys = [KEY_COLUMNS.get(key, key) for key in report.keys]
+    for key in keys:
+        result[key] = result[key].astype(str)
+
+    for label in report.labels:
+        result = LABELS[label](result, tables)
+
+    if report.columns is not None:
+        columns = report.columns
+    else:
+        labels = [col for col in result.columns if col not in keys and col not in report.metrics]
+        columns = keys + labels + report.metrics
+    return result[columns].sort_values('nb_amendements_total', ascending=False)
+
+
+def compute_reports(source: pd.DataFrame, reports: List[Report],
+                    tables: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Calcule plusieurs rapports en une seule passe sur source
+
+    source est une table issue de cube.cube_rows (une ligne par amendement) ou
+    un agrégat de mesures (dont le cube) contenant toutes les dimensions des
+    rapports. Une seule agrégation parcourt source ; chaque rapport est ensuite
+    le regroupement du plus petit agrégat intermédiaire déjà calculé qui
+    contient ses dimensions (ex. stats_par_texte à partir de texte × groupe).
+
+    tables fournit les tables de libellés (acteurs, mandats, organes).
+
+    Returns:
+        Un DataFrame par nom de rapport
+    """
+    tables = tables or {}
+    # Dimensions toujours conservées : acteurs distincts, catégorie de sort, type d'auteur
+    base_keys = ['auteur_type', 'acteur_uid', 'sort_categorie']
+
+    def dimensions(report: Report) -> frozenset:
+        return frozenset(report.keys) | frozenset(base_keys)
+
+    all_keys = frozenset().union(*(dimensions(report) for report in reports))
+    missing = all_keys - set(source.columns)
+    if missing:
+        raise ValueError(f"dimensions absentes de la source: {', '.join(sorted(missing))}")
+
+    # Passe unique sur la source, puis agrégats intermédiaires partagés
+    intermediates = {all_keys: aggregate(source, sorted(all_keys))}
+    results = {}
+    for report in sorted(reports, key=lambda r: -len(r.keys)):
+        keys = dimensions(report)
+        if keys not in intermediates:
+            parent = min((k for k in intermediates if keys <= k), key=lambda k: len(intermediates[k]))
+            intermediates[keys] = aggregate(intermediates[parent], sorted(keys))
+        cells = intermediates[keys]
+        if report.deputes_only:
+            cells = cells[cells['auteur_type'] == 'Député']
+        results[report.name] = finalize_report(report, rollup(cells, report.keys), tables)
+    return {report.name: results[report.name] for report in reports}
+
+
+def uses_cube(reports: List[Report]) -> bool:
+    """Indique si le cube d'agrégats contient toutes les dimensions des rapports"""
+    return set().union(*(report.keys for report in reports)) <= set(CUBE_KEYS)
+
+
+def report_source(dataset: StatsDataset, reports: List[Report]) -> pd.DataFrame:
+    """
+    Source la plus légère pour calculer les rapports
+
+    Le cube en cache suffit si toutes les dimensions en font partie ; sinon les
+    amendements sont lus une fois (avec le dossier de chaque amendement, d'après
+    le catalogue, si un rapport le demande).
+    """
+    if uses_cube(reports):
+        return cached_cube(dataset.path('amendements'), dataset.mandats)
+
+    dossiers = None
+    if any('dossier_ref' in report.keys for report in reports):
+        catalogue = load_catalog(str(catalog_path(str(dataset.path('amendements')))))
+        dossiers = catalogue.drop_duplicates('amendement_uid').set_index('amendement_uid')['dossier_ref']
+    amendements = dataset.amendements[consumer_columns(CONSUMER, 'amendements')]
+    return cube_rows(amendements, dataset.mandats, dossiers)
+
+
+def run_reports(dataset: StatsDataset, names: List[str], output_dir: str) -> Dict[str, pd.DataFrame]:
+    """Calcule les rapports demandés en une passe et les exporte dans output_dir/<nom>.csv"""
+    reports = [REPORTS[name] for name in names]
+
+    # Le dossier de chaque amendement vient du catalogue (écrit à la normalisation)
+    catalogue = catalog_path(str(dataset.path('amendements')))
+    if not catalogue.exists() and any('dossier_ref' in report.keys for report in reports):
+        print(f"  {catalogue.name} absent : rapports par dossier ignorés")
+        reports = [report for report in reports if 'dossier_ref' not in report.keys]
+        if not reports:
+            return {}
+
+    start = time.perf_counter()
+    source = report_source(dataset, reports)
+    source_label = 'cube' if uses_cube(reports) else 'amendements'
+
+    tables = {name: dataset.table(name) for report in reports
+              for label in report.labels for name in LABEL_TABLES[label]}
+    results = compute_reports(source, reports, tables)
+    elapsed = time.perf_counter() - start
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    for name, result in results.items():
+        result.to_csv(output_path / f"{name}.csv", index=False, encoding='utf-8')
+        print(f"✓ {name}.csv : {len(result)} lignes")
+
+    print(f"\n✓ {len(results)} rapports calculés en une passe ({source_label}) en {elapsed:.2f} s")
+    return results
+
+
+def main():
+    """Calcule des rapports choisis (par défaut ceux de DEFAULT_REPORTS)"""
+    parser = argparse.ArgumentParser(description="Rapports statistiques calculés en une seule passe")
+    parser.add_argument('--rapports', nargs='+', choices=sorted(REPORTS), default=DEFAULT_REPORTS,
+                        help="Rapports à calculer (défaut: par texte, par dossier et par article)")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    csv_dir = base_dir / "data" / "csv"
+    if not (csv_dir / "amendements.csv").exists():
+        print(f"Erreur: amendements.csv non trouvé dans {csv_dir}")
+        sys.exit(1)
+
+    run_reports(StatsDataset(csv_dir), args.rapports, str(base_dir / "data" / "stats"))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,60 +4,105 @@ Script principal pour normaliser toutes les données JSON vers CSV
 Exécute tous les scripts de normalisation dans le bon ordre
 """
 
+import argparse
 import sys
 from pathlib import Path
+from typing import List
 
 # Ajouter le dossier scripts au path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import metrics
 from normalize_acteurs import normalize_acteurs
 from normalize_organes import normalize_organes
 from normalize_mandats import normalize_mandats
 from normalize_amendements import normalize_amendements
+from sqlite_store import DATABASE_NAME
 
 
-def main():
-    """Exécute la normalisation complète de toutes les données"""
+def main(workers: int = 1, incremental: bool = False,
+         deputes_source: str = None, amendements_source: str = None,
+         dossiers: List[str] = None, textes: List[str] = None, depuis: str = None,
+         sqlite_db: str = None, profile: str = None, cprofile: bool = False):
+    """
+    Exécute la normalisation complète de toutes les données
+    
+    Args:
+        workers: Nombre de processus utilisés par chaque normalisation (1 = séquentiel)
+        incremental: Ne ré-extraire que les fichiers ajoutés ou modifiés depuis
+            la dernière exécution (manifeste conservé à côté de chaque CSV)
+        deputes_source: Dossier contenant acteur/, organe/ et mandat/ (par défaut
+            'Députés et organes.json'), ou dossier d'une archive : 'AMO10....json.zip/json'
+        amendements_source: Dossier Amendements/ ou archive 'Amendements.json.zip'
+        dossiers, textes, depuis: Filtres des amendements (codes DLR…, codes de texte,
+            date de dépôt minimale) ; la sélection est écrite dans amendements_selection.csv
+            et amendements.csv n'est pas modifié
+        sqlite_db: Base SQLite dans laquelle charger aussi les tables normalisées
+            (voir sqlite_store.py)
+        profile: Rapport JSON des mesures de chaque étape ('' = data/metrics/normalisation_<date>.json),
+            None = pas de mesures (voir metrics.py)
+        cprofile: Avec profile, enregistrer aussi le profil cProfile de l'étape la plus longue
+    """
     base_dir = Path(__file__).parent.parent
+    deputes_dir = Path(deputes_source) if deputes_source else base_dir / "Députés et organes.json"
+    amendements_input = Path(amendements_source) if amendements_source else base_dir / "Amendements"
+    if profile is not None:
+        metrics.enable(cprofile=cprofile)
     
     print("="*70)
     print("NORMALISATION DES DONNÉES PARLEMENTAIRES - LÉGISLATURE 17")
     print("="*70)
+    if workers > 1:
+        print(f"Extraction parallèle sur {workers} processus")
+    if incremental:
+        print("Mode incrémental: seuls les fichiers ajoutés, modifiés ou supprimés sont traités")
+    if sqlite_db:
+        print(f"Tables chargées aussi dans la base SQLite {sqlite_db}")
     print()
     
     # 1. Acteurs (députés)
     print("\n[1/4] Normalisation des acteurs (députés)...")
     print("-" * 70)
-    acteurs_input = base_dir / "Députés et organes.json" / "acteur"
+    acteurs_input = deputes_dir / "acteur"
     acteurs_output = base_dir / "data" / "csv" / "acteurs.csv"
-    normalize_acteurs(str(acteurs_input), str(acteurs_output))
+    with metrics.stage('acteurs'):
+        normalize_acteurs(str(acteurs_input), str(acteurs_output), workers=workers, incremental=incremental,
+                          sqlite_db=sqlite_db)
     
     # 2. Organes (groupes politiques, commissions)
     print("\n[2/4] Normalisation des organes (groupes, commissions)...")
     print("-" * 70)
-    organes_input = base_dir / "Députés et organes.json" / "organe"
+    organes_input = deputes_dir / "organe"
     organes_output = base_dir / "data" / "csv" / "organes.csv"
-    normalize_organes(str(organes_input), str(organes_output))
+    with metrics.stage('organes'):
+        normalize_organes(str(organes_input), str(organes_output), workers=workers, incremental=incremental,
+                          sqlite_db=sqlite_db)
     
     # 3. Mandats (relations acteur-organe)
     print("\n[3/4] Normalisation des mandats (relations)...")
     print("-" * 70)
-    mandats_input = base_dir / "Députés et organes.json" / "mandat"
+    mandats_input = deputes_dir / "mandat"
     mandats_output = base_dir / "data" / "csv" / "mandats.csv"
-    normalize_mandats(str(mandats_input), str(mandats_output))
+    with metrics.stage('mandats'):
+        normalize_mandats(str(mandats_input), str(mandats_output), workers=workers, incremental=incremental,
+                          sqlite_db=sqlite_db)
     
     # 4. Amendements
     print("\n[4/4] Normalisation des amendements...")
     print("-" * 70)
     print("⚠️  Cette étape peut prendre plusieurs minutes...")
-    amendements_input = base_dir / "Amendements"
     amendements_output = base_dir / "data" / "csv" / "amendements.csv"
+    if dossiers or textes or depuis:
+        amendements_output = base_dir / "data" / "csv" / "amendements_selection.csv"
     
     # Pour un test rapide, décommenter:
-    # normalize_amendements(str(amendements_input), str(amendements_output), limit=5000)
+    # normalize_amendements(str(amendements_input), str(amendements_output), limit=5000, workers=workers)
     
     # Pour traiter tous les amendements:
-    normalize_amendements(str(amendements_input), str(amendements_output))
+    with metrics.stage('amendements'):
+        normalize_amendements(str(amendements_input), str(amendements_output), workers=workers,
+                              incremental=incremental, dossiers=dossiers, textes=textes, depuis=depuis,
+                              sqlite_db=sqlite_db)
     
     print("\n" + "="*70)
     print("✓ NORMALISATION TERMINÉE")
@@ -68,9 +113,44 @@ def main():
     print("  - organes.csv      : Groupes politiques, commissions, délégations")
     print("  - mandats.csv      : Relations acteur ↔ organe (qui, où, quand)")
     print("  - amendements.csv  : Amendements avec métadonnées et sort")
+    if sqlite_db:
+        print(f"  - {Path(sqlite_db).name:<17}: Base SQLite indexée des tables ci-dessus")
     print("\nPrêt pour l'analyse statistique !")
     print()
+    
+    if profile is not None:
+        metrics.write_report(profile or str(metrics.report_path('normalisation')), 'run_normalization',
+                             {'workers': workers, 'incremental': incremental})
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Normalisation des données JSON vers CSV")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus pour l'extraction des fichiers JSON (défaut: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne ré-extraire que les fichiers ajoutés ou modifiés depuis la dernière exécution")
+    parser.add_argument('--deputes', metavar='SOURCE',
+                        help="Dossier contenant acteur/, organe/ et mandat/, éventuellement dans une "
+                             "archive ZIP (ex. AMO10_deputes_actifs_mandats_actifs_organes.json.zip/json)")
+    parser.add_argument('--amendements', metavar='SOURCE',
+                        help="Dossier Amendements/ ou archive ZIP (ex. Amendements.json.zip)")
+    parser.add_argument('--dossier', action='append', metavar='DLR...',
+                        help="Ne traiter que les amendements de ce dossier législatif (option répétable)")
+    parser.add_argument('--texte', action='append', metavar='PION...',
+                        help="Ne traiter que les amendements de ce texte (option répétable)")
+    parser.add_argument('--depuis', metavar='AAAA-MM-JJ',
+                        help="Ne garder que les amendements déposés à partir de cette date")
+    parser.add_argument('--sqlite', nargs='?', metavar='BASE',
+                        const=str(Path(__file__).parent.parent / "data" / "csv" / DATABASE_NAME),
+                        help=f"Charger aussi les tables dans une base SQLite indexée (défaut: data/csv/{DATABASE_NAME})")
+    parser.add_argument('--profile', nargs='?', const='', metavar='RAPPORT',
+                        help="Mesurer chaque étape (durées, débit, mémoire, erreurs) et écrire un rapport JSON "
+                             "(défaut: data/metrics/normalisation_<date>.json)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="Avec --profile, enregistrer le profil cProfile de l'étape la plus longue")
+    args = parser.parse_args()
+    
+    main(workers=args.workers, incremental=args.incremental,
+         deputes_source=args.deputes, amendements_source=args.amendements,
+         dossiers=args.dossier, textes=args.texte, depuis=args.depuis, sqlite_db=args.sqlite,
+         profile=args.profile, cprofile=args.cprofile)
@@ -1,21 +1,41 @@
 #!/usr/bin/env python3
 """
 Script principal pour calculer toutes les statistiques
-Exécute les analyses par député et par groupe politique
+Exécute les analyses par député et par groupe politique, puis les tables
+de correspondance des groupes, sur un jeu de données chargé une seule fois
 """
 
+import argparse
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+import metrics
+from apply_groupe_mapping import apply_manual_mapping
 from compute_depute_stats import compute_depute_stats
 from compute_groupe_stats import compute_groupe_stats
+from cosignatures import compute_groupe_affinity
+from cube import cached_cube
+from create_groupe_mapping import create_enhanced_groupe_mapping, create_groupe_mapping
+from dataset import StatsDataset
+from embedding import compute_nuage_deputes
+from reports import DEFAULT_REPORTS, run_reports
+from timeseries import compute_timeseries
 
 
-def main():
-    """Exécute le calcul complet des statistiques"""
+def main(profile: str = None, cprofile: bool = False):
+    """
+    Exécute le calcul complet des statistiques
+
+    Args:
+        profile: Rapport JSON des mesures de chaque étape ('' = data/metrics/statistiques_<date>.json),
+            None = pas de mesures (voir metrics.py)
+        cprofile: Avec profile, enregistrer aussi le profil cProfile de l'étape la plus longue
+    """
     base_dir = Path(__file__).parent.parent
+    if profile is not None:
+        metrics.enable(cprofile=cprofile)
     
     print("="*70)
     print("CALCUL DES STATISTIQUES PARLEMENTAIRES - LÉGISLATURE 17")
@@ -33,24 +53,106 @@ def main():
             print("  python scripts/run_normalization.py")
             return
     
-    # 1. Statistiques par député
-    print("\n[1/2] Calcul des statistiques par député...")
+    # Tables normalisées chargées une seule fois et partagées par toutes les étapes
+    dataset = StatsDataset(csv_dir)
+    stats_dir = base_dir / "data" / "stats"
+    
+    # 1. Cube d'agrégats (acteur × groupe × texte × sort × mois), relu depuis son cache s'il est à jour
+    print("\n[1/9] Construction du cube d'agrégats des amendements...")
+    print("-" * 70)
+    with metrics.stage('cube'):
+        dataset.results['cube'] = cached_cube(dataset.path('amendements'), dataset.mandats,
+                                              amendements=dataset.amendements)
+    
+    # 2. Statistiques par député (regroupement du cube)
+    print("\n[2/9] Calcul des statistiques par député...")
+    print("-" * 70)
+    with metrics.stage('stats_par_depute'):
+        dataset.results['stats_par_depute'] = compute_depute_stats(
+            dataset.results['cube'],
+            dataset.acteurs,
+            dataset.mandats,
+            str(stats_dir / "stats_par_depute.csv")
+        )
+    
+    # 3. Statistiques par groupe politique (regroupement du cube)
+    print("\n[3/9] Calcul des statistiques par groupe politique...")
     print("-" * 70)
-    compute_depute_stats(
-        str(csv_dir / "amendements.csv"),
-        str(csv_dir / "acteurs.csv"),
-        str(csv_dir / "mandats.csv"),
-        str(base_dir / "data" / "stats" / "stats_par_depute.csv")
-    )
-    
-    # 2. Statistiques par groupe politique
-    print("\n[2/2] Calcul des statistiques par groupe politique...")
+    with metrics.stage('stats_par_groupe'):
+        dataset.results['stats_par_groupe'] = compute_groupe_stats(
+            dataset.results['cube'],
+            dataset.organes,
+            str(stats_dir / "stats_par_groupe.csv"),
+            dataset.mandats
+        )
+    
+    # 4. Rapports par texte, par dossier législatif et par article (une seule passe)
+    print("\n[4/9] Calcul des rapports par texte, par dossier et par article...")
     print("-" * 70)
-    compute_groupe_stats(
-        str(csv_dir / "amendements.csv"),
-        str(csv_dir / "organes.csv"),
-        str(base_dir / "data" / "stats" / "stats_par_groupe.csv")
-    )
+    with metrics.stage('rapports'):
+        dataset.results.update(run_reports(dataset, DEFAULT_REPORTS, str(stats_dir)))
+    
+    # 5. Séries temporelles d'activité (semaines et mois) par député et par groupe
+    print("\n[5/9] Calcul des séries temporelles d'activité...")
+    print("-" * 70)
+    with metrics.stage('activite_temporelle'):
+        dataset.results['timeseries'] = compute_timeseries(
+            dataset.amendements,
+            dataset.mandats,
+            str(stats_dir / "activite_temporelle.csv")
+        )
+    
+    # 6. Affinité de co-signature entre groupes
+    print("\n[6/9] Calcul de l'affinité de co-signature entre groupes...")
+    print("-" * 70)
+    with metrics.stage('affinite_groupes'):
+        compute_groupe_affinity(
+            str(dataset.path('amendements')),
+            dataset.mandats,
+            dataset.organes,
+            str(stats_dir / "affinite_groupes.csv"),
+            amendements=dataset.amendements_deputes
+        )
+    
+    # 7. Correspondance code organe → nom du groupe, stats enrichies
+    print("\n[7/9] Création des tables de correspondance des groupes...")
+    print("-" * 70)
+    with metrics.stage('groupes_mapping'):
+        create_groupe_mapping(dataset.organes, str(csv_dir / "groupes_politiques_mapping.csv"))
+        create_enhanced_groupe_mapping(
+            dataset.organes,
+            dataset.results['stats_par_groupe'],
+            str(stats_dir / "stats_par_groupe_enrichi.csv")
+        )
+    
+    # 8. Correspondance manuelle (noms complets et familles politiques)
+    print("\n[8/9] Application de la correspondance manuelle des groupes...")
+    print("-" * 70)
+    manual_csv = base_dir / "data" / "groupes_politiques_l17_manuel.csv"
+    with metrics.stage('stats_par_groupe_avec_noms'):
+        if manual_csv.exists():
+            apply_manual_mapping(
+                dataset.results['stats_par_groupe'],
+                str(manual_csv),
+                str(stats_dir / "stats_par_groupe_avec_noms.csv"),
+                cube=dataset.results['cube']
+            )
+        else:
+            print(f"  {manual_csv.name} absent, étape ignorée")
+    
+    # 9. Nuage de points des députés (sorts, co-signatures, textes, groupe)
+    print("\n[9/9] Projection des députés en nuage de points...")
+    print("-" * 70)
+    with metrics.stage('nuage_deputes'):
+        dataset.results['nuage_deputes'] = compute_nuage_deputes(
+            str(dataset.path('amendements')),
+            dataset.results['cube'],
+            dataset.acteurs,
+            dataset.mandats,
+            dataset.organes,
+            str(stats_dir / "nuage_deputes.csv"),
+            amendements=dataset.amendements_deputes
+        )
     
     print("\n" + "="*70)
     print("✓ CALCUL DES STATISTIQUES TERMINÉ")
@@ -59,9 +161,28 @@ def main():
     print("\nFichiers créés:")
     print("  - stats_par_depute.csv : Statistiques individuelles par député")
     print("  - stats_par_groupe.csv : Statistiques agrégées par groupe politique")
+    print("  - stats_par_texte.csv, stats_par_dossier.csv : Volume et taux d'adoption par texte et par dossier")
+    print("  - stats_par_texte_groupe.csv, stats_par_dossier_groupe.csv : Répartition par groupe politique")
+    print("  - stats_par_article.csv : Volume et taux d'adoption par article")
+    print("  - activite_temporelle.csv : Activité hebdomadaire et mensuelle par député et par groupe")
+    print("  - affinite_groupes.csv : Co-signatures entre groupes politiques")
+    print("  - stats_par_groupe_enrichi.csv : Statistiques par groupe avec les noms des organes")
+    print("  - stats_par_groupe_avec_noms.csv : Statistiques par groupe avec noms complets et familles politiques")
+    print("  - nuage_deputes.csv : Coordonnées de chaque député dans le nuage de points (x, y, z)")
     print("\nCes fichiers sont prêts pour l'intégration dans vos algorithmes !")
     print()
+    
+    if profile is not None:
+        metrics.write_report(profile or str(metrics.report_path('statistiques')), 'run_statistics')
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Calcul des statistiques à partir des CSV normalisés")
+    parser.add_argument('--profile', nargs='?', const='', metavar='RAPPORT',
+                        help="Mesurer chaque étape (durées, chargement des tables, mémoire) et écrire un "
+                             "rapport JSON (défaut: data/metrics/statistiques_<date>.json)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="Avec --profile, enregistrer le profil cProfile de l'étape la plus longue")
+    args = parser.parse_args()
+    
+    main(profile=args.profile, cprofile=args.cprofile)
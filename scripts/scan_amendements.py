@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Parcours en flux de l'arborescence Amendements/ et catalogue des fichiers
+Décode les codes DLR / PION / AMAN des noms de dossiers et de fichiers
+(voir README) sans ouvrir aucun fichier
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, Optional
+
+import pandas as pd
+
+from normalize_utils import AtomicCsvWriter
+from sources import (SourceFile, is_packed_store, iter_packed_records, iter_zip_members,
+                     source_exists, split_zip_path)
+
+
+# DLR5L17N50168 : dossier législatif
+DOSSIER_RE = re.compile(r'^DLR5L(?P<legislature>\d+)N(?P<numero>\d+)$')
+
+# PIONANR5L17B0482 / PIONANR5L17BTC0556 : texte examiné
+TEXTE_RE = re.compile(r'^(?P<type>[A-Z]{4})ANR5L(?P<legislature>\d+)B(?P<commission>TC)?(?P<numero>\d+)$')
+
+# AMANR5L17PO849323B0482P0D1N000001.json : amendement
+AMENDEMENT_RE = re.compile(
+    r'^AMANR5L(?P<legislature>\d+)PO(?P<po>\d+)B(?P<texte>\w+?)P(?P<phase>\d+)D(?P<discussion>\d+)N(?P<numero>\d+)\.json$'
+)
+
+CATALOG_COLUMNS = [
+    'amendement_uid', 'chemin',
+    'dossier_ref', 'dossier_legislature', 'dossier_numero',
+    'texte_ref', 'texte_type', 'texte_legislature', 'texte_numero', 'texte_commission',
+    'legislature', 'examen_po', 'texte_bulletin', 'phase', 'discussion', 'numero',
+]
+
+
+def keep_directory(name: str, dossiers: Optional[Collection[str]] = None,
+                   textes: Optional[Collection[str]] = None) -> bool:
+    """
+    Indique si un dossier de l'arborescence doit être parcouru
+
+    Un dossier DLR… (ou un dossier de texte PION…/PRJL…) absent du filtre
+    correspondant est écarté avec tout son contenu ; sans filtre, tout est parcouru.
+    """
+    if dossiers and name.startswith('DLR'):
+        return name in dossiers
+    if textes and TEXTE_RE.match(name):
+        return name in textes
+    return True
+
+
+def iter_amendement_files(root: Path, dossiers: Optional[Collection[str]] = None,
+                          textes: Optional[Collection[str]] = None) -> Iterator[SourceFile]:
+    """
+    Génère les fichiers AMAN*.json au fil du parcours (os.scandir)
+
+    Chaque dossier est lu une seule fois et ses entrées sont triées par nom :
+    l'ordre est déterministe et les premiers fichiers sont disponibles avant
+    la fin du parcours. Pour une archive ZIP (ou un magasin compacté), les
+    documents sont générés dans l'ordre de l'archive (ou des segments).
+
+    Args:
+        root: Dossier Amendements/, archive ZIP ou magasin compacté
+        dossiers: Codes DLR… à retenir (les autres sous-arborescences ne sont pas lues)
+        textes: Codes de texte PION…/PRJL… à retenir
+    """
+    if is_packed_store(root) or split_zip_path(root) is not None:
+        if is_packed_store(root):
+            files = iter_packed_records(root)
+        else:
+            files = iter_zip_members(root, name_prefix='AMAN')
+        for json_file in files:
+            parents = json_file.relative_to(root).parts[:-1]
+            if all(keep_directory(part, dossiers, textes) for part in parents):
+                yield json_file
+        return
+
+    stack = [Path(root)]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if keep_directory(entry.name, dossiers, textes):
+                    subdirs.append(Path(entry.path))
+            elif entry.name.startswith('AMAN') and entry.name.endswith('.json'):
+                yield Path(entry.path)
+
+        # Pile : inverser pour visiter les sous-dossiers dans l'ordre alphabétique
+        stack.extend(reversed(subdirs))
+
+
+def parse_amendement_path(json_file: SourceFile, root: Path) -> Dict[str, Any]:
+    """Décode les codes du chemin d'un fichier amendement (aucune lecture du fichier)"""
+    rel = json_file.relative_to(root)
+    parents = rel.parts[:-1]
+    dossier_ref = next((p for p in parents if p.startswith('DLR')), '')
+    texte_ref = parents[-1] if parents and not parents[-1].startswith('DLR') else ''
+
+    dossier = DOSSIER_RE.match(dossier_ref)
+    texte = TEXTE_RE.match(texte_ref)
+    amendement = AMENDEMENT_RE.match(json_file.name)
+
+    return {
+        'amendement_uid': json_file.stem,
+        'chemin': rel.as_posix(),
+        'dossier_ref': dossier_ref,
+        'dossier_legislature': dossier['legislature'] if dossier else '',
+        'dossier_numero': dossier['numero'] if dossier else '',
+        'texte_ref': texte_ref,
+        'texte_type': texte['type'] if texte else '',
+        'texte_legislature': texte['legislature'] if texte else '',
+        'texte_numero': texte['numero'] if texte else '',
+        'texte_commission': bool(texte and texte['commission']),
+        'legislature': amendement['legislature'] if amendement else '',
+        'examen_po': f"PO{amendement['po']}" if amendement else '',
+        'texte_bulletin': amendement['texte'] if amendement else '',
+        'phase': amendement['phase'] if amendement else '',
+        'discussion': amendement['discussion'] if amendement else '',
+        'numero': amendement['numero'] if amendement else '',
+    }
+
+
+def catalog_path(output_csv: str) -> Path:
+    """Chemin du catalogue associé au CSV des amendements (catalogue_<nom du CSV>.csv)"""
+    output_path = Path(output_csv)
+    return output_path.with_name(f"catalogue_{output_path.stem}.csv")
+
+
+def iter_cataloged_files(root: Path, writer: Optional[AtomicCsvWriter],
+                         dossiers: Optional[Collection[str]] = None,
+                         textes: Optional[Collection[str]] = None) -> Iterator[SourceFile]:
+    """Génère les fichiers amendements en ajoutant chacun au catalogue (si writer est fourni)"""
+    for json_file in iter_amendement_files(root, dossiers, textes):
+        if writer is not None:
+            writer.writerow(parse_amendement_path(json_file, root))
+        yield json_file
+
+
+def build_catalog(input_dir: str, output_csv: str) -> int:
+    """
+    Construit le catalogue des amendements par simple parcours de l'arborescence
+
+    Returns:
+        Nombre de fichiers catalogués
+    """
+    root = Path(input_dir)
+    with AtomicCsvWriter(output_csv, CATALOG_COLUMNS) as writer:
+        for _ in iter_cataloged_files(root, writer):
+            if writer.count % 10000 == 0:
+                print(f"  Catalogué {writer.count} fichiers...")
+    print(f"\n✓ {writer.count} fichiers catalogués dans {output_csv}")
+    return writer.count
+
+
+def load_catalog(catalog_csv: str) -> pd.DataFrame:
+    """Charge le catalogue (toutes les colonnes en chaînes sauf texte_commission)"""
+    catalog = pd.read_csv(catalog_csv, dtype=str, keep_default_na=False)
+    catalog['texte_commission'] = catalog['texte_commission'] == 'True'
+    return catalog
+
+
+def catalog_counts(catalog_csv: str, by: str = 'dossier_ref') -> pd.Series:
+    """Nombre d'amendements par dossier (ou par texte avec by='texte_ref'), sans parcours"""
+    return load_catalog(catalog_csv).groupby(by).size().sort_values(ascending=False)
+
+
+if __name__ == '__main__':
+    base_dir = Path(__file__).parent.parent
+    input_dir = base_dir / "Amendements"
+    output_csv = catalog_path(base_dir / "data" / "csv" / "amendements.csv")
+
+    if not source_exists(input_dir):
+        print(f"Erreur: le dossier {input_dir} n'existe pas")
+        sys.exit(1)
+
+    build_catalog(str(input_dir), str(output_csv))
+
+    print("\nAmendements par dossier législatif (10 premiers):")
+    print(catalog_counts(str(output_csv)).head(10).to_string())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Schéma typé des tables normalisées
+Décrit le type des colonnes (catégories, dates, booléens, entiers) et les
+colonnes lues par chaque script de statistiques, exporte chaque CSV en
+Parquet et charge les tables typées avec projection de colonnes
+"""
+
+import os
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import metrics
+from normalize_utils import current_umask
+
+
+# Colonnes typées de chaque table ; les autres colonnes restent des chaînes
+TABLE_SCHEMAS: Dict[str, Dict[str, List[str]]] = {
+    'acteurs': {
+        'categories': ['civilite', 'pays_naissance', 'departement_naissance', 'profession_libelle'],
+        'dates': ['date_naissance', 'date_deces'],
+        'booleans': [],
+        'integers': [],
+    },
+    'organes': {
+        'categories': ['code_type', 'chambre', 'regime', 'legislature', 'regime_juridique'],
+        'dates': ['date_debut', 'date_fin', 'date_agrement'],
+        'booleans': [],
+        'integers': [],
+    },
+    'mandats': {
+        'categories': ['legislature', 'type_organe', 'preseance', 'nomin_principale',
+                       'code_qualite', 'lib_qualite', 'lib_qualite_sex'],
+        'dates': ['date_debut', 'date_fin', 'date_publication'],
+        'booleans': [],
+        'integers': [],
+    },
+    'amendements': {
+        'categories': ['legislature', 'prefixe_organe_examen', 'auteur_type', 'etat_code', 'etat_libelle',
+                       'sous_etat_code', 'sous_etat_libelle', 'sort', 'sort_categorie', 'division_type'],
+        'dates': ['date_depot', 'date_publication', 'date_sort'],
+        'booleans': ['soumis_article40', 'article_additionnel', 'article99'],
+        'integers': ['nb_cosignataires'],
+    },
+}
+
+_UNTYPED = {'categories': [], 'dates': [], 'booleans': [], 'integers': []}
+
+# Colonnes des mandats utilisées pour l'appartenance aux groupes (groupes_temporels.py)
+GROUP_MANDAT_COLUMNS = ['acteur_uid', 'organe_uid', 'type_organe', 'date_debut', 'date_fin']
+
+# Colonnes minimales lues par chaque consommateur dans chaque table : seules
+# celles-ci sont chargées (projection Parquet ou usecols du CSV). Les
+# statistiques par député et par groupe lisent les amendements via le cube.
+CONSUMER_COLUMNS: Dict[str, Dict[str, List[str]]] = {
+    'cube': {
+        'amendements': ['amendement_uid', 'auteur_acteur_uid', 'auteur_type', 'auteur_groupe_politique_uid', 'texte_legislatif_ref',
+                        'sort_categorie', 'nb_cosignataires', 'soumis_article40', 'date_depot'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'reports': {
+        'amendements': ['amendement_uid', 'auteur_acteur_uid', 'auteur_type', 'auteur_groupe_politique_uid',
+                        'texte_legislatif_ref', 'article_designation_courte', 'sort_categorie', 'nb_cosignataires',
+                        'soumis_article40', 'date_depot'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'compute_depute_stats': {
+        'acteurs': ['acteur_uid', 'civilite', 'prenom', 'nom', 'trigramme', 'profession_libelle'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'compute_groupe_stats': {
+        'organes': ['organe_uid', 'libelle', 'libelle_abrege'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'cosignatures': {
+        'amendements': ['amendement_uid', 'auteur_acteur_uid', 'auteur_type'],
+        'organes': ['organe_uid', 'libelle_abrege'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'create_groupe_mapping': {
+        'organes': ['organe_uid', 'code_type', 'libelle', 'libelle_abrege', 'legislature', 'date_debut', 'date_fin'],
+    },
+    'groupes_temporels': {
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'timeseries': {
+        'amendements': ['auteur_acteur_uid', 'auteur_type', 'auteur_groupe_politique_uid', 'sort_categorie',
+                        'date_depot', 'date_publication', 'date_sort'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+    'embedding': {
+        'acteurs': ['acteur_uid', 'prenom', 'nom'],
+        'organes': ['organe_uid', 'libelle_abrege'],
+        'mandats': GROUP_MANDAT_COLUMNS,
+    },
+}
+
+# Nombre de lignes converties à la fois lors de l'export Parquet
+PARQUET_CHUNKSIZE = 50_000
+
+
+def consumer_columns(consumer: str, table: str) -> List[str]:
+    """Colonnes de table lues par consumer (voir CONSUMER_COLUMNS)"""
+    return list(CONSUMER_COLUMNS[consumer][table])
+
+
+def combined_columns(table: str, consumers: Optional[List[str]] = None) -> List[str]:
+    """
+    Union ordonnée des colonnes de table lues par plusieurs consommateurs
+
+    Sert à charger une seule fois une table partagée par plusieurs étapes
+    (par défaut : tous les consommateurs de CONSUMER_COLUMNS).
+    """
+    columns: List[str] = []
+    for consumer in consumers or list(CONSUMER_COLUMNS):
+        for col in CONSUMER_COLUMNS[consumer].get(table, []):
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def parquet_available() -> bool:
+    """Indique si pyarrow (dépendance optionnelle) est installé"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def table_name(csv_path: str) -> str:
+    """Nom de la table correspondant à un CSV (ex. data/csv/amendements.csv → amendements)"""
+    return Path(csv_path).stem
+
+
+def parquet_path(csv_path: str) -> Path:
+    """Chemin du fichier Parquet associé à un CSV"""
+    return Path(csv_path).with_suffix('.parquet')
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Convertit des dates ISO 8601 en datetime naïf (heure locale de l'Assemblée)
+
+    Les décalages horaires (+01:00 / +02:00) sont ignorés pour que les dates
+    seules ('2024-10-08') ne soient pas décalées au jour précédent en UTC.
+    """
+    return pd.to_datetime(values.str.slice(0, 19), format='ISO8601', errors='coerce')
+
+
+def csv_dtypes(table: str) -> Dict[str, str]:
+    """
+    Types passés à pd.read_csv pour lire un CSV normalisé
+
+    Les colonnes catégorielles (et booléennes, à deux valeurs) sont encodées
+    dès la lecture : aucune colonne de chaînes intermédiaire n'est créée.
+    """
+    schema = TABLE_SCHEMAS.get(table, _UNTYPED)
+    return defaultdict(lambda: 'str', {col: 'category' for col in schema['categories'] + schema['booleans']})
+
+
+def cast_columns(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Applique le schéma d'une table à un DataFrame lu depuis le CSV (voir csv_dtypes)"""
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return df
+
+    for col in schema['categories']:
+        if col in df.columns:
+            values = df[col].astype('category')
+            # Catégories en chaînes, y compris pour une colonne entièrement vide
+            df[col] = values.cat.set_categories(values.cat.categories.astype('str'))
+    for col in schema['dates']:
+        if col in df.columns:
+            df[col] = _parse_dates(df[col])
+    for col in schema['booleans']:
+        if col in df.columns:
+            df[col] = df[col].str.lower().map({'true': True, 'false': False}).astype('boolean')
+    for col in schema['integers']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int32')
+    return df
+
+
+def _arrow_schema(columns: List[str], table: str):
+    """Schéma pyarrow d'une table (catégories encodées en dictionnaire)"""
+    import pyarrow as pa
+
+    schema = TABLE_SCHEMAS.get(table, _UNTYPED)
+    fields = []
+    for col in columns:
+        if col in schema['categories']:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif col in schema['dates']:
+            arrow_type = pa.timestamp('us')
+        elif col in schema['booleans']:
+            arrow_type = pa.bool_()
+        elif col in schema['integers']:
+            arrow_type = pa.int32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col, arrow_type))
+    return pa.schema(fields)
+
+
+def export_parquet(csv_path: str, table: Optional[str] = None) -> Optional[Path]:
+    """
+    Exporte un CSV normalisé en Parquet typé (même nom, extension .parquet)
+
+    table désigne l'entrée de TABLE_SCHEMAS à appliquer (par défaut le nom du CSV).
+
+    Le CSV est converti par blocs de PARQUET_CHUNKSIZE lignes : la mémoire reste
+    bornée. Le fichier est écrit dans un fichier temporaire puis renommé.
+    Ne fait rien (et renvoie None) si pyarrow n'est pas installé.
+    """
+    if not parquet_available():
+        print("  (pyarrow non installé: export Parquet ignoré)")
+        return None
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = table or table_name(csv_path)
+    output_path = parquet_path(csv_path)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix='.tmp')
+    os.close(fd)
+
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=str, chunksize=PARQUET_CHUNKSIZE):
+            chunk = cast_columns(chunk, table)
+            if writer is None:
+                schema = _arrow_schema(list(chunk.columns), table)
+                writer = pq.ParquetWriter(tmp_name, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        if writer is None:
+            os.unlink(tmp_name)
+            return None
+        writer.close()
+        writer = None
+        os.chmod(tmp_name, 0o666 & ~current_umask())
+        os.replace(tmp_name, output_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+    print(f"✓ Export Parquet typé: {output_path}")
+    return output_path
+
+
+@metrics.phase('chargement_tables')
+def load_table(csv_path: str, columns: Optional[List[str]] = None, table: Optional[str] = None) -> pd.DataFrame:
+    """
+    Charge une table normalisée typée, en ne lisant que les colonnes demandées
+
+    Lit le fichier Parquet associé s'il existe, est à jour par rapport au CSV et
+    que pyarrow est installé ; sinon lit le CSV et applique le même schéma.
+    """
+    pq_path = parquet_path(csv_path)
+    if (parquet_available() and pq_path.exists()
+            and pq_path.stat().st_mtime >= Path(csv_path).stat().st_mtime):
+        return pd.read_parquet(pq_path, columns=columns)
+
+    table = table or table_name(csv_path)
+    df = pd.read_csv(csv_path, usecols=columns, dtype=csv_dtypes(table))
+    if columns is not None:
+        df = df[columns]
+    return cast_columns(df, table)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Catégorie de sort des amendements
+Classe chaque amendement une seule fois, à la normalisation, dans une
+catégorie fermée (colonne sort_categorie) à partir des textes libres
+sort et etat_code
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+
+# Catégories possibles, dans l'ordre d'affichage
+SORT_CATEGORIES: List[str] = ['adopté', 'rejeté', 'retiré', 'irrecevable', 'non soutenu', 'tombé', 'en cours']
+
+# Suffixe des colonnes de comptage (nb_amendements_<suffixe>) de chaque catégorie
+CATEGORIE_COLONNES: Dict[str, str] = {
+    'adopté': 'adoptes',
+    'rejeté': 'rejetes',
+    'retiré': 'retires',
+    'irrecevable': 'irrecevables',
+    'non soutenu': 'non_soutenus',
+    'tombé': 'tombes',
+    'en cours': 'en_cours',
+}
+
+# Motifs recherchés dans le sort, par ordre de priorité
+_SORT_MOTIFS = [
+    ('adopté', re.compile(r'adopt', re.IGNORECASE)),
+    ('rejeté', re.compile(r'rejet', re.IGNORECASE)),
+    ('retiré', re.compile(r'retir', re.IGNORECASE)),
+    ('non soutenu', re.compile(r'non soutenu', re.IGNORECASE)),
+    ('tombé', re.compile(r'tomb|caduque', re.IGNORECASE)),
+]
+
+
+def classify_sort(sort: Any, etat_code: Any) -> str:
+    """
+    Catégorie d'un amendement
+
+    Le sort prononcé en séance ou en commission prime ; à défaut, un état
+    IRR… (irrecevabilité) donne 'irrecevable' ; sinon l'amendement est 'en cours'.
+    """
+    if isinstance(sort, str) and sort:
+        for categorie, motif in _SORT_MOTIFS:
+            if motif.search(sort):
+                return categorie
+    if isinstance(etat_code, str) and 'IRR' in etat_code:
+        return 'irrecevable'
+    return 'en cours'
+
+
+def categorie_counts(df: pd.DataFrame, by: Union[str, List[str]], weights: Optional[str] = None) -> pd.DataFrame:
+    """
+    Nombre d'amendements de chaque catégorie par valeur de by (comptage entier)
+
+    Chaque ligne compte pour un amendement, ou pour la valeur de la colonne
+    weights si elle est indiquée (lignes déjà agrégées, voir cube.py).
+
+    Returns:
+        DataFrame indexé par by, une colonne nb_amendements_<suffixe> par catégorie
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    grouped = df.groupby(keys + ['sort_categorie'], observed=True)
+    counts = (grouped.size() if weights is None else grouped[weights].sum()).unstack(fill_value=0)
+    counts.columns = counts.columns.astype(str)
+    counts = counts.reindex(columns=SORT_CATEGORIES, fill_value=0).astype('int64')
+    counts.columns = [f"nb_amendements_{CATEGORIE_COLONNES[c]}" for c in SORT_CATEGORIES]
+    return counts
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Sources des fichiers JSON : dossiers, archives ZIP publiées par l'AN ou
+magasins compactés (voir packed_store.py)
+Un chemin peut désigner un dossier dans une archive, par exemple
+'AMO10_deputes_actifs_mandats_actifs_organes.json.zip/json/acteur' :
+les membres sont alors lus directement dans l'archive, sans extraction
+"""
+
+import csv
+import os
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import metrics
+
+
+class ZipMember(NamedTuple):
+    """Fichier JSON contenu dans une archive ZIP (se manipule comme un Path)"""
+    archive: str
+    member: str
+    prefix: str = ''
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.member).stem
+
+    def relative_to(self, _root) -> PurePosixPath:
+        """Chemin du membre relatif au dossier source dans l'archive"""
+        path = PurePosixPath(self.member)
+        return path.relative_to(self.prefix) if self.prefix else path
+
+
+class PackedRecord(NamedTuple):
+    """Document JSON stocké sur une ligne d'un segment de magasin compacté"""
+    store: str
+    segment: str
+    offset: int
+    length: int
+    uid: str
+    source: str
+    hash: str
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.source).name
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.source).stem
+
+    def relative_to(self, _root) -> PurePosixPath:
+        """Chemin du fichier d'origine, relatif au dossier source compacté"""
+        return PurePosixPath(self.source)
+
+
+SourceFile = Union[Path, ZipMember, PackedRecord]
+
+# Fichier d'index et de description d'un magasin compacté
+STORE_INDEX = 'index.csv'
+STORE_INFO = 'store.json'
+
+# Archives et segments ouverts par le processus courant (chaque processus du pool a les siens)
+_open_archives: Dict[Tuple[int, str], zipfile.ZipFile] = {}
+_open_segments: Dict[Tuple[int, str], int] = {}
+
+
+def split_zip_path(path: Union[str, Path]) -> Optional[Tuple[str, str]]:
+    """
+    Découpe 'archive.zip/dossier/interne' en ('archive.zip', 'dossier/interne')
+
+    Renvoie None si le chemin ne traverse pas une archive ZIP existante.
+    """
+    parts = Path(path).parts
+    for i, part in enumerate(parts):
+        if part.lower().endswith('.zip'):
+            archive = Path(*parts[:i + 1])
+            if archive.is_file():
+                return str(archive), '/'.join(parts[i + 1:])
+            return None
+    return None
+
+
+def is_packed_store(path: Union[str, Path]) -> bool:
+    """Indique si un dossier est un magasin compacté (segments + index)"""
+    path = Path(path)
+    return (path / STORE_INDEX).is_file() and (path / STORE_INFO).is_file()
+
+
+def iter_packed_records(store_dir: Union[str, Path]) -> Iterator[PackedRecord]:
+    """Génère les documents d'un magasin compacté, dans l'ordre des segments (lecture séquentielle)"""
+    with open(Path(store_dir) / STORE_INDEX, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield PackedRecord(str(store_dir), row['segment'], int(row['offset']), int(row['length']),
+                               row['uid'], row['source'], row['hash'])
+
+
+def source_exists(input_dir: Union[str, Path]) -> bool:
+    """Indique si un dossier source (ou dossier dans une archive) existe"""
+    zip_source = split_zip_path(input_dir)
+    if zip_source is None:
+        return Path(input_dir).exists()
+
+    archive, prefix = zip_source
+    if not prefix:
+        return True
+    with zipfile.ZipFile(archive) as zf:
+        return any(name.startswith(prefix.rstrip('/') + '/') for name in zf.namelist())
+
+
+def source_mtime(input_dir: Union[str, Path]) -> float:
+    """
+    Date de modification la plus récente d'une source (0 si elle n'existe pas)
+
+    Fichier ou archive ZIP : sa date ; magasin compacté : date de son index ;
+    dossier : date la plus récente de ses fichiers et sous-dossiers.
+    """
+    zip_source = split_zip_path(input_dir)
+    if zip_source is not None:
+        return os.stat(zip_source[0]).st_mtime
+    path = Path(input_dir)
+    if not path.exists():
+        return 0.0
+    if not path.is_dir():
+        return path.stat().st_mtime
+    if is_packed_store(path):
+        return (path / STORE_INDEX).stat().st_mtime
+
+    latest = path.stat().st_mtime
+    pending = [str(path)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                latest = max(latest, entry.stat().st_mtime)
+                if entry.is_dir():
+                    pending.append(entry.path)
+    return latest
+
+
+def iter_zip_members(input_dir: Union[str, Path], name_prefix: str = '',
+                     recursive: bool = True) -> Iterator[ZipMember]:
+    """
+    Génère les membres .json d'une archive, dans l'ordre de l'archive (lecture séquentielle)
+
+    Args:
+        input_dir: 'archive.zip' ou 'archive.zip/dossier/interne'
+        name_prefix: Préfixe des noms de fichiers retenus (ex. 'AMAN')
+        recursive: Inclure les sous-dossiers du dossier interne
+    """
+    archive, prefix = split_zip_path(input_dir)
+    prefix = prefix.strip('/')
+    with zipfile.ZipFile(archive) as zf:
+        infos = zf.infolist()
+
+    for info in infos:
+        if info.is_dir():
+            continue
+        member = PurePosixPath(info.filename)
+        if prefix and not info.filename.startswith(prefix + '/'):
+            continue
+        if not recursive and member.parent.as_posix() != (prefix or '.'):
+            continue
+        if member.name.startswith(name_prefix) and member.suffix == '.json':
+            yield ZipMember(archive, info.filename, prefix)
+
+
+def list_json_files(input_dir: Union[str, Path]) -> List[SourceFile]:
+    """Fichiers .json directement dans un dossier (ou un dossier d'archive, ou un magasin compacté)"""
+    if is_packed_store(input_dir):
+        return list(iter_packed_records(input_dir))
+    if split_zip_path(input_dir) is not None:
+        return list(iter_zip_members(input_dir, recursive=False))
+    return list(Path(input_dir).glob('*.json'))
+
+
+def _archive(path: str) -> zipfile.ZipFile:
+    """Archive ouverte pour le processus courant (jamais partagée après un fork)"""
+    key = (os.getpid(), path)
+    zf = _open_archives.get(key)
+    if zf is None:
+        zf = _open_archives[key] = zipfile.ZipFile(path)
+    return zf
+
+
+def _segment(path: str) -> int:
+    """Descripteur d'un segment ouvert pour le processus courant"""
+    key = (os.getpid(), path)
+    fd = _open_segments.get(key)
+    if fd is None:
+        fd = _open_segments[key] = os.open(path, os.O_RDONLY)
+    return fd
+
+
+@metrics.phase('lecture')
+def read_bytes(source_file: SourceFile) -> bytes:
+    """Contenu brut d'un fichier source"""
+    if isinstance(source_file, PackedRecord):
+        segment = os.path.join(source_file.store, source_file.segment)
+        return os.pread(_segment(segment), source_file.length, source_file.offset)
+    if isinstance(source_file, ZipMember):
+        return _archive(source_file.archive).read(source_file.member)
+    with open(source_file, 'rb') as f:
+        return f.read()
+
+
+def member_crc(member: ZipMember) -> int:
+    """CRC-32 d'un membre, lu dans l'en-tête de l'archive (sans décompression)"""
+    return _archive(member.archive).getinfo(member.member).CRC
+
+
+def quick_stat(source_file: SourceFile) -> Tuple[int, int]:
+    """
+    (taille, date de modification) d'un fichier source, sans lire son contenu
+
+    Pour un membre d'archive, la date vient de l'en-tête ZIP (précision 2 s).
+    Pour un document compacté, l'empreinte enregistrée dans l'index tient lieu de date.
+    """
+    if isinstance(source_file, PackedRecord):
+        return source_file.length, int(source_file.hash[:15], 16)
+    if isinstance(source_file, ZipMember):
+        info = _archive(source_file.archive).getinfo(source_file.member)
+        year, month, day, hour, minute, second = info.date_time
+        mtime = ((((year * 100 + month) * 100 + day) * 100 + hour) * 100 + minute) * 100 + second
+        return info.file_size, mtime
+    stat = os.stat(source_file)
+    return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Base SQLite indexée des tables normalisées
+Charge acteurs, organes, mandats, amendements et amendement_cosignataires dans
+une seule base (par lots executemany, une transaction par table), avec les
+clés primaires et index secondaires du schéma relationnel, et fournit les
+regroupements SQL des statistiques par député et par groupe : jointures et
+filtres sont résolus par SQLite, sans charger les tables complètes
+"""
+
+import csv
+import sqlite3
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from schema import TABLE_SCHEMAS, cast_columns, table_name
+from sort_categories import CATEGORIE_COLONNES, SORT_CATEGORIES
+
+
+# Nom de la base, à côté des CSV normalisés
+DATABASE_NAME = 'parlement.sqlite'
+
+# Nombre de lignes insérées par appel à executemany
+SQLITE_BATCH = 10_000
+
+
+class TableKeys(NamedTuple):
+    """Clé primaire et index secondaires d'une table"""
+    primary_key: List[str]
+    indexes: List[List[str]]
+
+
+# Clés du schéma relationnel (voir scripts/README.md) ; l'index des mandats sur
+# (acteur_uid, date_debut) sert aussi à retrouver le groupe à une date donnée
+TABLE_KEYS: Dict[str, TableKeys] = {
+    'acteurs': TableKeys(['acteur_uid'], []),
+    'organes': TableKeys(['organe_uid'], [['code_type']]),
+    'mandats': TableKeys(['mandat_uid'], [['acteur_uid', 'date_debut'], ['organe_uid']]),
+    'amendements': TableKeys(['amendement_uid'], [['auteur_acteur_uid'], ['auteur_groupe_politique_uid'],
+                                                  ['texte_legislatif_ref']]),
+    'amendement_cosignataires': TableKeys(['amendement_uid', 'acteur_uid'], [['acteur_uid']]),
+}
+
+
+def database_path(csv_path: Union[str, Path]) -> Path:
+    """Chemin de la base SQLite associée à un CSV normalisé (même dossier)"""
+    return Path(csv_path).with_name(DATABASE_NAME)
+
+
+def connect(db_path: Union[str, Path]) -> sqlite3.Connection:
+    """Connexion en mode autocommit (transactions explicites), journal WAL"""
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+def _quote(name: str) -> str:
+    """Identifiant SQL entre guillemets"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_bool(value: str) -> Optional[int]:
+    return {'true': 1, 'false': 0}.get(value.lower())
+
+
+def _to_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _column_types(columns: List[str], table: str) -> List[Tuple[str, Callable[[str], Any]]]:
+    """Type SQL et conversion de chaque colonne (booléens et entiers en INTEGER, le reste en TEXT)"""
+    schema = TABLE_SCHEMAS.get(table, {})
+    types = []
+    for col in columns:
+        if col in schema.get('booleans', []):
+            types.append(('INTEGER', _to_bool))
+        elif col in schema.get('integers', []):
+            types.append(('INTEGER', _to_int))
+        else:
+            types.append(('TEXT', str))
+    return types
+
+
+def load_sqlite(csv_path: Union[str, Path], db_path: Union[str, Path], table: Optional[str] = None) -> int:
+    """
+    Remplace une table de la base par le contenu d'un CSV normalisé
+
+    Le CSV est lu ligne à ligne et inséré par lots de SQLITE_BATCH lignes
+    (executemany) dans une seule transaction, qui recrée aussi la table et ses
+    index : la table n'est jamais visible à moitié chargée. Les valeurs vides
+    deviennent NULL ; en cas de clé primaire dupliquée, la première ligne est gardée.
+
+    Returns:
+        Nombre de lignes lues dans le CSV
+    """
+    table = table or table_name(str(csv_path))
+    keys = TABLE_KEYS.get(table)
+    start = time.perf_counter()
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader, None)
+        if columns is None:
+            return 0
+        types = _column_types(columns, table)
+
+        definitions = [f"{_quote(col)} {sql_type}" for col, (sql_type, _) in zip(columns, types)]
+        if keys is not None:
+            definitions.append(f"PRIMARY KEY ({', '.join(map(_quote, keys.primary_key))})")
+        insert = (f"INSERT OR IGNORE INTO {_quote(table)} VALUES ({', '.join('?' * len(columns))})")
+        converters = [convert for _, convert in types]
+
+        conn = connect(db_path)
+        count = 0
+        try:
+            conn.execute('BEGIN')
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(definitions)})")
+            while True:
+                batch = list(islice(reader, SQLITE_BATCH))
+                if not batch:
+                    break
+                conn.executemany(insert, [
+                    [None if value == '' else convert(value) for convert, value in zip(converters, row)]
+                    for row in batch
+                ])
+                count += len(batch)
+            for index_columns in (keys.indexes if keys is not None else []):
+                name = f"idx_{table}_{'_'.join(index_columns)}"
+                conn.execute(f"CREATE INDEX {_quote(name)} ON {_quote(table)} "
+                             f"({', '.join(map(_quote, index_columns))})")
+            conn.execute(f"ANALYZE {_quote(table)}")
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    print(f"✓ {count} lignes chargées dans {db_path} (table {table}) en {time.perf_counter() - start:.1f} s")
+    return count
+
+
+# Groupe de l'auteur à la date de dépôt (voir groupes_temporels.groups_at) : mandat GP
+# de date de début la plus récente (à défaut, dernier dans l'ordre du CSV) au plus tard
+# le jour du dépôt, s'il n'est pas terminé ce jour-là ; sinon, groupe indiqué dans l'amendement
+GROUPE_AU_DEPOT_SQL = """
+COALESCE(
+    (SELECT CASE WHEN m.date_fin IS NULL OR substr(a.date_depot, 1, 10) <= substr(m.date_fin, 1, 10)
+                 THEN m.organe_uid END
+     FROM mandats m
+     WHERE m.acteur_uid = a.auteur_acteur_uid AND m.type_organe = 'GP' AND m.date_debut IS NOT NULL
+       AND substr(m.date_debut, 1, 10) <= substr(a.date_depot, 1, 10)
+     ORDER BY substr(m.date_debut, 1, 10) DESC, m.rowid DESC
+     LIMIT 1),
+    a.auteur_groupe_politique_uid
+)"""
+
+# Dimensions des regroupements SQL → expression sur les amendements (alias a)
+ROLLUP_KEYS = {
+    'acteur_uid': 'a.auteur_acteur_uid',
+    'groupe_uid': GROUPE_AU_DEPOT_SQL,
+}
+
+
+def amendement_filters(texte: Optional[str] = None, depuis: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    Conditions SQL (et paramètres) sur les amendements de députés (alias a)
+
+    texte: texte_legislatif_ref ; depuis: date de dépôt minimale (AAAA-MM-JJ)
+    """
+    conditions, params = ["a.auteur_type = 'Député'"], []
+    if texte:
+        conditions.append('a.texte_legislatif_ref = ?')
+        params.append(texte)
+    if depuis:
+        conditions.append('substr(a.date_depot, 1, 10) >= ?')
+        params.append(depuis)
+    return ' AND '.join(conditions), params
+
+
+def deputes_rollup(conn: sqlite3.Connection, key: str, texte: Optional[str] = None,
+                   depuis: Optional[str] = None) -> pd.DataFrame:
+    """
+    Regroupement SQL des amendements de députés par acteur_uid ou groupe_uid
+
+    Équivalent de cube.rollup sur les amendements de députés : mêmes mesures
+    (nb_amendements, somme_cosignataires, nb_article40, nb_acteurs et une
+    colonne nb_amendements_<suffixe> par catégorie de sort), mêmes lignes
+    (valeur de key manquante ignorée), indexé par key et trié par valeur.
+    """
+    where, params = amendement_filters(texte, depuis)
+    categories = ',\n'.join(
+        f"    SUM(sort_categorie = ?) AS nb_amendements_{CATEGORIE_COLONNES[categorie]}"
+        for categorie in SORT_CATEGORIES
+    )
+    query = f"""
+WITH lignes AS (
+    SELECT {ROLLUP_KEYS[key]} AS cle, a.auteur_acteur_uid AS acteur_uid, a.sort_categorie,
+           COALESCE(a.nb_cosignataires, 0) AS nb_cosignataires, COALESCE(a.soumis_article40, 0) AS article40
+    FROM amendements a
+    WHERE {where}
+)
+SELECT cle AS {key},
+    COUNT(*) AS nb_amendements,
+    SUM(nb_cosignataires) AS somme_cosignataires,
+    SUM(article40) AS nb_article40,
+    COUNT(DISTINCT acteur_uid) AS nb_acteurs,
+{categories}
+FROM lignes
+WHERE cle IS NOT NULL
+GROUP BY cle
+ORDER BY cle
+"""
+    return pd.read_sql_query(query, conn, params=params + SORT_CATEGORIES).set_index(key)
+
+
+def depute_label_tables(conn: sqlite3.Connection, texte: Optional[str] = None,
+                        depuis: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Tables de libellés des députés (voir reports.LABELS), limitées aux auteurs retenus
+
+    acteurs : identité ; mandats : mandats GP, dans l'ordre du CSV (groupe le plus récent).
+    """
+    where, params = amendement_filters(texte, depuis)
+    auteurs = f"SELECT DISTINCT a.auteur_acteur_uid FROM amendements a WHERE {where}"
+    acteurs = pd.read_sql_query(
+        f"SELECT acteur_uid, civilite, prenom, nom, trigramme, profession_libelle FROM acteurs "
+        f"WHERE acteur_uid IN ({auteurs}) ORDER BY rowid", conn, params=params)
+    mandats = pd.read_sql_query(
+        f"SELECT acteur_uid, organe_uid, type_organe, date_debut, date_fin FROM mandats "
+        f"WHERE type_organe = 'GP' AND acteur_uid IN ({auteurs}) ORDER BY rowid", conn, params=params)
+    return {'acteurs': cast_columns(acteurs, 'acteurs'), 'mandats': cast_columns(mandats, 'mandats')}
+
+
+def groupe_label_tables(conn: sqlite3.Connection, groupe_uids: List[str]) -> Dict[str, pd.DataFrame]:
+    """Table de libellés des groupes (voir reports.LABELS), limitée aux groupes retenus"""
+    organes = pd.read_sql_query(
+        f"SELECT organe_uid, libelle, libelle_abrege FROM organes "
+        f"WHERE organe_uid IN ({', '.join('?' * len(groupe_uids))}) ORDER BY rowid", conn, params=groupe_uids)
+    return {'organes': cast_columns(organes, 'organes')}
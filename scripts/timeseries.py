@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Séries temporelles d'activité par député et par groupe politique
+Compte les amendements par semaine et par mois, par catégorie de sort, avec
+des fenêtres glissantes de 4 semaines ; tout est calculé sur des tableaux
+NumPy (découpage des dates en périodes, comptage par np.bincount sur les couples
+entité × période observés, fenêtres par sommes cumulées), sans boucle sur
+les amendements
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset import TableSource, as_table
+from groupes_temporels import build_group_index, groups_at_depot
+from schema import consumer_columns
+from sort_categories import CATEGORIE_COLONNES, SORT_CATEGORIES
+
+
+# Entrée de schema.CONSUMER_COLUMNS (colonnes lues dans chaque table)
+CONSUMER = 'timeseries'
+
+# Fenêtre glissante (en semaines) des séries hebdomadaires
+ROLLING_WEEKS = 4
+
+# Niveau d'agrégation → colonne de l'entité
+NIVEAUX = {'depute': 'acteur_uid', 'groupe': 'groupe_uid'}
+
+FREQUENCES = ['semaine', 'mois']
+
+COUNT_COLUMNS = ['nb_amendements_total'] + [f"nb_amendements_{CATEGORIE_COLONNES[c]}" for c in SORT_CATEGORIES]
+ROLLING_COLUMNS = [f"nb_amendements_{ROLLING_WEEKS}sem", f"nb_amendements_adoptes_{ROLLING_WEEKS}sem"]
+
+
+def period_codes(dates: pd.Series, frequence: str) -> np.ndarray:
+    """
+    Numéro de période de chaque date : semaines (commençant le lundi) ou mois
+    depuis le 1970-01-01 ; -1 pour une date manquante
+    """
+    values = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+    missing = np.isnat(values)
+    if frequence == 'semaine':
+        # Le 1970-01-01 est un jeudi : décaler de 3 jours pour commencer au lundi
+        codes = (values.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    else:
+        codes = values.astype('datetime64[M]').astype(np.int64)
+    codes[missing] = -1
+    return codes
+
+
+def period_starts(codes: np.ndarray, frequence: str) -> np.ndarray:
+    """Date de début (AAAA-MM-JJ) de chaque numéro de période"""
+    if frequence == 'semaine':
+        return (codes * 7 - 3).astype('datetime64[D]').astype(str)
+    return codes.astype('datetime64[M]').astype('datetime64[D]').astype(str)
+
+
+def activity_series(entities: pd.Series, periods: np.ndarray, categories: pd.Series,
+                    frequence: str) -> pd.DataFrame:
+    """
+    Comptages par entité et par période, au format long
+
+    Seuls les couples (entité, période) observés sont comptés (np.bincount sur
+    leur rang, clé entité × période), ainsi que, pour les semaines, les
+    ROLLING_WEEKS - 1 semaines suivantes où la fenêtre glissante reste non
+    nulle ; la mémoire suit le nombre de couples observés et non le produit
+    entités × périodes.
+    """
+    entity_codes, entity_uids = pd.factorize(entities, sort=True)
+    category_codes = pd.Categorical(categories, categories=SORT_CATEGORIES).codes
+    valid = (entity_codes >= 0) & (periods >= 0) & (category_codes >= 0)
+    if not valid.any():
+        return pd.DataFrame(columns=['entite_uid', 'periode'] + COUNT_COLUMNS + ROLLING_COLUMNS)
+
+    first = periods[valid].min()
+    n_periods, n_categories = periods[valid].max() - first + 1, len(SORT_CATEGORIES)
+    # Clé entité × période, triée par entité puis par période
+    observed = entity_codes[valid].astype(np.int64) * n_periods + (periods[valid] - first)
+    keys, inverse = np.unique(observed, return_inverse=True)
+    counts = np.bincount(inverse * n_categories + category_codes[valid], minlength=len(keys) * n_categories)
+    counts = counts.reshape(len(keys), n_categories)
+    totals = counts.sum(axis=1)
+
+    rows = keys
+    if frequence == 'semaine':
+        # Semaines suivant une semaine active (dans la plage observée) : leur fenêtre est non nulle
+        shifted = [keys + offset for offset in range(1, ROLLING_WEEKS)]
+        shifted = [candidates[candidates % n_periods >= offset]
+                   for offset, candidates in enumerate(shifted, start=1)]
+        rows = np.unique(np.concatenate([keys] + shifted))
+    position = np.searchsorted(keys, rows)
+    observed_row = position < len(keys)
+    observed_row[observed_row] = keys[position[observed_row]] == rows[observed_row]
+
+    def expand(values: np.ndarray) -> np.ndarray:
+        """Valeurs des couples observés étendues aux lignes (0 ailleurs)"""
+        expanded = np.zeros(len(rows), dtype=values.dtype)
+        expanded[observed_row] = values[position[observed_row]]
+        return expanded
+
+    columns = {'nb_amendements_total': expand(totals)}
+    for i, categorie in enumerate(SORT_CATEGORIES):
+        columns[f"nb_amendements_{CATEGORIE_COLONNES[categorie]}"] = expand(counts[:, i])
+
+    if frequence == 'semaine':
+        # Somme glissante sur les ROLLING_WEEKS dernières semaines de la même entité
+        # (sommes cumulées sur les couples observés, bornées au début de l'entité)
+        entity_start = rows - rows % n_periods
+        upper = np.searchsorted(keys, rows, side='right')
+        lower = np.searchsorted(keys, np.maximum(rows - ROLLING_WEEKS, entity_start - 1), side='right')
+        for name, values in zip(ROLLING_COLUMNS, (totals, counts[:, SORT_CATEGORIES.index('adopté')])):
+            cumulated = np.concatenate([[0], np.cumsum(values)])
+            columns[name] = cumulated[upper] - cumulated[lower]
+
+    series = pd.DataFrame({
+        'entite_uid': np.asarray(entity_uids)[rows // n_periods],
+        'periode': period_starts(rows % n_periods + first, frequence),
+    })
+    for name, values in columns.items():
+        series[name] = values.astype(np.int32)
+    if frequence != 'semaine':
+        for name in ROLLING_COLUMNS:
+            series[name] = pd.array([pd.NA] * len(series), dtype='Int32')
+    return series
+
+
+def compute_timeseries(amendements: TableSource, mandats: TableSource, output_csv: str,
+                       date_column: str = 'date_depot') -> Optional[pd.DataFrame]:
+    """
+    Calcule les séries d'activité hebdomadaires et mensuelles et les exporte en CSV
+
+    Seuls les amendements de députés sont comptés ; le groupe d'un amendement
+    est celui de son auteur à la date de dépôt (voir groupes_temporels.py).
+    date_column choisit la date qui place l'amendement dans le temps
+    (date_depot, date_publication ou date_sort).
+
+    Returns:
+        Table longue : niveau (depute/groupe), entite_uid, frequence
+        (semaine/mois), periode (date de début), un comptage par catégorie de
+        sort et, pour les semaines, les sommes glissantes sur ROLLING_WEEKS semaines
+    """
+    amendements = as_table(amendements, columns=consumer_columns(CONSUMER, 'amendements'), table='amendements')
+    mandats = as_table(mandats, columns=consumer_columns(CONSUMER, 'mandats'), table='mandats')
+    if date_column not in amendements.columns:
+        print(f"Erreur: colonne de date inconnue '{date_column}'")
+        return None
+
+    deputes = amendements[amendements['auteur_type'] == 'Député']
+    entities = {
+        'acteur_uid': deputes['auteur_acteur_uid'],
+        'groupe_uid': groups_at_depot(build_group_index(mandats), deputes),
+    }
+
+    parts = []
+    for frequence in FREQUENCES:
+        periods = period_codes(deputes[date_column], frequence)
+        for niveau, column in NIVEAUX.items():
+            series = activity_series(entities[column], periods, deputes['sort_categorie'], frequence)
+            series.insert(0, 'niveau', niveau)
+            series.insert(2, 'frequence', frequence)
+            parts.append(series)
+
+    timeseries = pd.concat(parts, ignore_index=True).sort_values(
+        ['niveau', 'entite_uid', 'frequence', 'periode'], kind='stable')
+
+    output_path = Path(output_csv)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    timeseries.to_csv(output_csv, index=False, encoding='utf-8')
+
+    print(f"✓ {len(timeseries)} lignes de séries temporelles ({date_column}) exportées vers {output_csv}")
+    return timeseries
+
+
+if __name__ == '__main__':
+    base_dir = Path(__file__).parent.parent
+    csv_dir = base_dir / "data" / "csv"
+
+    if not (csv_dir / "amendements.csv").exists():
+        print(f"Erreur: amendements.csv non trouvé dans {csv_dir}")
+        sys.exit(1)
+
+    compute_timeseries(
+        str(csv_dir / "amendements.csv"),
+        str(csv_dir / "mandats.csv"),
+        str(base_dir / "data" / "stats" / "activite_temporelle.csv"),
+        date_column=sys.argv[1] if len(sys.argv) > 1 else 'date_depot'
+    )